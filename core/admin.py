@@ -1,6 +1,6 @@
 
 from django.contrib import admin
-from .models import Branch, Customer, Vehicle, WorkOrder, WorkPart, WorkLabor, Payment
+from .models import TOTAL_FIELDS, Branch, Customer, DailyRollup, ExportJob, StaffProfile, Vehicle, WorkOrder, WorkPart, WorkLabor, Payment
 
 admin.site.site_header = "썬바이크 정비센터 관리자"
 admin.site.site_title = "썬바이크 관리자"
@@ -11,6 +11,12 @@ class BranchAdmin(admin.ModelAdmin):
     list_display = ("name","phone","address","created_at")
     search_fields = ("name","phone","address")
 
+@admin.register(StaffProfile)
+class StaffProfileAdmin(admin.ModelAdmin):
+    list_display = ("user","branch","all_branches")
+    list_filter = ("branch","all_branches")
+    search_fields = ("user__username",)
+
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ("name","phone","email","created_at")
@@ -23,10 +29,23 @@ class VehicleAdmin(admin.ModelAdmin):
 
 @admin.register(WorkOrder)
 class WorkOrderAdmin(admin.ModelAdmin):
-    list_display = ("order_no","status","branch","vehicle","in_datetime","total_amount")
+    list_display = ("order_no","status","branch","vehicle","in_datetime","total_amount","balance_due")
     search_fields = ("order_no","vehicle__model","vehicle__plate_no","vehicle__customer__name","vehicle__customer__phone")
     list_filter = ("status","branch")
+    readonly_fields = tuple(TOTAL_FIELDS)  # 라인/결제로만 바뀐다 (WorkOrder.save 는 쓰지 않음)
 
 admin.site.register(WorkPart)
 admin.site.register(WorkLabor)
 admin.site.register(Payment)
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id","kind","status","branch","date_from","date_to","done","total","created_at","host","pid","heartbeat_at")
+    list_filter = ("status","kind","branch")
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("day","branch","technician_key","order_count","revenue_total","payment_total","updated_at")
+    list_filter = ("branch",)
+    date_hierarchy = "day"
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import checks, metrics, signals  # noqa: F401
+        connection_created.connect(metrics.connection_created, dispatch_uid="core.metrics.connection_created")
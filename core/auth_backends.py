@@ -0,0 +1,32 @@
+"""인증 백엔드 - request.user 를 워커 메모리에 잠깐 캐시한다
+
+로그인한 직원의 요청마다 auth_user 를 SELECT 하지 않도록 ModelBackend.get_user 결과를
+AUTH_USER_CACHE_TTL 초 동안 보관한다. 같은 워커의 사용자 저장/삭제는 core.signals 가 바로 지우고,
+다른 워커는 TTL 이 지나야 반영된다 (비활성화/권한 변경이 최대 TTL 초 늦게 적용됨).
+요청마다 얕은 복사본을 돌려줘 권한 캐시(_perm_cache) 등이 요청 사이에 공유되지 않게 한다.
+"""
+from __future__ import annotations
+
+import copy
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from .utils import TTLCache
+
+_users = TTLCache(maxsize=512, ttl=getattr(settings, "AUTH_USER_CACHE_TTL", 30))
+
+
+def forget(user_id) -> None:
+    _users.delete(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        user = _users.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            _users.set(user_id, user)
+        return copy.copy(user)
@@ -0,0 +1,140 @@
+"""지점(센터) 컨텍스트
+
+요청마다 '지금 보고 있는 지점'을 정해 request.branch_id 와 ContextVar 에 둔다.
+- 소속 지점이 있고 전체 조회 권한이 없는 직원(StaffProfile): 항상 소속 지점
+- 슈퍼유저 / 전체 조회 권한자 / 프로필이 없는 계정: 세션에서 고른 지점 (없으면 전체 - 기존 동작)
+
+뷰는 WorkOrder.objects.scoped() 나 scope(qs) 로 걸러 쓰고, DB 라우터(core.routers)도 같은 값을 읽는다.
+직원 소속/지점 목록은 캐시에 짧게 두고 저장 시 지운다 (다른 워커는 TTL 로 반영).
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.cache import cache
+
+from .models import Branch, StaffProfile
+
+SESSION_KEY = "branch_id"
+CACHE_TTL = 60
+
+_current: ContextVar[int | None] = ContextVar("core_branch_id", default=None)
+
+
+def current_branch_id() -> int | None:
+    return _current.get()
+
+
+@contextmanager
+def activate(branch_id: int | None):
+    """요청 밖(명령/작업)에서 지점 컨텍스트를 잠시 지정한다."""
+    token = _current.set(branch_id)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def _profile_key(user_id: int) -> str:
+    return f"branch_scope:{user_id}"
+
+
+def profile(user) -> tuple[int | None, bool]:
+    """(소속 지점 id, 지점 전환 가능 여부)"""
+    if not user.is_authenticated:
+        return None, False
+    key = _profile_key(user.pk)
+    hit = cache.get(key)
+    if hit is None:
+        row = StaffProfile.objects.filter(user_id=user.pk).values_list("branch_id", "all_branches").first()
+        hit = (row[0], row[1] or not row[0]) if row else (None, True)
+        cache.set(key, hit, CACHE_TTL)
+    home, can_switch = hit
+    return home, can_switch or user.is_superuser
+
+
+def forget(user_id: int) -> None:
+    cache.delete(_profile_key(user_id))
+
+
+def branch_choices() -> list[tuple[int, str]]:
+    hit = cache.get("branch_choices")
+    if hit is None:
+        hit = list(Branch.objects.order_by("name").values_list("pk", "name"))
+        cache.set("branch_choices", hit, CACHE_TTL * 5)
+    return hit
+
+
+def forget_branches() -> None:
+    cache.delete("branch_choices")
+
+
+def resolve(request) -> int | None:
+    home, can_switch = profile(request.user)
+    if not can_switch:
+        return home
+    selected = request.session.get(SESSION_KEY) if hasattr(request, "session") else None
+    return selected if isinstance(selected, int) else None
+
+
+def can_switch(user) -> bool:
+    return profile(user)[1]
+
+
+def scope(qs, branch_id: int | None = None, field: str = "branch_id"):
+    """지점 컨텍스트로 쿼리셋을 거른다 (WorkOrder 외 모델은 field 로 경로 지정)."""
+    branch_id = branch_id or current_branch_id()
+    return qs.filter(**{field: branch_id}) if branch_id else qs
+
+
+@contextmanager
+def _request_scope(branch_id: int | None):
+    from . import routers
+
+    token = _current.set(branch_id)
+    pin = routers.reset_pin()
+    try:
+        yield
+    finally:
+        routers.restore_pin(pin)
+        _current.reset(token)
+
+
+class BranchContextMiddleware:
+    """AuthenticationMiddleware 뒤에 둔다. ASGI 에서는 async 로 동작 (사용자/세션 조회만 스레드에서)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.branch_id = resolve(request)
+        with _request_scope(request.branch_id):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.branch_id = await sync_to_async(resolve)(request)
+        with _request_scope(request.branch_id):
+            return await self.get_response(request)
+
+
+def context(request) -> dict:
+    """템플릿 컨텍스트 - 상단 지점 선택/표시용"""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    branch_id = getattr(request, "branch_id", None)
+    choices = branch_choices()
+    return {
+        "current_branch_id": branch_id,
+        "current_branch_name": dict(choices).get(branch_id, "전체 지점"),
+        "branch_choices": choices if can_switch(user) and len(choices) > 1 else [],
+    }
@@ -0,0 +1,20 @@
+"""시작 시 설정 점검 (manage.py check / runserver / migrate 때 Django system check 로 실행)"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+def order_no_errors(fmt: str, per_branch: bool) -> list[Error]:
+    """지점별 카운터는 지점마다 1번부터 세므로 형식에 {branch} 가 없으면 두 지점의 첫 접수번호가 같아진다."""
+    if per_branch and "{branch" not in fmt:
+        return [Error(
+            "ORDER_NO_PER_BRANCH=1 인데 ORDER_NO_FORMAT 에 {branch} 가 없습니다.",
+            hint='지점별 번호가 겹쳐 WorkOrder.order_no 가 중복됩니다. 예: ORDER_NO_FORMAT="{date:%Y%m%d}-{branch}-{seq:03d}"',
+            id="core.E001",
+        )]
+    return []
+
+
+@register()
+def order_no_settings(app_configs, **kwargs):
+    return order_no_errors(getattr(settings, "ORDER_NO_FORMAT", "{date:%Y%m%d}-{seq:03d}"),
+                           getattr(settings, "ORDER_NO_PER_BRANCH", False))
@@ -0,0 +1,29 @@
+"""벤치마크(bench)용 버리는 테스트 DB - 운영 DB 는 건드리지 않는다."""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection, connections
+
+from . import utils
+
+
+@contextmanager
+def test_database(keepdb: bool = False, prefix: str = "check"):
+    """설정된 DB 백엔드로 테스트 DB 를 만들고 끝나면 지운다. SQLite 는 스레드 동시 쓰기 때문에 파일 DB 로."""
+    tmpdir = None
+    if connection.vendor == "sqlite":
+        tmpdir = tempfile.mkdtemp(prefix=f"{prefix}_")
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tmpdir, f"{prefix}.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        utils._blocks.clear()
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        if tmpdir and not keepdb:
+            shutil.rmtree(tmpdir, ignore_errors=True)
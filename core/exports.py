@@ -0,0 +1,153 @@
+"""작업오더/부품/공임/결제 데이터 내보내기 (CSV 스트리밍, XLSX)
+
+values_list().iterator(chunk_size=...) 로 행을 흘려보내므로 몇 년치를 내보내도 메모리가
+일정하고, CSV 는 StreamingHttpResponse 로 첫 바이트가 바로 나가 프록시 타임아웃에 걸리지 않는다.
+
+ASGI 에서 Django 는 sync 이터레이터 StreamingHttpResponse 를 끝까지 list() 로 모은 뒤 보낸다 (메모리 일정이 깨짐).
+그래서 ASGI 는 aiter_csv() 로 async 이터레이터를 준다.
+"""
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .models import Payment, WorkLabor, WorkOrder, WorkPart
+
+CHUNK_SIZE = 2000
+CSV_ASYNC_LINES = 500  # aiter_csv 가 sync 스레드에 한 번 넘어갈 때 꺼내는 줄 수
+# 엑셀이 수식으로 실행하는 첫 글자 - 고객이 입력한 값(이름/메모/품목명 등)은 ' 를 붙여 글자로 둔다
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    model: type
+    columns: tuple[tuple[str, str], ...]  # (헤더, values_list 경로)
+    order_path: str  # 작업오더까지의 경로 ("" = 자기 자신)
+    date_field: str
+
+
+def _prefixed(order_path: str, name: str) -> str:
+    return f"{order_path}__{name}" if order_path else name
+
+
+EXPORTS: dict[str, ExportSpec] = {
+    "workorders": ExportSpec(WorkOrder, (
+        ("접수번호", "order_no"), ("지점", "branch__name"), ("상태", "status"),
+        ("입고일시", "in_datetime"), ("출고일시", "out_datetime"), ("담당자", "assigned_to__username"),
+        ("고객명", "vehicle__customer__name"), ("전화번호", "vehicle__customer__phone"),
+        ("차량 모델", "vehicle__model"), ("번호판", "vehicle__plate_no"), ("VIN", "vehicle__vin"),
+        ("입고 주행거리", "odometer_in"), ("출고 주행거리", "odometer_out"),
+        ("부품 소계", "subtotal_parts"), ("공임 소계", "subtotal_labor"), ("할인", "discount_amount"),
+        ("부가세", "tax_amount"), ("총액", "total_amount"), ("결제액", "paid_amount"), ("미수금", "balance_due"),
+    ), "", "in_datetime"),
+    "parts": ExportSpec(WorkPart, (
+        ("접수번호", "work_order__order_no"), ("지점", "work_order__branch__name"),
+        ("입고일시", "work_order__in_datetime"), ("부품/소모품명", "part_name"),
+        ("수량", "qty"), ("단가", "unit_price"), ("금액", "line_total"),
+    ), "work_order", "work_order__in_datetime"),
+    "labor": ExportSpec(WorkLabor, (
+        ("접수번호", "work_order__order_no"), ("지점", "work_order__branch__name"),
+        ("입고일시", "work_order__in_datetime"), ("공임 항목", "labor_name"),
+        ("시간(분)", "minutes"), ("금액", "price"),
+    ), "work_order", "work_order__in_datetime"),
+    "payments": ExportSpec(Payment, (
+        ("접수번호", "work_order__order_no"), ("지점", "work_order__branch__name"),
+        ("결제일시", "paid_at"), ("결제수단", "method"), ("금액", "amount"), ("비고", "note"),
+    ), "work_order", "paid_at"),
+}
+
+
+def export_queryset(kind: str, branch_id: int | None = None, status: str | None = None,
+                    date_from: date | None = None, date_to: date | None = None):
+    spec = EXPORTS[kind]
+    qs = spec.model.objects.all()
+    if branch_id:
+        qs = qs.filter(**{_prefixed(spec.order_path, "branch_id"): branch_id})
+    if status:
+        qs = qs.filter(**{_prefixed(spec.order_path, "status"): status})
+    tz = timezone.get_current_timezone()
+    if date_from:
+        qs = qs.filter(**{f"{spec.date_field}__gte": datetime.combine(date_from, time.min, tzinfo=tz)})
+    if date_to:
+        qs = qs.filter(**{f"{spec.date_field}__lt": datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)})
+    return qs.order_by(spec.date_field, "pk")
+
+
+def parse_filters(params) -> dict:
+    """GET/옵션 값(branch, status, from, to)을 export_queryset 인자로. 잘못된 값은 ValueError."""
+    def _date(v):
+        return date.fromisoformat(v) if v else None
+    return {
+        "branch_id": int(params["branch"]) if params.get("branch") else None,
+        "status": params.get("status") or None,
+        "date_from": _date(params.get("from")),
+        "date_to": _date(params.get("to")),
+    }
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return "" if value is None else value
+
+
+def iter_rows(kind: str, **filters):
+    """헤더 행 다음에 데이터 행을 하나씩 돌려준다."""
+    spec = EXPORTS[kind]
+    yield [header for header, _ in spec.columns]
+    rows = export_queryset(kind, **filters).values_list(*[path for _, path in spec.columns])
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield [_cell(v) for v in row]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(kind: str, **filters):
+    """CSV 줄 단위 제너레이터 (엑셀 한글용 BOM 포함)"""
+    writer = csv.writer(_Echo())
+    yield "\ufeff"
+    for row in iter_rows(kind, **filters):
+        yield writer.writerow(row)
+
+
+async def aiter_csv(kind: str, **filters):
+    """iter_csv 의 async 판 (ASGI) - 같은 제너레이터를 CSV_ASYNC_LINES 줄씩 sync 스레드에서 꺼낸다.
+
+    ORM 커서는 만든 스레드에서만 써야 해서 thread_sensitive 실행기(이 요청의 sync 코드가 도는 스레드)를 쓴다.
+    꺼내는 동안은 그 스레드를 차지하고, 묶음 사이에 이벤트 루프로 돌아가 보낸다.
+    """
+    lines = iter_csv(kind, **filters)
+    take = sync_to_async(lambda: "".join(islice(lines, CSV_ASYNC_LINES)), thread_sensitive=True)
+    try:
+        while chunk := await take():
+            yield chunk
+    finally:  # 중간에 끊겨도 커서를 연 스레드에서 닫는다
+        await sync_to_async(lines.close, thread_sensitive=True)()
+
+
+def write_xlsx(kind: str, fileobj, **filters) -> int:
+    """openpyxl write-only 모드로 fileobj 에 기록한다 (행을 메모리에 쌓지 않음)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(kind)
+    n = -1
+    for row in iter_rows(kind, **filters):
+        ws.append(row)
+        n += 1
+    wb.save(fileobj)
+    return n
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Customer, Vehicle, WorkOrder, WorkPart, WorkLabor, Payment
+from .models import Customer, ExportJob, Vehicle, WorkOrder, WorkPart, WorkLabor, Payment
 
 class CustomerForm(forms.ModelForm):
     class Meta:
@@ -42,3 +42,18 @@ class PaymentForm(forms.ModelForm):
         model = Payment
         fields = ["method","amount","paid_at","note"]
         widgets = {"paid_at": forms.DateTimeInput(attrs={"type":"datetime-local"})}
+
+class ExportJobForm(forms.ModelForm):
+    class Meta:
+        model = ExportJob
+        fields = ["kind","branch","date_from","date_to"]
+        widgets = {
+            "date_from": forms.DateInput(attrs={"type":"date"}),
+            "date_to": forms.DateInput(attrs={"type":"date"}),
+        }
+
+# 일괄 입력(add_lines)용 - JSON 요청도 같은 폼으로 검증한다
+LINE_FORMSET_MAX = 200
+WorkPartFormSet = forms.formset_factory(WorkPartForm, extra=0, max_num=LINE_FORMSET_MAX, validate_max=True)
+WorkLaborFormSet = forms.formset_factory(WorkLaborForm, extra=0, max_num=LINE_FORMSET_MAX, validate_max=True)
+PaymentFormSet = forms.formset_factory(PaymentForm, extra=0, max_num=LINE_FORMSET_MAX, validate_max=True)
@@ -0,0 +1,125 @@
+"""직원 화면 조각 캐시 (대시보드 행, 상세 화면 라인 표)
+
+- 대시보드 행: 작업오더별로 (id, updated_at) 키에 행 HTML 을 둔다. 합계/상태가 바뀌면 updated_at 이 바뀌어
+  자연히 새 키가 되고, 한 페이지(50건)는 get_many 한 번으로 가져와 없는 행만 렌더링한다.
+- 행에 같이 나오는 고객/차량/담당자가 바뀌면 core.signals 가 bump() 로 세대(generation)를 올린다.
+- 상세 화면 부품/공임/결제 표는 오더 updated_at 과 오더별 라인 버전으로 키를 만들고, 라인 저장/삭제 때
+  bump_lines() 로 올린다 (금액이 같은 수정은 updated_at 이 안 바뀜).
+- 키에는 조각 템플릿 내용 해시가 들어가 배포 후 파일/Redis 캐시에 남은 옛 HTML 을 쓰지 않는다.
+
+세대/라인 버전은 워커 간 공유돼야 하므로 FRAGMENT_CACHE 가 프로세스 메모리(LocMem)면 조각 캐시를 쓰지 않는다.
+
+행에는 {% csrf_token %} 이 있어서 자리표시자로 렌더링해 캐시하고, 내보낼 때 요청의 토큰으로 바꾼다.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from . import metrics
+from .utils import shared_cache
+
+ROW_TEMPLATE = "core/_order_row.html"
+TEMPLATES = (ROW_TEMPLATE, "core/workorder_detail.html")
+CSRF_PLACEHOLDER = "__csrf_token__"
+GENERATION_KEY = "fragments:gen"
+
+_template_hash: str | None = None
+
+
+def alias() -> str:
+    return getattr(settings, "FRAGMENT_CACHE", "default")
+
+
+def _cache():
+    """공유 캐시일 때만 - LocMem 이면 다른 워커의 bump() 를 못 봐서 옛 조각을 TTL 동안 보여 준다"""
+    return shared_cache(alias())
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "FRAGMENT_CACHE_TTL", 600))
+
+
+def template_hash() -> str:
+    global _template_hash
+    if _template_hash is None:
+        digest = hashlib.sha256()
+        for name in TEMPLATES:
+            digest.update(get_template(name).template.source.encode())
+        _template_hash = digest.hexdigest()[:10]
+    return _template_hash
+
+
+def version() -> str:
+    return f"{template_hash()}.{_cache().get_or_set(GENERATION_KEY, 1, None)}"
+
+
+def _incr(keys: Iterable[str]) -> None:
+    cache = _cache()
+    if cache is None:
+        return
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:  # 키가 아직 없음 - 그 버전으로 캐시된 조각도 없다
+            pass
+
+
+def bump() -> None:
+    """모든 조각을 현재 트랜잭션 커밋 후 무효화 (고객/차량/직원 정보 변경)"""
+    transaction.on_commit(lambda: _incr([GENERATION_KEY]))
+
+
+def _lines_key(order_id: int) -> str:
+    return f"fragments:lines:{order_id}"
+
+
+def lines_version(order_id: int) -> int:
+    return _cache().get_or_set(_lines_key(order_id), 1, None)
+
+
+def bump_lines(order_ids: Iterable[int | None]) -> None:
+    keys = {_lines_key(pk) for pk in order_ids if pk}
+    if keys:
+        transaction.on_commit(lambda: _incr(keys))
+
+
+def context(order=None) -> dict:
+    """{% cache fragment_ttl "이름" ... fragment_version using=fragment_cache %} 에 쓰는 값"""
+    if _cache() is None:  # 유지시간 0 - 저장 즉시 만료되어 매번 렌더링
+        return {"fragment_cache": alias(), "fragment_ttl": 0, "fragment_version": template_hash(), "lines_version": 0}
+    ctx = {"fragment_cache": alias(), "fragment_ttl": _ttl(), "fragment_version": version()}
+    if order is not None:
+        ctx["lines_version"] = lines_version(order.pk)
+    return ctx
+
+
+def order_rows(request, orders) -> str:
+    """대시보드 행 HTML - 캐시에 있는 행은 그대로, 없는 행만 렌더링해서 채운다."""
+    orders = list(orders)
+    if not orders:
+        return ""
+    template = get_template(ROW_TEMPLATE)
+    cache = _cache()
+    if cache is None:
+        html = "".join(template.render({"o": o, "csrf_token": CSRF_PLACEHOLDER}) for o in orders)
+        return mark_safe(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+    ver = version()
+    keys = {o.pk: f"fragments:row:{ver}:{o.pk}:{o.updated_at.timestamp():.6f}" for o in orders}
+    found = cache.get_many(keys.values())
+    missing = {}
+    for o in orders:
+        if keys[o.pk] not in found:
+            missing[keys[o.pk]] = template.render({"o": o, "csrf_token": CSRF_PLACEHOLDER})
+    if missing:
+        cache.set_many(missing, _ttl())
+    metrics.fragment_cache.inc(len(found), result="hit")
+    metrics.fragment_cache.inc(len(missing), result="miss")
+    html = "".join(found.get(keys[o.pk]) or missing[keys[o.pk]] for o in orders)
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, get_token(request)))
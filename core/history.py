@@ -0,0 +1,161 @@
+"""차량별 정비 이력 (타임라인)
+
+차량 한 대의 작업오더를 최신순 keyset 페이지로 읽고(core_wo_vehicle_hist_idx), 부품/공임은 Prefetch 로
+페이지당 쿼리 수를 고정한다. 결과는 JSON 으로 바로 쓸 수 있는 dict 로 만들어 캐시에 둔다.
+작업오더는 다른 화면처럼 지점 컨텍스트로 거르고, 캐시 키에도 지점이 들어간다.
+
+캐시 키에는 차량별 버전이 들어간다. 라인/결제/오더/차량/고객이 바뀌면 core.signals 가 bump() 로
+버전을 올려 그 차량의 모든 페이지가 한 번에 무효가 된다 (지난 키는 TTL 로 사라짐).
+버전은 워커 간 공유되는 캐시에 있어야 하므로 VEHICLE_HISTORY_CACHE 가 프로세스 메모리(LocMem)면 캐시하지 않는다.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Prefetch, Q, Sum
+from django.utils import timezone
+
+from . import search
+from .branching import current_branch_id
+from .models import Vehicle, WorkLabor, WorkOrder, WorkPart
+from .pagination import keyset_page
+from .utils import shared_cache
+
+
+def _cache():
+    """공유 캐시일 때만 - LocMem 이면 다른 워커의 bump() 를 못 봐서 옛 이력을 TTL 동안 보여 준다"""
+    return shared_cache(getattr(settings, "VEHICLE_HISTORY_CACHE", "default"))
+
+
+def _version_key(vehicle_id: int) -> str:
+    return f"vehicle_history:v:{vehicle_id}"
+
+
+def _version(cache, vehicle_id: int) -> int:
+    return cache.get_or_set(_version_key(vehicle_id), 1, None)
+
+
+def _bump_now(vehicle_ids: set[int]) -> None:
+    cache = _cache()
+    for vehicle_id in vehicle_ids:
+        try:
+            cache.incr(_version_key(vehicle_id))
+        except ValueError:  # 버전 키가 아직 없음 - 캐시된 페이지도 없다
+            pass
+
+
+def bump(vehicle_ids: Iterable[int | None]) -> None:
+    """차량들의 이력 캐시를 현재 트랜잭션 커밋 후 무효화한다 (커밋 전 값이 다시 캐시되지 않도록)."""
+    if _cache() is None:
+        return
+    vehicle_ids = {v for v in vehicle_ids if v}
+    if vehicle_ids:
+        transaction.on_commit(lambda: _bump_now(vehicle_ids))
+
+
+def bump_orders(order_ids: Iterable[int | None]) -> None:
+    order_ids = [pk for pk in order_ids if pk]
+    if order_ids:
+        bump(WorkOrder.objects.filter(pk__in=order_ids).values_list("vehicle_id", flat=True))
+
+
+def resolve_vehicle(ident: str) -> Vehicle | None:
+    """차량 id, 번호판 또는 VIN 으로 차량을 찾는다 (번호판은 공백/하이픈 무시)."""
+    ident = (ident or "").strip()
+    if not ident:
+        return None
+    if ident.isdigit():
+        found = Vehicle.objects.select_related("customer").filter(pk=int(ident)).first()
+        if found:
+            return found
+    compact = search.normalize(ident)
+    vehicles = Vehicle.objects.select_related("customer").order_by("-id")
+    found = vehicles.filter(Q(plate_no__in={ident, compact, compact.upper()})
+                            | Q(vin__iexact=ident) | Q(vin__iexact=compact)).first()
+    if found or len(compact) < 4:
+        return found
+    # 번호판을 띄어쓰기/하이픈을 섞어 저장한 경우 - 검색 색인으로 후보를 좁히고 정규화해서 비교
+    candidates = search.filter_orders(WorkOrder.objects.all(), compact).values("vehicle_id")
+    for vehicle in vehicles.filter(pk__in=candidates)[:50]:
+        if compact in (search.normalize(vehicle.plate_no), search.normalize(vehicle.vin)):
+            return vehicle
+    return None
+
+
+def _iso(dt) -> str | None:
+    return timezone.localtime(dt).isoformat() if dt else None
+
+
+def summary(vehicle: Vehicle, branch_id: int | None = None) -> dict:
+    """방문 횟수/첫·마지막 방문/누적 금액/마지막 주행거리 - 취소 오더 제외, 지점 컨텍스트 안에서"""
+    qs = WorkOrder.objects.scoped(branch_id).filter(vehicle=vehicle).exclude(status=WorkOrder.Status.CANCELED)
+    agg = qs.aggregate(visits=Count("pk"), first_visit=Min("in_datetime"), last_visit=Max("in_datetime"),
+                       total_spent=Sum("total_amount"), balance_due=Sum("balance_due"))
+    last_odometer = (qs.filter(odometer_in__isnull=False).order_by("-in_datetime", "-id")
+                     .values_list("odometer_in", flat=True).first())
+    return {
+        "visits": agg["visits"],
+        "first_visit": _iso(agg["first_visit"]),
+        "last_visit": _iso(agg["last_visit"]),
+        "total_spent": int(agg["total_spent"] or 0),
+        "balance_due": int(agg["balance_due"] or 0),
+        "last_odometer": last_odometer,
+    }
+
+
+def _order_dict(o: WorkOrder) -> dict:
+    return {
+        "id": o.pk,
+        "order_no": o.order_no,
+        "status": o.status,
+        "status_display": o.get_status_display(),
+        "branch": o.branch.name,
+        "technician": o.assigned_to.get_username() if o.assigned_to else None,
+        "in_datetime": _iso(o.in_datetime),
+        "out_datetime": _iso(o.out_datetime),
+        "odometer_in": o.odometer_in,
+        "complaint": o.customer_complaint,
+        "work_detail": o.work_detail,
+        "recommendations": o.recommendations,
+        "total_amount": int(o.total_amount),
+        "balance_due": int(o.balance_due),
+        "parts": [{"name": p.part_name, "qty": str(p.qty), "unit_price": int(p.unit_price), "amount": int(p.line_total)}
+                  for p in o.parts.all()],
+        "labor": [{"name": l.labor_name, "minutes": l.minutes, "amount": int(l.price)} for l in o.labor.all()],
+    }
+
+
+def _vehicle_dict(v: Vehicle) -> dict:
+    return {"id": v.pk, "model": v.model, "make": v.make, "plate_no": v.plate_no, "vin": v.vin, "year": v.year,
+            "customer": v.customer.name, "phone": v.customer.phone}
+
+
+def vehicle_history(vehicle: Vehicle, cursor: str | None = None, size: int | None = None,
+                    branch_id: int | None = None) -> dict:
+    """차량 정보 + 요약 + 작업오더 한 페이지(부품/공임 포함). next_cursor 로 다음 페이지.
+
+    작업오더는 지점 컨텍스트(branch_id, 없으면 현재 요청의 지점)로 거른다 - 한 지점 직원에게는 그 지점 이력만.
+    """
+    size = size or int(getattr(settings, "VEHICLE_HISTORY_PAGE_SIZE", 20))
+    branch_id = branch_id or current_branch_id()
+    cache = _cache()
+    if cache is not None:
+        key = f"vehicle_history:{vehicle.pk}:{_version(cache, vehicle.pk)}:{branch_id or 0}:{cursor or ''}:{size}"
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    qs = (WorkOrder.objects.scoped(branch_id).filter(vehicle=vehicle).select_related("branch", "assigned_to")
+          .prefetch_related(Prefetch("parts", queryset=WorkPart.objects.order_by("pk")),
+                            Prefetch("labor", queryset=WorkLabor.objects.order_by("pk"))))
+    page = keyset_page(qs, cursor, size)
+    result = {
+        "vehicle": _vehicle_dict(vehicle),
+        "summary": summary(vehicle, branch_id) if not cursor else None,
+        "orders": [_order_dict(o) for o in page.object_list],
+        "next_cursor": page.next_cursor,
+    }
+    if cache is not None:
+        cache.set(key, result, int(getattr(settings, "VEHICLE_HISTORY_TTL", 120)))
+    return result
@@ -0,0 +1,323 @@
+"""과거 고객/차량/정비이력 CSV 대량 가져오기
+
+한 행 = 작업오더의 라인 하나(부품/공임/결제). 같은 order_ref 의 행들이 한 작업오더가 되고,
+오더/차량/고객 칸은 행마다 반복해 적는다. 라인 없이 오더만 있는 행은 line_type 을 비워 둔다.
+
+    order_ref, order_no, branch, in_datetime, out_datetime, status,
+    customer_name, phone, email, plate_no, vin, make, model, year,
+    odometer_in, odometer_out, complaint, work_detail,
+    line_type(part|labor|payment), item, qty, unit_price, amount, minutes, method, paid_at
+
+- 파일은 한 줄씩 읽고 batch_size 행마다 bulk_create 로 한 트랜잭션에 기록한다.
+- 고객은 전화번호(숫자만), 차량은 VIN → 번호판 순으로 메모리 맵에서 중복을 찾는다 (DB 기존 행 포함).
+- 접수번호가 비어 있으면 (입고일, 지점) 별로 allocate_order_seq(count=n) 한 번에 블록으로 받는다.
+  접수번호가 있으면 그대로 쓰되 이미 있거나 파일 안에서 겹치면 행 오류로 멈추고, 이 앱 형식의 번호면
+  그날 카운터를 그 번호 이상으로 올려 나중에 발급하는 번호와 겹치지 않게 한다.
+- 행 단위 신호는 끄고(signals.muted), 끝에서 합계와 검색 색인을 집합 단위로 한 번에 계산한다.
+  행 오류로 중간에 멈춰도 그때까지 기록된 묶음은 그대로 두고 같은 계산을 한다 (import_csv).
+"""
+from __future__ import annotations
+
+import csv
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import history, rollups, search, signals, suggest
+from .models import Branch, Customer, Payment, Vehicle, WorkLabor, WorkOrder, WorkPart
+from .utils import _TRAILING_NUMBER, _scope, allocate_order_seq, format_order_no, raise_order_seq
+
+BATCH_SIZE = 5000
+_STATUS = {**{v: v for v in WorkOrder.Status.values}, **{str(label): v for v, label in WorkOrder.Status.choices}}
+_METHOD = {**{v: v for v in Payment.Method.values}, **{str(label): v for v, label in Payment.Method.choices}}
+
+
+class ImportRowError(ValueError):
+    """입력 행 오류 (행 번호 포함)"""
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    customers: int = 0
+    vehicles: int = 0
+    orders: int = 0
+    lines: int = 0
+    order_ids: list[int] = field(default_factory=list, repr=False)
+    first_day: date | None = None
+    last_day: date | None = None
+
+    def touch(self, dt) -> None:
+        day = timezone.localdate(dt)
+        self.first_day = min(self.first_day or day, day)
+        self.last_day = max(self.last_day or day, day)
+
+
+def _dt(value: str):
+    if not value:
+        return None
+    d = datetime.fromisoformat(value.strip())
+    return timezone.make_aware(d) if timezone.is_naive(d) else d
+
+
+def _int(value: str):
+    return int(value.replace(",", "")) if value and value.strip() else None
+
+
+def _dec(value: str, default="0") -> Decimal:
+    try:
+        return Decimal((value or default).replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"숫자가 아닙니다: {value!r}")
+
+
+class LegacyImporter:
+    def __init__(self, default_branch: Branch | None = None, batch_size: int = BATCH_SIZE):
+        self.default_branch = default_branch
+        self.batch_size = batch_size
+        self.stats = ImportStats()
+        # 키 → pk(기록됨) 또는 아직 기록 전인 인스턴스
+        self.branches = {b.name: b.pk for b in Branch.objects.all()}
+        self.customers: dict[str, int | Customer] = {}
+        self.vehicles: dict[str, int | Vehicle] = {}
+        self.orders: dict[str, int | WorkOrder] = {}
+        for pk, phone in Customer.objects.values_list("pk", "phone").iterator(chunk_size=BATCH_SIZE):
+            self.customers.setdefault(search.phone_digits(phone) or f"#{pk}", pk)
+        for pk, vin, plate in Vehicle.objects.values_list("pk", "vin", "plate_no").iterator(chunk_size=BATCH_SIZE):
+            for key in self._vehicle_keys(vin, plate):
+                self.vehicles.setdefault(key, pk)
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self.new_customers: list[Customer] = []
+        self.new_vehicles: list[Vehicle] = []
+        self.new_orders: list[WorkOrder] = []
+        self.new_lines: dict[type, list] = defaultdict(list)
+        self.given_numbers: dict[str, int] = {}  # 파일에 적힌 접수번호 → 행 번호
+        self.batch_start = self.stats.rows + 2
+
+    @staticmethod
+    def _vehicle_keys(vin, plate):
+        keys = []
+        if vin and vin.strip():
+            keys.append("vin:" + search.normalize(vin))
+        if plate and plate.strip():
+            keys.append("plate:" + search.normalize(plate))
+        return keys
+
+    @staticmethod
+    def _link(obj, name: str, ref):
+        if isinstance(ref, int):
+            setattr(obj, f"{name}_id", ref)
+        else:
+            setattr(obj, name, ref)
+
+    # ── 행 → 인스턴스 ──────────────────────────────────────────
+    def _branch(self, name: str) -> int:
+        if not name:
+            if not self.default_branch:
+                raise ValueError("branch 가 비어 있고 기본 지점도 없습니다.")
+            return self.default_branch.pk
+        if name not in self.branches:
+            self.branches[name] = Branch.objects.create(name=name).pk
+        return self.branches[name]
+
+    def _customer(self, row):
+        digits = search.phone_digits(row.get("phone"))
+        key = digits or "name:" + search.normalize(row.get("customer_name"))
+        ref = self.customers.get(key)
+        if ref is None:
+            ref = Customer(name=row.get("customer_name") or "(미상)", phone=row.get("phone") or "",
+                           email=row.get("email") or "")
+            self.new_customers.append(ref)
+            self.customers[key] = ref
+        return ref
+
+    def _vehicle(self, row):
+        keys = self._vehicle_keys(row.get("vin"), row.get("plate_no"))
+        for key in keys:
+            if key in self.vehicles:
+                ref = self.vehicles[key]
+                break
+        else:
+            ref = Vehicle(plate_no=row.get("plate_no") or "", vin=row.get("vin") or "",
+                          make=row.get("make") or "", model=row.get("model") or "(미상)",
+                          year=_int(row.get("year")))
+            self._link(ref, "customer", self._customer(row))
+            self.new_vehicles.append(ref)
+        for key in keys:
+            self.vehicles.setdefault(key, ref)
+        return ref
+
+    def _order(self, row, lineno: int = 0):
+        order_ref = row.get("order_ref") or row.get("order_no")
+        if not order_ref:
+            raise ValueError("order_ref 또는 order_no 가 필요합니다.")
+        ref = self.orders.get(order_ref)
+        if ref is None:
+            order_no = row.get("order_no") or ""
+            if order_no in self.given_numbers:
+                raise ValueError(f"접수번호 {order_no} 가 {self.given_numbers[order_no]}행과 겹칩니다.")
+            out_dt = _dt(row.get("out_datetime"))
+            status = row.get("status") or (WorkOrder.Status.RELEASED if out_dt else WorkOrder.Status.DONE)
+            if status not in _STATUS:
+                raise ValueError(f"알 수 없는 상태: {status!r}")
+            ref = WorkOrder(
+                order_no=order_no, branch_id=self._branch(row.get("branch")),
+                status=_STATUS[status], in_datetime=_dt(row.get("in_datetime")) or timezone.now(),
+                out_datetime=out_dt, odometer_in=_int(row.get("odometer_in")), odometer_out=_int(row.get("odometer_out")),
+                customer_complaint=row.get("complaint") or "", work_detail=row.get("work_detail") or "",
+            )
+            self._link(ref, "vehicle", self._vehicle(row))
+            self.new_orders.append(ref)
+            self.orders[order_ref] = ref
+            if order_no:
+                self.given_numbers[order_no] = lineno
+        return ref
+
+    def _line(self, row, order):
+        kind = (row.get("line_type") or "").strip().lower()
+        if not kind:
+            return
+        item = row.get("item") or ""
+        if kind == "part":
+            line = WorkPart(part_name=item, qty=_dec(row.get("qty"), "1"),
+                            unit_price=_dec(row.get("unit_price") or row.get("amount")))
+            line.line_total = line.compute_line_total()
+        elif kind == "labor":
+            line = WorkLabor(labor_name=item, minutes=_int(row.get("minutes")),
+                             price=_dec(row.get("amount") or row.get("unit_price")))
+        elif kind == "payment":
+            method = row.get("method") or Payment.Method.OTHER
+            if method not in _METHOD:
+                raise ValueError(f"알 수 없는 결제수단: {method!r}")
+            paid_at = _dt(row.get("paid_at"))
+            if paid_at is None and not isinstance(order, int):
+                paid_at = order.out_datetime or order.in_datetime
+            line = Payment(method=_METHOD[method], amount=_dec(row.get("amount")), note=item,
+                           paid_at=paid_at or timezone.now())
+        else:
+            raise ValueError(f"알 수 없는 line_type: {kind!r}")
+        self._link(line, "work_order", order)
+        self.new_lines[type(line)].append(line)
+
+    # ── 기록 ──────────────────────────────────────────────────
+    def _check_given_numbers(self):
+        """파일에 적힌 접수번호가 이미 DB 에 있으면 (다시 가져오기 등) 그 행 오류로"""
+        numbers = list(self.given_numbers)
+        for i in range(0, len(numbers), 500):
+            taken = WorkOrder.objects.filter(order_no__in=numbers[i:i + 500]).values_list("order_no", flat=True).first()
+            if taken:
+                raise ImportRowError(f"{self.given_numbers[taken]}행: 접수번호 {taken} 가 이미 있습니다.")
+
+    def _raise_counters(self):
+        """이 앱 형식(ORDER_NO_FORMAT)으로 적힌 번호면 그날(+지점) 카운터를 그 일련번호 이상으로"""
+        floors = {}
+        for o in self.new_orders:
+            m = o.order_no in self.given_numbers and _TRAILING_NUMBER.search(o.order_no)
+            if not m:
+                continue
+            seq, day = int(m.group(1)), timezone.localdate(o.in_datetime)
+            try:
+                day = datetime.strptime(o.order_no[:8], "%Y%m%d").date()
+            except ValueError:
+                pass
+            if format_order_no(day, seq, o.branch_id) == o.order_no:
+                key = (day, _scope(o.branch_id))
+                floors[key] = max(floors.get(key, 0), seq)
+        for (day, branch_key), seq in floors.items():
+            raise_order_seq(day, branch_key, seq)
+
+    def _assign_order_numbers(self):
+        groups = defaultdict(list)
+        for o in self.new_orders:
+            if not o.order_no:
+                groups[(timezone.localdate(o.in_datetime), o.branch_id)].append(o)
+        for (day, branch_id), orders in groups.items():
+            last = allocate_order_seq(day, _scope(branch_id), count=len(orders))
+            for seq, o in enumerate(orders, start=last - len(orders) + 1):
+                o.order_no = format_order_no(day, seq, branch_id)
+
+    def flush(self):
+        self._check_given_numbers()
+        try:
+            with transaction.atomic():
+                # 아직 pk 가 없던 부모 인스턴스의 FK 는 bulk_create 가 부모 기록 후 pk 로 채운다
+                Customer.objects.bulk_create(self.new_customers, batch_size=1000)
+                Vehicle.objects.bulk_create(self.new_vehicles, batch_size=1000)
+                self._raise_counters()
+                self._assign_order_numbers()
+                WorkOrder.objects.bulk_create(self.new_orders, batch_size=1000)
+                for model, lines in self.new_lines.items():
+                    model.objects.bulk_create(lines, batch_size=1000)
+        except IntegrityError as exc:  # 검사 직후 다른 곳에서 같은 번호를 만든 경우
+            raise ImportRowError(f"{self.batch_start}~{self.stats.rows + 1}행: 중복 데이터로 기록하지 못했습니다 ({exc})") from exc
+        # 다음 묶음은 pk 로만 참조 (인스턴스를 붙잡고 있지 않도록)
+        for mapping, new in ((self.customers, self.new_customers), (self.vehicles, self.new_vehicles),
+                             (self.orders, self.new_orders)):
+            if new:
+                for key, ref in mapping.items():
+                    if not isinstance(ref, int):
+                        mapping[key] = ref.pk
+        self.stats.customers += len(self.new_customers)
+        self.stats.vehicles += len(self.new_vehicles)
+        self.stats.orders += len(self.new_orders)
+        self.stats.order_ids.extend(o.pk for o in self.new_orders)
+        for o in self.new_orders:
+            self.stats.touch(o.out_datetime or o.in_datetime)
+        for p in self.new_lines[Payment]:
+            self.stats.touch(p.paid_at)
+        self.stats.lines += sum(len(v) for v in self.new_lines.values())
+        self._reset_batch()
+
+    def feed(self, rows, progress=None) -> ImportStats:
+        """CSV DictReader 같은 행 반복자를 받아 batch_size 행마다 기록한다."""
+        pending = 0
+        with signals.muted():
+            for lineno, row in enumerate(rows, start=2):
+                row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+                try:
+                    self._line(row, self._order(row, lineno))
+                except ValueError as exc:
+                    raise ImportRowError(f"{lineno}행: {exc}") from exc
+                self.stats.rows += 1
+                pending += 1
+                if pending >= self.batch_size:
+                    self.flush()
+                    pending = 0
+                    if progress:
+                        progress(self.stats)
+            self.flush()
+        return self.stats
+
+    def finalize(self, chunk: int = 5000) -> None:
+        """가져온 오더의 합계/검색 색인/일별 집계를 집합 단위로 다시 계산한다."""
+        ids = self.stats.order_ids
+        for i in range(0, len(ids), chunk):
+            qs = WorkOrder.objects.filter(pk__in=ids[i:i + chunk])
+            qs.recompute_totals()
+            search.reindex_orders(qs)
+            history.bump_orders(ids[i:i + chunk])
+        if self.stats.first_day:
+            rollups.rebuild(self.stats.first_day, self.stats.last_day)
+        suggest.invalidate()
+
+
+def import_csv(path: str, encoding: str = "utf-8-sig", default_branch: Branch | None = None,
+               batch_size: int = BATCH_SIZE, progress=None) -> ImportStats:
+    importer = LegacyImporter(default_branch=default_branch, batch_size=batch_size)
+    try:
+        with open(path, encoding=encoding, newline="") as fh:
+            importer.feed(csv.DictReader(fh), progress)
+    except ImportRowError as exc:
+        if importer.stats.orders:
+            raise ImportRowError(f"{exc} (앞 묶음의 작업오더 {importer.stats.orders:,}건은 이미 기록됨)") from exc
+        raise
+    finally:
+        # 앞 묶음은 이미 커밋됐으므로 오류로 멈춰도 그만큼은 합계/색인/집계/캐시를 맞춰 둔다
+        importer.finalize()
+    return importer.stats
@@ -0,0 +1,185 @@
+"""견적서/명세서 PDF 일괄 출력
+
+지점·기간으로 고른 완료 오더들의 PDF 를 프로세스 풀에서 묶음(CHUNK_SIZE)으로 나눠 그리고, 끝나는 대로
+ZIP 파일에 바로 써 넣는다. 합본은 묶음마다 PDF 하나를 그려 순서대로 pdf.MergedPdfWriter 로 이어 쓴다
+(어느 쪽이든 동시에 메모리에 있는 PDF 는 진행 중인 묶음뿐).
+
+웹 요청에서는 ExportJob 만 만들고 `manage.py export_invoices --job <id>` 를 별도 프로세스로
+띄우므로 gunicorn 워커가 묶이지 않는다. 동시에 도는 작업은 EXPORT_JOB_MAX_ACTIVE 개까지이고,
+시작하지 못했거나(EXPORT_JOB_START_TIMEOUT) 진행이 멈춘(EXPORT_JOB_STALE_SECONDS) 작업은 실패로 정리한다.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Iterable
+
+import django
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .models import ExportJob, WorkLabor, WorkOrder, WorkPart
+
+CHUNK_SIZE = 20
+COMPLETED = [WorkOrder.Status.DONE, WorkOrder.Status.RELEASED]
+
+
+def completed_orders(date_from: date, date_to: date, branch_id: int | None = None):
+    tz = timezone.get_current_timezone()
+    qs = WorkOrder.objects.filter(
+        status__in=COMPLETED,
+        in_datetime__gte=datetime.combine(date_from, time.min, tzinfo=tz),
+        in_datetime__lt=datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz),
+    )
+    if branch_id:
+        qs = qs.filter(branch_id=branch_id)
+    return qs.order_by("in_datetime", "id")
+
+
+def _load(ids: Iterable[int]):
+    qs = (WorkOrder.objects.filter(pk__in=list(ids))
+          .select_related("vehicle", "vehicle__customer", "branch")
+          .prefetch_related(Prefetch("parts", queryset=WorkPart.objects.order_by("pk")),
+                            Prefetch("labor", queryset=WorkLabor.objects.order_by("pk")))
+          .order_by("in_datetime", "id"))
+    return list(qs)
+
+
+def _render_chunk(ids: list[int]) -> list[tuple[str, bytes]]:
+    """워커 프로세스: 오더 묶음을 (파일명, PDF 바이트) 목록으로"""
+    from . import pdf
+    return [
+        (f"sunbike_{o.order_no}.pdf", pdf.render_invoice(o, list(o.parts.all()), list(o.labor.all())))
+        for o in _load(ids)
+    ]
+
+
+def _render_merged_chunk(ids: list[int]) -> tuple[int, bytes]:
+    """워커 프로세스: 오더 묶음을 PDF 하나로 (합본의 한 조각)"""
+    from . import pdf
+    orders = _load(ids)
+    return len(orders), pdf.get_template().render_many((o, list(o.parts.all()), list(o.labor.all())) for o in orders)
+
+
+def _chunks(ids: list[int], size: int):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _pooled(func, ids: list[int], processes: int | None):
+    """묶음을 프로세스 풀에서 그려 제출 순서대로 돌려준다. 진행 중인 묶음은 processes*2 개까지만."""
+    processes = processes or max(1, min(4, os.cpu_count() or 1))
+    # fork 는 부모의 DB 연결을 물려받으므로 spawn 으로 새 프로세스에서 django.setup()
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=ctx, initializer=django.setup) as pool:
+        pending = deque()
+        chunks = _chunks(ids, CHUNK_SIZE)
+        while True:
+            while len(pending) < processes * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(pool.submit(func, chunk))
+            if not pending:
+                break
+            yield pending.popleft().result()
+
+
+def export_zip(ids: list[int], out_path: str, processes: int | None = None,
+               progress: Callable[[int], None] | None = None) -> int:
+    done = 0
+    with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for files in _pooled(_render_chunk, ids, processes):
+            for name, body in files:
+                zf.writestr(name, body)
+                done += 1
+            if progress:
+                progress(done)
+    return done
+
+
+def export_merged(ids: list[int], out_path: str, processes: int | None = None,
+                  progress: Callable[[int], None] | None = None) -> int:
+    from . import pdf
+
+    done = 0
+    with pdf.MergedPdfWriter(out_path) as out:
+        for count, body in _pooled(_render_merged_chunk, ids, processes):
+            out.append(body)
+            done += count
+            if progress:
+                progress(done)
+    return done
+
+
+def _setting(name: str, default: int) -> int:
+    return int(getattr(settings, name, default))
+
+
+def expire_stale() -> int:
+    """프로세스가 시작 전에 죽었거나 진행이 멈춘 작업을 실패로 바꾼다."""
+    now = timezone.now()
+    never_started = Q(status=ExportJob.Status.PENDING, created_at__lt=now - timedelta(seconds=_setting("EXPORT_JOB_START_TIMEOUT", 120)))
+    stalled = Q(status=ExportJob.Status.RUNNING, heartbeat_at__lt=now - timedelta(seconds=_setting("EXPORT_JOB_STALE_SECONDS", 600)))
+    return (ExportJob.objects.filter(never_started).update(status=ExportJob.Status.FAILED, error="작업 프로세스가 시작되지 않았습니다.", finished_at=now)
+            + ExportJob.objects.filter(stalled).update(status=ExportJob.Status.FAILED, error="작업 프로세스가 응답하지 않습니다.", finished_at=now))
+
+
+def active_jobs():
+    expire_stale()
+    return ExportJob.objects.filter(status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING])
+
+
+def at_capacity() -> bool:
+    return active_jobs().count() >= _setting("EXPORT_JOB_MAX_ACTIVE", 1)
+
+
+def run_job(job: ExportJob, processes: int | None = None) -> ExportJob:
+    """ExportJob 을 실행하고 진행률/결과 파일을 기록한다. 대기(PENDING) 상태인 작업만 시작한다."""
+    now = timezone.now()
+    started = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING, error="", pid=os.getpid(), host=socket.gethostname()[:120],
+        started_at=now, heartbeat_at=now)
+    if not started:
+        job.refresh_from_db()
+        raise ValueError(f"ExportJob {job.pk} is {job.status}, not PENDING")
+    try:
+        ids = list(completed_orders(job.date_from, job.date_to, job.branch_id).values_list("pk", flat=True))
+        ExportJob.objects.filter(pk=job.pk).update(total=len(ids), done=0)
+        ext = "zip" if job.kind == ExportJob.Kind.ZIP else "pdf"
+        rel = f"exports/invoices-{job.pk}-{job.date_from:%Y%m%d}-{job.date_to:%Y%m%d}.{ext}"
+        out_path = os.path.join(settings.MEDIA_ROOT, rel)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+        def progress(n):
+            ExportJob.objects.filter(pk=job.pk).update(done=n, heartbeat_at=timezone.now())
+
+        if job.kind == ExportJob.Kind.ZIP:
+            export_zip(ids, out_path, processes, progress)
+        else:
+            export_merged(ids, out_path, processes, progress)
+        ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.Status.DONE, file=rel, finished_at=timezone.now())
+    except Exception as exc:
+        ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.Status.FAILED, error=repr(exc), finished_at=timezone.now())
+        raise
+    finally:
+        job.refresh_from_db()
+    return job
+
+
+def launch(job: ExportJob) -> None:
+    """웹 요청과 분리된 프로세스로 작업을 시작한다 (동시 작업 수 제한은 호출측에서 at_capacity() 로)."""
+    subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / "manage.py"), "export_invoices", "--job", str(job.pk)],
+        cwd=str(settings.BASE_DIR),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
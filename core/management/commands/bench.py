@@ -0,0 +1,321 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import cycle
+from pathlib import Path
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import diagnostics, suggest, synthetic, utils
+from core.models import Branch, Vehicle, WorkOrder, WorkPart
+
+OUTPUT_DIR = Path(settings.BASE_DIR) / "bench-results"
+
+
+class Timer:
+    """시나리오 한 개의 지연시간 표본과 SQL 건수"""
+
+    def __init__(self):
+        self.samples: list[float] = []
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def measure(self, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        with connection.execute_wrapper(self):
+            result = fn(*args, **kwargs)
+        self.samples.append(time.perf_counter() - t0)
+        return result
+
+    def summary(self, elapsed: float | None = None) -> dict:
+        s = sorted(self.samples)
+        n = len(s)
+        elapsed = elapsed if elapsed is not None else sum(s)
+        return {
+            "n": n,
+            "p50_ms": round(statistics.median(s) * 1000, 2),
+            "p95_ms": round(s[max(0, int(n * 0.95) - 1)] * 1000, 2),
+            "max_ms": round(s[-1] * 1000, 2),
+            "mean_ms": round(statistics.mean(s) * 1000, 2),
+            "throughput": round(n / elapsed, 1) if elapsed else None,
+            "queries_per_op": round(self.queries / n, 1),
+        }
+
+
+def _git_sha() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the core staff flows (dashboard/search, order creation under concurrency, line adds, invoice PDF) "
+        "against a throwaway test database seeded with synthetic data. Writes JSON to bench-results/ for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branches", type=int, default=3)
+        parser.add_argument("--customers", type=int, default=2000)
+        parser.add_argument("--vehicles", type=int, default=2500)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--lines", type=int, default=4, help="Max parts+labor lines per seeded order.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--iterations", type=int, default=50, help="Requests per read scenario.")
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent writers for order creation.")
+        parser.add_argument("--per-thread", type=int, default=25)
+        parser.add_argument("--only", default="", help="Comma-separated scenario names to run.")
+        parser.add_argument("--output", default="", help="Result file (default bench-results/<timestamp>-<sha>.json).")
+        parser.add_argument("--compare", default="", help="Earlier result file to compare against.")
+        parser.add_argument("--keepdb", action="store_true", help="Keep the test database between runs.")
+
+    def handle(self, *args, **opts):
+        # 동시 쓰기 시나리오가 있어 SQLite 도 in-memory 가 아닌 파일 DB 로 돈다 (diagnostics.test_database)
+        with diagnostics.test_database(opts["keepdb"], prefix="bench"), \
+                override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], INVOICE_PDF_CACHE="default",
+                                  QUERY_PROFILING=False):
+            result = self._run(opts)
+
+        path = Path(opts["output"]) if opts["output"] else OUTPUT_DIR / (
+            f"{datetime.now():%Y%m%d-%H%M%S}-{result['meta']['git_sha'] or 'nogit'}-{result['meta']['vendor']}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"saved {path}"))
+        if opts["compare"]:
+            self._compare(json.loads(Path(opts["compare"]).read_text()), result)
+
+    # ── 실행 ─────────────────────────────────────────────────
+    def _run(self, opts) -> dict:
+        params = {k: opts[k] for k in ("branches", "customers", "vehicles", "orders", "lines", "seed",
+                                       "iterations", "threads", "per_thread")}
+        t0 = time.perf_counter()
+        if opts["keepdb"] and WorkOrder.objects.exists():
+            counts = {"orders": WorkOrder.objects.count()}
+        else:
+            counts = synthetic.generate(branches=opts["branches"], customers=opts["customers"], vehicles=opts["vehicles"],
+                                        orders=opts["orders"], lines=opts["lines"], seed=opts["seed"])
+        self.stdout.write(f"seeded {counts} in {time.perf_counter() - t0:.1f}s")
+
+        user, _ = get_user_model().objects.get_or_create(username="bench", defaults={"is_staff": True})
+        self.client = Client()
+        self.client.force_login(user)
+        only = {s.strip() for s in opts["only"].split(",") if s.strip()}
+        scenarios = {
+            "dashboard": self.bench_dashboard,
+            "dashboard_pages": self.bench_dashboard_pages,
+            "search": self.bench_search,
+            "suggest": self.bench_suggest,
+            "order_create": self.bench_order_create,
+            "line_add": self.bench_line_add,
+            "lines_bulk": self.bench_lines_bulk,
+            "invoice_cold": self.bench_invoice_cold,
+            "invoice_warm": self.bench_invoice_warm,
+            "invoice_304": self.bench_invoice_304,
+        }
+        unknown = only - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        results = {}
+        for name, fn in scenarios.items():
+            if only and name not in only:
+                continue
+            results[name] = fn(opts)
+            r = results[name]
+            self.stdout.write(f"{name:16} n={r['n']:<5} p50={r['p50_ms']:>8.2f}ms p95={r['p95_ms']:>8.2f}ms "
+                              f"max={r['max_ms']:>8.2f}ms {r['throughput'] or 0:>8.1f}/s q/op={r['queries_per_op']}")
+        return {
+            "meta": {
+                "git_sha": _git_sha(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "vendor": connection.vendor,
+                "db_version": ".".join(map(str, connection.get_database_version())),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "machine": platform.machine(),
+                "params": params,
+                "seeded": counts,
+            },
+            "scenarios": results,
+        }
+
+    def _get(self, url, **extra):
+        resp = self.client.get(url, **extra)
+        if resp.status_code not in (200, 304):
+            raise CommandError(f"GET {url} -> {resp.status_code}")
+        return resp
+
+    def _sample_orders(self, n: int) -> list[int]:
+        ids = list(WorkOrder.objects.order_by("-in_datetime").values_list("pk", flat=True)[:max(n, 1) * 20])
+        return ids[::20][:n] or ids[:n]
+
+    def _search_terms(self, n: int) -> list[str]:
+        terms = []
+        for order_no, plate, name, phone in (WorkOrder.objects.filter(pk__in=self._sample_orders(n))
+                                             .values_list("order_no", "vehicle__plate_no", "vehicle__customer__name",
+                                                          "vehicle__customer__phone").order_by("pk")):
+            terms += [order_no[-7:], plate, name, phone[-4:]]
+        return terms[:n] or ["PCX"]
+
+    # ── 시나리오 ──────────────────────────────────────────────
+    def bench_dashboard(self, opts) -> dict:
+        t = Timer()
+        url = reverse("dashboard")
+        for _ in range(opts["iterations"]):
+            t.measure(self._get, url)
+        return t.summary()
+
+    def bench_dashboard_pages(self, opts) -> dict:
+        """'더 보기' 커서를 따라 연속 페이지"""
+        t = Timer()
+        url, cursor = reverse("workorder_page"), ""
+        for _ in range(opts["iterations"]):
+            data = t.measure(self._get, f"{url}?cursor={cursor}").json()
+            cursor = data["next_cursor"] or ""
+        return t.summary()
+
+    def bench_search(self, opts) -> dict:
+        t = Timer()
+        url = reverse("dashboard")
+        terms = cycle(self._search_terms(opts["iterations"]))
+        for _ in range(opts["iterations"]):
+            t.measure(self._get, f"{url}?{urlencode({'q': next(terms)})}")
+        return t.summary()
+
+    def bench_suggest(self, opts) -> dict:
+        t = Timer()
+        url = reverse("search_suggest")
+        suggest.invalidate()
+        terms = cycle(self._search_terms(opts["iterations"]))
+        for _ in range(opts["iterations"]):
+            t.measure(self._get, f"{url}?{urlencode({'q': next(terms)})}")
+        return t.summary()
+
+    def bench_order_create(self, opts) -> dict:
+        """여러 스레드가 동시에 작업오더를 만든다 (pre_save 의 generate_order_no 경합) - 중복 번호 검사 포함"""
+        threads, per_thread = opts["threads"], opts["per_thread"]
+        branch_ids = list(Branch.objects.values_list("pk", flat=True))
+        vehicle_ids = list(Vehicle.objects.values_list("pk", flat=True)[:500])
+        utils._blocks.clear()
+
+        def worker(i):
+            samples, numbers, retries = [], [], 0
+            try:
+                for j in range(per_thread):
+                    t0 = time.perf_counter()
+                    for attempt in range(5):
+                        try:
+                            o = WorkOrder.objects.create(branch_id=branch_ids[(i + j) % len(branch_ids)],
+                                                         vehicle_id=vehicle_ids[(i * per_thread + j) % len(vehicle_ids)])
+                            break
+                        except OperationalError:  # SQLite "database is locked"
+                            retries += 1
+                            time.sleep(0.01 * (attempt + 1))
+                    else:
+                        raise CommandError("order creation kept failing with OperationalError")
+                    samples.append(time.perf_counter() - t0)
+                    numbers.append(o.order_no)
+            finally:
+                connections.close_all()
+            return samples, numbers, retries
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(worker, range(threads)))
+        elapsed = time.perf_counter() - started
+        numbers = [n for _, ns, _ in results for n in ns]
+        if len(set(numbers)) != len(numbers):
+            raise CommandError(f"{len(numbers) - len(set(numbers))} duplicate order numbers")
+        t = Timer()
+        t.samples = [s for ss, _, _ in results for s in ss]
+        summary = t.summary(elapsed)
+        summary.update(queries_per_op=None, threads=threads, retries=sum(r for _, _, r in results))
+        return summary
+
+    def bench_line_add(self, opts) -> dict:
+        """부품 한 줄씩 저장 - post_save 신호의 합계 증감/검색/집계 갱신 포함"""
+        t = Timer()
+        for pk in cycle(self._sample_orders(10)):
+            if len(t.samples) >= opts["iterations"]:
+                break
+            t.measure(WorkPart.objects.create, work_order_id=pk, part_name="엔진오일", qty=1, unit_price=12000)
+        return t.summary()
+
+    def bench_lines_bulk(self, opts) -> dict:
+        """add_lines JSON 엔드포인트로 부품 5줄 + 공임 2줄"""
+        t = Timer()
+        body = json.dumps({
+            "parts": [{"part_name": f"부품 {i}", "qty": "1", "unit_price": "10000"} for i in range(5)],
+            "labor": [{"labor_name": f"공임 {i}", "minutes": "30", "price": "20000"} for i in range(2)],
+        })
+        for pk in cycle(self._sample_orders(10)):
+            if len(t.samples) >= opts["iterations"]:
+                break
+            resp = t.measure(self.client.post, reverse("add_lines", args=[pk]), body, "application/json")
+            if resp.status_code != 200:
+                raise CommandError(f"add_lines -> {resp.status_code}: {resp.content[:200]!r}")
+        return t.summary()
+
+    def bench_invoice_cold(self, opts) -> dict:
+        t = Timer()
+        for pk in self._sample_orders(opts["iterations"]):
+            caches["default"].clear()
+            t.measure(self._get, reverse("invoice_pdf", args=[pk]))
+        return t.summary()
+
+    def bench_invoice_warm(self, opts) -> dict:
+        t = Timer()
+        pks = self._sample_orders(10)
+        for pk in pks:
+            self._get(reverse("invoice_pdf", args=[pk]))
+        for pk, _ in zip(cycle(pks), range(opts["iterations"])):
+            t.measure(self._get, reverse("invoice_pdf", args=[pk]))
+        return t.summary()
+
+    def bench_invoice_304(self, opts) -> dict:
+        t = Timer()
+        pks = self._sample_orders(10)
+        etags = {pk: self._get(reverse("invoice_pdf", args=[pk]))["ETag"] for pk in pks}
+        for pk, _ in zip(cycle(pks), range(opts["iterations"])):
+            resp = t.measure(self._get, reverse("invoice_pdf", args=[pk]), HTTP_IF_NONE_MATCH=etags[pk])
+            if resp.status_code != 304:
+                raise CommandError(f"expected 304 for order {pk}, got {resp.status_code}")
+        return t.summary()
+
+    # ── 비교 ─────────────────────────────────────────────────
+    def _compare(self, old: dict, new: dict):
+        om, nm = old["meta"], new["meta"]
+        self.stdout.write(f"\ncompare {om.get('git_sha')} ({om.get('vendor')}) -> {nm.get('git_sha')} ({nm.get('vendor')})")
+        if om.get("params") != nm.get("params"):
+            self.stdout.write(self.style.WARNING("parameters differ - numbers are not directly comparable"))
+        for name, cur in new["scenarios"].items():
+            prev = old["scenarios"].get(name)
+            if not prev:
+                self.stdout.write(f"{name:16} (new)")
+                continue
+            cells = []
+            for key in ("p50_ms", "p95_ms", "throughput"):
+                a, b = prev.get(key), cur.get(key)
+                if a and b:
+                    change = (b - a) * 100 / a
+                    worse = change > 10 if key != "throughput" else change < -10
+                    text = f"{key} {a}->{b} ({change:+.0f}%)"
+                    cells.append(self.style.ERROR(text) if worse else text)
+            self.stdout.write(f"{name:16} " + "  ".join(cells))
@@ -0,0 +1,65 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reportlab import rl_config
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+from core import pdf
+from core.models import Branch, Customer, Vehicle, WorkLabor, WorkOrder, WorkPart
+
+
+def sample_order(lines: int):
+    """DB 없이 그릴 수 있는 메모리상의 작업오더 (부품/공임 lines 줄씩)"""
+    customer = Customer(name="홍길동", phone="010-1234-5678")
+    vehicle = Vehicle(customer=customer, model="PCX 125", plate_no="12가3456")
+    order = WorkOrder(
+        order_no="20250101-001", branch=Branch(name="본점"), vehicle=vehicle, in_datetime=timezone.now(),
+        odometer_in=12345, recommendations="다음 방문 시 브레이크 패드 점검",
+        subtotal_parts=Decimal(120000), subtotal_labor=Decimal(50000), tax_amount=Decimal(17000), total_amount=Decimal(187000),
+    )
+    parts = [WorkPart(part_name=f"엔진오일 {i}", qty=Decimal("1.00"), unit_price=Decimal(12000), line_total=Decimal(12000)) for i in range(lines)]
+    labor = [WorkLabor(labor_name=f"오일 교환 {i}", price=Decimal(5000)) for i in range(lines)]
+    return order, parts, labor
+
+
+def cold_render(order, parts, labor) -> bytes:
+    """요청마다 준비 작업을 하던 예전 invoice_pdf 의 비용 (폰트가 이미 등록돼 있어도 다시 등록)"""
+    pdfmetrics.registerFont(UnicodeCIDFont(pdf.FONT_NAME))
+    use_a85, rl_config.useA85 = rl_config.useA85, 1
+    try:
+        return pdf.InvoiceTemplate().render(order, parts, labor)
+    finally:
+        rl_config.useA85 = use_a85
+
+
+class Command(BaseCommand):
+    help = "Benchmark invoice PDF rendering: per-request setup (cold) vs the process-wide warm template."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--lines", type=int, default=10, help="Parts and labor lines per order.")
+
+    def handle(self, *args, **options):
+        order, parts, labor = sample_order(options["lines"])
+        n = options["iterations"]
+
+        def measure(fn):
+            samples = []
+            for _ in range(n):
+                t0 = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            return statistics.mean(samples), samples[max(0, int(n * 0.95) - 1)]
+
+        # cold: 예전 뷰처럼 요청마다 CID 폰트를 새로 만들어 등록하고 로고를 읽고 ASCII85 로 인코딩하는 경우
+        cold = measure(lambda: cold_render(order, parts, labor))
+        pdf.get_template()
+        warm = measure(lambda: pdf.render_invoice(order, parts, labor))
+        for label, (mean, p95) in (("cold", cold), ("warm", warm)):
+            self.stdout.write(f"{label}: mean {mean:.2f} ms, p95 {p95:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"speedup x{cold[0] / warm[0]:.1f}"))
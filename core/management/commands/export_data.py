@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = "Export work orders, parts, labor or payments as CSV (streamed) or XLSX, filtered by branch/status/date."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(exports.EXPORTS))
+        parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+        parser.add_argument("--out", help="Output file (CSV defaults to stdout).")
+        parser.add_argument("--branch")
+        parser.add_argument("--status")
+        parser.add_argument("--from", dest="from")
+        parser.add_argument("--to", dest="to")
+
+    def handle(self, *args, **options):
+        try:
+            filters = exports.parse_filters(options)
+        except ValueError as exc:
+            raise CommandError(f"Invalid filter: {exc}")
+        kind = options["kind"]
+        if options["format"] == "xlsx":
+            if not options["out"]:
+                raise CommandError("--out is required for XLSX.")
+            try:
+                with open(options["out"], "wb") as fh:
+                    n = exports.write_xlsx(kind, fh, **filters)
+            except ImportError:
+                raise CommandError("XLSX export requires openpyxl (pip install openpyxl).")
+            self.stderr.write(self.style.SUCCESS(f"Wrote {n} rows to {options['out']}"))
+            return
+        out = open(options["out"], "w", encoding="utf-8", newline="") if options["out"] else sys.stdout
+        try:
+            for line in exports.iter_csv(kind, **filters):
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
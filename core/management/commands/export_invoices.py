@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import invoice_batch
+from core.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Render invoice PDFs for completed work orders of a branch/date range into a ZIP or one merged PDF."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, help="Run an existing ExportJob (used by the web UI).")
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--branch", type=int)
+        parser.add_argument("--format", choices=["zip", "merged"], default="zip")
+        parser.add_argument("--out", help="Output path (default: MEDIA_ROOT/exports/...)")
+        parser.add_argument("--processes", type=int)
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            try:
+                job = ExportJob.objects.get(pk=options["job"])
+            except ExportJob.DoesNotExist:
+                raise CommandError(f"ExportJob {options['job']} does not exist.")
+            try:
+                job = invoice_batch.run_job(job, options["processes"])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f"Job {job.pk}: {job.done}/{job.total} -> {job.file.name}"))
+            return
+
+        if not options["date_from"] or not options["date_to"]:
+            raise CommandError("--from and --to are required (or use --job).")
+        ids = list(invoice_batch.completed_orders(options["date_from"], options["date_to"], options["branch"])
+                   .values_list("pk", flat=True))
+        out = options["out"] or f"invoices-{options['date_from']:%Y%m%d}-{options['date_to']:%Y%m%d}." + (
+            "zip" if options["format"] == "zip" else "pdf")
+
+        def progress(n):
+            self.stdout.write(f"\r{n}/{len(ids)}", ending="")
+            self.stdout.flush()
+
+        if options["format"] == "zip":
+            n = invoice_batch.export_zip(ids, out, options["processes"], progress)
+        else:
+            n = invoice_batch.export_merged(ids, out, options["processes"], progress)
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {n} invoices to {out}"))
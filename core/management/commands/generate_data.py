@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate realistic synthetic branches/customers/vehicles/work orders (with parts, labor and payments) "
+        "for local load testing. Deterministic for a given --seed; --workers > 1 forks writer processes (PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branches", type=int, default=3)
+        parser.add_argument("--customers", type=int, default=100_000)
+        parser.add_argument("--vehicles", type=int, default=130_000)
+        parser.add_argument("--orders", type=int, default=1_000_000)
+        parser.add_argument("--lines", type=int, default=4, help="Max parts+labor lines per order.")
+        parser.add_argument("--days", type=int, default=730, help="Spread orders over this many past days.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--chunk-size", type=int, default=synthetic.CHUNK_SIZE)
+        parser.add_argument("--workers", type=int, default=1, help="Writer processes (ignored on SQLite).")
+        parser.add_argument("--force", action="store_true", help="Allow running with DEBUG=False.")
+
+    def handle(self, *args, **opts):
+        if not settings.DEBUG and not opts["force"]:
+            raise CommandError("DEBUG=False - refusing to write synthetic data without --force.")
+        if opts["customers"] < 1 and opts["orders"]:
+            raise CommandError("--customers must be at least 1 to generate orders.")
+        started = time.perf_counter()
+
+        def progress(label, done, total):
+            self.stdout.write(f"  {label}: {done}/{total} chunks ({time.perf_counter() - started:.0f}s)")
+
+        stats = synthetic.generate(
+            branches=opts["branches"], customers=opts["customers"], vehicles=opts["vehicles"], orders=opts["orders"],
+            lines=opts["lines"], days=opts["days"], seed=opts["seed"], chunk_size=opts["chunk_size"],
+            workers=opts["workers"], progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['branches']} branches, {stats['customers']:,} customers, {stats['vehicles']:,} vehicles, "
+            f"{stats['orders']:,} orders, {stats['lines']:,} lines, {stats['payments']:,} payments in {elapsed:.1f}s "
+            f"({stats['orders'] / elapsed:,.0f} orders/s)"
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import BATCH_SIZE, ImportRowError, import_csv
+from core.models import Branch
+
+
+class Command(BaseCommand):
+    help = ("Import legacy customers, vehicles and service history from a CSV file (one row per part/labor/payment line). "
+            "See core/importer.py for the column layout.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--encoding", default="utf-8-sig", help="File encoding (e.g. cp949 for old Excel exports).")
+        parser.add_argument("--branch", help="Branch name used when the branch column is empty.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per bulk insert transaction.")
+
+    def handle(self, *args, **options):
+        default_branch = None
+        if options["branch"]:
+            default_branch, _ = Branch.objects.get_or_create(name=options["branch"])
+        started = time.perf_counter()
+
+        def progress(stats):
+            self.stdout.write(f"  {stats.rows:,} rows, {stats.orders:,} orders ({time.perf_counter() - started:.0f}s)")
+
+        try:
+            stats = import_csv(options["path"], encoding=options["encoding"], default_branch=default_branch,
+                               batch_size=options["batch_size"], progress=progress)
+        except (OSError, UnicodeDecodeError, ImportRowError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.rows:,} rows: {stats.customers:,} customers, {stats.vehicles:,} vehicles, "
+            f"{stats.orders:,} work orders, {stats.lines:,} lines in {time.perf_counter() - started:.1f}s."))
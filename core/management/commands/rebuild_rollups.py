@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from core import rollups
+from core.models import Payment, WorkOrder
+
+
+class Command(BaseCommand):
+    help = "Backfill (or rebuild) the daily revenue/throughput rollups from work orders and payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="from", help="First day (YYYY-MM-DD). Defaults to the oldest record.")
+        parser.add_argument("--to", dest="to", help="Last day (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--branch", type=int)
+        parser.add_argument("--days", type=int, default=31, help="Days rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options["from"]) if options["from"] else None
+            date_to = date.fromisoformat(options["to"]) if options["to"] else timezone.localdate()
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+        if date_from is None:
+            oldest = [v for v in (WorkOrder.objects.aggregate(v=Min("in_datetime"))["v"],
+                                  Payment.objects.aggregate(v=Min("paid_at"))["v"]) if v]
+            if not oldest:
+                self.stdout.write("Nothing to roll up.")
+                return
+            date_from = timezone.localdate(min(oldest))
+        newest = WorkOrder.objects.aggregate(v=Max("out_datetime"))["v"]
+        if newest and timezone.localdate(newest) > date_to and not options["to"]:
+            date_to = timezone.localdate(newest)
+        total = 0
+        start = date_from
+        while start <= date_to:
+            end = min(date_to, start + timedelta(days=options["days"] - 1))
+            total += rollups.rebuild(start, end, options["branch"])
+            start = end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} rollup rows for {date_from} ~ {date_to}."))
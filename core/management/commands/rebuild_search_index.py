@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import WorkOrder
+from core.search import reindex_orders
+
+
+class Command(BaseCommand):
+    help = "Rebuild the dashboard quick-search index (WorkOrderSearch) for all work orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--since-id", type=int, default=0, help="Only reindex work orders with id greater than this.")
+
+    def handle(self, *args, **options):
+        qs = WorkOrder.objects.filter(pk__gt=options["since_id"])
+        n = reindex_orders(qs, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {n} work orders."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import history, rollups
+from core.models import WorkOrder
+
+
+class Command(BaseCommand):
+    help = "Find work orders whose stored totals drifted from their part/labor lines, and optionally fix them in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Recompute the drifted orders (set-based UPDATE).")
+        parser.add_argument("--branch", type=int, help="Only check this branch id.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--show", type=int, default=20, help="How many drifted orders to list.")
+
+    def handle(self, *args, **options):
+        qs = WorkOrder.objects.all()
+        if options["branch"]:
+            qs = qs.filter(branch_id=options["branch"])
+        drifted = list(qs.drifted().order_by("pk").values_list(
+            "pk", "order_no", "total_amount", "calc_total"))
+        for pk, order_no, stored, calc in drifted[: options["show"]]:
+            self.stdout.write(f"{order_no} (id={pk}): stored {int(stored):,} != computed {int(calc):,}")
+        self.stdout.write(f"{len(drifted)} drifted work orders.")
+        if not options["fix"] or not drifted:
+            return
+        ids = [row[0] for row in drifted]
+        fixed = 0
+        for i in range(0, len(ids), options["batch_size"]):
+            batch = ids[i:i + options["batch_size"]]
+            with transaction.atomic():
+                fixed += WorkOrder.objects.filter(pk__in=batch).recompute_totals()
+                # 집합 UPDATE 는 신호가 없으므로 일별 집계/이력 캐시는 직접 (add_lines 와 같이)
+                rollups.mark_orders(batch)
+                history.bump_orders(batch)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} work orders."))
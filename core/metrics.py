@@ -0,0 +1,255 @@
+"""프로세스 내부 메트릭 레지스트리 + Prometheus 텍스트 출력 (/metrics)
+
+카운터/히스토그램 값은 프로세스 메모리에 쌓고, METRICS_DIR 이 설정되어 있으면 몇 초마다
+`<METRICS_DIR>/<pid>-<시작시각>.json` 으로 내려쓴다. /metrics 는 디렉터리의 모든 파일을 합산하므로
+gunicorn 워커·일괄 출력 프로세스 어느 쪽으로 요청이 가도 같은 전체 값이 나온다.
+(prometheus_client 의 multiprocess 모드와 같은 방식 - 배포 시작 때 디렉터리를 비울 것)
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+
+def _key(labels: dict) -> str:
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict = {}
+
+    def _labels(self, labels: dict) -> str:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels {sorted(labels)} != {sorted(self.labelnames)}")
+        return _key({k: str(v) for k, v in labels.items()})
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._labels(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._labels(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["buckets"][bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+        self.registry.maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+        self.lock = threading.Lock()
+        self._last_flush = 0.0
+        self._file: Path | None = None
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self.metrics.setdefault(name, Counter(self, name, help, tuple(labelnames)))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(self, name, help, tuple(labelnames), buckets))
+
+    def _after_fork(self) -> None:
+        """fork 된 자식(gunicorn 워커)은 부모 값을 물려받지 않고 자기 파일에 새로 쓴다."""
+        self.lock = threading.Lock()
+        self._file = None
+        self._last_flush = 0.0
+        for m in self.metrics.values():
+            m.values.clear()
+
+    # ── 멀티프로세스 파일 ────────────────────────────────────────
+    def _directory(self) -> Path | None:
+        path = getattr(settings, "METRICS_DIR", "")
+        return Path(path) if path else None
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {name: json.loads(json.dumps(m.values)) for name, m in self.metrics.items() if m.values}
+
+    def flush(self) -> None:
+        directory = self._directory()
+        if directory is None:
+            return
+        with self.lock:  # 두 스레드가 동시에 처음 내려써도 프로세스당 파일은 하나 (둘이면 /metrics 가 두 번 센다)
+            if self._file is None:
+                self._file = directory / f"{os.getpid()}-{int(time.time() * 1000)}.json"
+            path = self._file
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self) -> None:
+        interval = float(getattr(settings, "METRICS_FLUSH_INTERVAL", 5))
+        if time.monotonic() - self._last_flush >= interval:
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def collect(self) -> dict:
+        """모든 프로세스 값을 합산 (METRICS_DIR 이 없으면 현재 프로세스만)"""
+        directory = self._directory()
+        if directory is None:
+            return self.snapshot()
+        self.flush()
+        total: dict = {}
+        for path in directory.glob("*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, series in data.items():
+                merged = total.setdefault(name, {})
+                for key, value in series.items():
+                    if isinstance(value, dict):
+                        cur = merged.setdefault(key, {"buckets": [0] * len(value["buckets"]), "sum": 0.0, "count": 0})
+                        cur["buckets"] = [a + b for a, b in zip(cur["buckets"], value["buckets"])]
+                        cur["sum"] += value["sum"]
+                        cur["count"] += value["count"]
+                    else:
+                        merged[key] = merged.get(key, 0) + value
+        return total
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        data = self.collect()
+        out = []
+        for name, metric in sorted(self.metrics.items()):
+            out.append(f"# HELP {name} {metric.help}")
+            out.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(data.get(name, {}).items()):
+                labels = dict(json.loads(key))
+                if metric.kind == "counter":
+                    out.append(f"{name}{_fmt_labels(labels)} {_num(value)}")
+                    continue
+                cumulative = 0
+                for bound, n in zip([*metric.buckets, math.inf], value["buckets"]):
+                    cumulative += n
+                    out.append(f"{name}_bucket{_fmt_labels({**labels, 'le': _num(bound)})} {cumulative}")
+                out.append(f"{name}_sum{_fmt_labels(labels)} {_num(value['sum'])}")
+                out.append(f"{name}_count{_fmt_labels(labels)} {value['count']}")
+        return "\n".join(out) + "\n"
+
+
+def _num(v) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + body + "}"
+
+
+REGISTRY = Registry()
+os.register_at_fork(after_in_child=REGISTRY._after_fork)
+
+
+@atexit.register
+def _flush_at_exit():
+    if REGISTRY._file is not None:
+        try:
+            REGISTRY.flush()
+        except OSError:
+            pass
+
+
+http_requests = REGISTRY.counter(
+    "sunbike_http_requests_total", "HTTP requests by URL name, method and status.", ("view", "method", "status"))
+http_latency = REGISTRY.histogram(
+    "sunbike_http_request_duration_seconds", "HTTP request latency by URL name.", ("view", "method"))
+pdf_render = REGISTRY.histogram("sunbike_pdf_render_seconds", "Invoice PDF render time.")
+pdf_bytes = REGISTRY.histogram("sunbike_pdf_bytes", "Rendered invoice PDF size.", buckets=BYTES_BUCKETS)
+invoice_cache = REGISTRY.counter("sunbike_invoice_pdf_cache_total", "Invoice PDF cache lookups.", ("result",))
+fragment_cache = REGISTRY.counter("sunbike_fragment_cache_total", "Dashboard row fragment cache lookups.", ("result",))
+order_no_wait = REGISTRY.histogram(
+    "sunbike_order_no_allocation_seconds", "Time spent obtaining the next order number.", ("source",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+totals_recompute = REGISTRY.counter(
+    "sunbike_totals_recompute_total", "Work order total recomputations (rows updated).", ("kind",))
+db_connections = REGISTRY.counter("sunbike_db_connections_created_total", "New DB connections opened.", ("alias",))
+db_reuse = REGISTRY.counter(
+    "sunbike_db_connection_requests_total", "Requests by whether the DB connection was already open.", ("alias", "reused"))
+
+
+def connection_created(sender, connection, **kwargs):
+    db_connections.inc(alias=connection.alias)
+
+
+db_pool_requests = REGISTRY.counter("sunbike_db_pool_requests_total", "Connections checked out of the pool.", ("alias",))
+db_pool_wait = REGISTRY.counter(
+    "sunbike_db_pool_wait_seconds_total", "Time spent waiting for a free pooled connection.", ("alias",))
+db_pool_waiting = REGISTRY.counter(
+    "sunbike_db_pool_queued_requests_total", "Checkouts that had to queue for a connection.", ("alias",))
+db_pool_errors = REGISTRY.counter("sunbike_db_pool_errors_total", "Checkouts that failed or timed out.", ("alias",))
+
+
+def record_pool_stats() -> None:
+    """psycopg_pool 통계(지난 호출 이후 증가분)를 카운터에 더한다 - 풀이 없는 DB 는 건너뜀"""
+    from django.db import connections
+
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        db_pool_requests.inc(stats.get("requests_num", 0), alias=alias)
+        db_pool_wait.inc(stats.get("requests_wait_ms", 0) / 1000, alias=alias)
+        db_pool_waiting.inc(stats.get("requests_queued", 0), alias=alias)
+        db_pool_errors.inc(stats.get("requests_errors", 0), alias=alias)
+
@@ -0,0 +1,182 @@
+"""요청 계측 미들웨어
+
+QueryProfilingMiddleware - 요청 단위 SQL/템플릿 프로파일링 (QUERY_PROFILING=1 일 때만 설치).
+요청마다 SQL 건수·시간, 같은 SQL 반복(N+1 의심), 템플릿 렌더링 시간, 전체 처리시간을 재서
+Server-Timing 헤더로 내보내고, 느린 요청은 샘플링해 JSON 한 줄로 "core.profiling" 로거에 남긴다.
+끄면 MiddlewareNotUsed 로 체인에서 빠지므로 비용이 없다.
+
+MetricsMiddleware - URL 이름별 요청 수/지연시간, DB 연결 재사용, 커넥션 풀 대기 (core.metrics, /metrics).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger("core.profiling")
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_current: ContextVar["RequestProfile | None"] = ContextVar("core_request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.statements: dict[str, list] = {}  # 정규화 SQL -> [횟수, 시간]
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.sql_count += 1
+            self.sql_seconds += elapsed
+            stat = self.statements.setdefault(_IN_LIST.sub("IN (...)", sql), [0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed
+
+    def duplicates(self, threshold: int) -> list[tuple[str, int, float]]:
+        dup = [(sql, n, t) for sql, (n, t) in self.statements.items() if n >= threshold]
+        return sorted(dup, key=lambda d: -d[1])
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def _install_template_timer():
+    """Template.render 을 감싸 가장 바깥 렌더링 시간만 잰다 (include 중복 계산 방지)."""
+    from django.template.base import Template
+
+    if getattr(Template.render, "_profiled", False):
+        return
+    original = Template.render
+
+    def render(self, context):
+        profile = _current.get()
+        if profile is None:
+            return original(self, context)
+        profile.template_depth += 1
+        t0 = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_seconds += time.perf_counter() - t0
+
+    render._profiled = True
+    Template.render = render
+
+
+class QueryProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, "QUERY_PROFILING_SAMPLE_RATE", 1.0))
+        self.slow_ms = float(getattr(settings, "QUERY_PROFILING_SLOW_MS", 500))
+        self.max_queries = int(getattr(settings, "QUERY_PROFILING_MAX_QUERIES", 50))
+        self.dup_threshold = int(getattr(settings, "QUERY_PROFILING_DUPLICATE_THRESHOLD", 3))
+        self.headers = getattr(settings, "QUERY_PROFILING_HEADERS", True)
+        _install_template_timer()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duplicates = profile.duplicates(self.dup_threshold)
+        total = profile.total_seconds
+        if self.headers:
+            response["Server-Timing"] = ", ".join([
+                f'sql;dur={profile.sql_seconds * 1000:.1f};desc="{profile.sql_count} queries"',
+                f'dup;desc="{sum(n - 1 for _, n, _ in duplicates)} repeated"',
+                f"tpl;dur={profile.template_seconds * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ])
+        if (total * 1000 >= self.slow_ms or profile.sql_count >= self.max_queries or duplicates) \
+                and random.random() < self.sample_rate:
+            self.log(request, response, profile, duplicates, total)
+        return response
+
+    def log(self, request, response, profile: RequestProfile, duplicates, total: float):
+        match = getattr(request, "resolver_match", None)
+        user = getattr(request, "user", None)
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "total_ms": round(total * 1000, 1),
+            "sql_count": profile.sql_count,
+            "sql_ms": round(profile.sql_seconds * 1000, 1),
+            "template_ms": round(profile.template_seconds * 1000, 1),
+            "duplicates": [{"sql": sql[:300], "count": n, "ms": round(t * 1000, 1)} for sql, n, t in duplicates[:5]],
+        }, ensure_ascii=False))
+
+
+class MetricsMiddleware:
+    """URL 이름별 요청 수/지연시간, 요청 시작 시점의 DB 연결 재사용 여부, 커넥션 풀 대기를 core.metrics 에 기록한다.
+
+    연결 재사용은 sync 경로에서만 센다 - ASGI(async 경로)에서는 이벤트 루프 스레드의 연결을 보게 되는데 쿼리는
+    executor 스레드의 연결로 나가므로 늘 "false" 가 된다. 그때는 sunbike_db_connections_created_total
+    (연결이 실제로 열린 스레드에서 connection_created 로 셈)을 요청 수와 비교한다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.before()
+        t0 = time.perf_counter()
+        return self.after(request, self.get_response(request), t0)
+
+    async def __acall__(self, request):
+        t0 = time.perf_counter()
+        return self.after(request, await self.get_response(request), t0)
+
+    def before(self) -> None:
+        for alias in connections:
+            reused = connections[alias].connection is not None
+            metrics.db_reuse.inc(alias=alias, reused="true" if reused else "false")
+
+    def after(self, request, response, t0: float):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        metrics.http_latency.observe(time.perf_counter() - t0, view=view, method=request.method)
+        metrics.http_requests.inc(view=view, method=request.method, status=response.status_code)
+        metrics.record_pool_stats()
+        return response
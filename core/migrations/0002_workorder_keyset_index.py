@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['-in_datetime', '-id'], name='core_workor_in_date_54b7f0_idx'),
+        ),
+    ]
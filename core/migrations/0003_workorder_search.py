@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.search import build_document, create_backend_index, drop_backend_index
+
+
+def backfill(apps, schema_editor):
+    WorkOrder = apps.get_model("core", "WorkOrder")
+    WorkOrderSearch = apps.get_model("core", "WorkOrderSearch")
+    rows = WorkOrder.objects.values_list(
+        "pk", "order_no", "vehicle__plate_no", "vehicle__vin", "vehicle__model",
+        "vehicle__customer__phone", "vehicle__customer__name",
+    ).order_by()
+    batch = []
+    for pk, *fields in rows.iterator(chunk_size=2000):
+        batch.append(WorkOrderSearch(work_order_id=pk, document=build_document(*fields)))
+        if len(batch) >= 2000:
+            WorkOrderSearch.objects.bulk_create(batch)
+            batch = []
+    WorkOrderSearch.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_workorder_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkOrderSearch',
+            fields=[
+                ('work_order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='core.workorder', verbose_name='작업오더')),
+                ('document', models.TextField(blank=True, verbose_name='검색 문서')),
+            ],
+            options={
+                'verbose_name': '검색 색인',
+                'verbose_name_plural': '검색 색인',
+            },
+        ),
+        migrations.RunPython(create_backend_index, drop_backend_index),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
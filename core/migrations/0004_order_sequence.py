@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_workorder_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='일자')),
+                ('branch_key', models.PositiveBigIntegerField(default=0, help_text='0 = 전체 지점 공용', verbose_name='지점 키')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='마지막 번호')),
+            ],
+            options={
+                'verbose_name': '접수번호 카운터',
+                'verbose_name_plural': '접수번호 카운터',
+                'constraints': [models.UniqueConstraint(fields=('day', 'branch_key'), name='core_ordersequence_day_branch_uniq')],
+            },
+        ),
+    ]
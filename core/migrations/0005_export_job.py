@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_order_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ZIP', 'ZIP (오더별 PDF)'), ('MERGED', 'PDF 합본')], default='ZIP', max_length=16, verbose_name='형식')),
+                ('status', models.CharField(choices=[('PENDING', '대기'), ('RUNNING', '진행중'), ('DONE', '완료'), ('FAILED', '실패')], default='PENDING', max_length=16, verbose_name='상태')),
+                ('date_from', models.DateField(verbose_name='시작일')),
+                ('date_to', models.DateField(verbose_name='종료일')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='전체 건수')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='처리 건수')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='파일')),
+                ('error', models.TextField(blank=True, verbose_name='오류')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='완료일시')),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='core.branch', verbose_name='지점(센터)')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='요청자')),
+            ],
+            options={
+                'verbose_name': '일괄 출력 작업',
+                'verbose_name_plural': '일괄 출력 작업',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='일자')),
+                ('technician_key', models.PositiveIntegerField(default=0, help_text='0 = 미배정', verbose_name='담당자 키')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='완료 건수')),
+                ('parts_total', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='부품 매출')),
+                ('labor_total', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='공임 매출')),
+                ('discount_total', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='할인')),
+                ('tax_total', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='부가세')),
+                ('revenue_total', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='총매출')),
+                ('turnaround_count', models.PositiveIntegerField(default=0, verbose_name='출고 건수')),
+                ('turnaround_seconds', models.PositiveBigIntegerField(default=0, verbose_name='입고→출고 합계(초)')),
+                ('payment_count', models.PositiveIntegerField(default=0, verbose_name='결제 건수')),
+                ('payment_total', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='결제액')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='갱신일시')),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='core.branch', verbose_name='지점(센터)')),
+            ],
+            options={
+                'verbose_name': '일별 집계',
+                'verbose_name_plural': '일별 집계',
+                'constraints': [models.UniqueConstraint(fields=('day', 'branch', 'technician_key'), name='core_dailyrollup_bucket_uniq')],
+            },
+        ),
+    ]
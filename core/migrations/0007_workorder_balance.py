@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_balance(apps, schema_editor):
+    WorkOrder = apps.get_model("core", "WorkOrder")
+    Payment = apps.get_model("core", "Payment")
+    paid = Coalesce(
+        Subquery(Payment.objects.filter(work_order=OuterRef("pk")).order_by()
+                 .values("work_order").annotate(t=Sum("amount")).values("t")),
+        Value(0), output_field=models.DecimalField(max_digits=12, decimal_places=0),
+    )
+    WorkOrder.objects.update(paid_amount=paid)
+    WorkOrder.objects.update(balance_due=F("total_amount") - F("paid_amount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_daily_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workorder',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='미수금'),
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='결제액'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('balance_due__gt', 0)), fields=['branch', 'in_datetime'], name='core_wo_receivable_idx'),
+        ),
+        migrations.RunPython(backfill_balance, migrations.RunPython.noop),
+    ]
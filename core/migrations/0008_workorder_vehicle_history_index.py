@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_workorder_balance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['vehicle', '-in_datetime', '-id'], name='core_wo_vehicle_hist_idx'),
+        ),
+    ]
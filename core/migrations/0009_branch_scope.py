@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_workorder_vehicle_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaffProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('all_branches', models.BooleanField(default=False, help_text='켜면 상단에서 지점을 골라 볼 수 있다', verbose_name='전체 지점 조회')),
+            ],
+            options={
+                'verbose_name': '직원 소속',
+                'verbose_name_plural': '직원 소속',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['branch', '-in_datetime', '-id'], name='core_wo_branch_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['branch', 'status', '-in_datetime'], name='core_wo_branch_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='staff', to='core.branch', verbose_name='소속 지점'),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='staff_profile', to=settings.AUTH_USER_MODEL, verbose_name='사용자'),
+        ),
+    ]
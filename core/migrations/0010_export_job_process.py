@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_branch_scope'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='마지막 진행'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='host',
+            field=models.CharField(blank=True, max_length=120, verbose_name='실행 호스트'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='pid',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='프로세스 ID'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='시작일시'),
+        ),
+    ]
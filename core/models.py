@@ -1,11 +1,51 @@
 
 from __future__ import annotations
 
+from decimal import Decimal
+from fractions import Fraction
+
 from django.conf import settings
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Floor, Greatest
 from django.utils import timezone
 
+from . import metrics
+
+TAX_RATE = Decimal("0.1")
+# 라인/결제 신호가 F() UPDATE 로만 유지하는 합계 열 - WorkOrder.save() 는 (update_fields 로 지정하지 않는 한) 쓰지 않는다
+TOTAL_FIELDS = ["subtotal_parts", "subtotal_labor", "tax_amount", "total_amount", "paid_amount", "balance_due"]
+_AMOUNT = models.DecimalField(max_digits=12, decimal_places=0)
+
+
+def compute_tax(taxable: int, tax_rate=TAX_RATE) -> int:
+    """부가세 = taxable * tax_rate 를 원 단위 반올림(0.5 올림). SQL 쪽 tax_expression 과 같은 정수 연산."""
+    r = Fraction(Decimal(str(tax_rate)))
+    return (2 * r.numerator * taxable + r.denominator) // (2 * r.denominator)
+
+
+def tax_expression(taxable, tax_rate=TAX_RATE):
+    r = Fraction(Decimal(str(tax_rate)))
+    return Floor((taxable * Value(2 * r.numerator) + Value(r.denominator)) / Value(2 * r.denominator), output_field=_AMOUNT)
+
+
+class TrackedValuesMixin:
+    """DB에서 읽어온 시점의 값(tracked_fields)을 기억해 저장/삭제 시 변경분 계산에 쓴다."""
+    tracked_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        obj.remember_values()
+        return obj
+
+    def remember_values(self) -> None:
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {f: getattr(self, f) for f in self.tracked_fields if f not in deferred}
+
+    def loaded_value(self, name, default=None):
+        return getattr(self, "_loaded_values", {}).get(name, default)
+
 
 class Branch(models.Model):
     name = models.CharField("센터명", max_length=120)
@@ -21,6 +61,20 @@ class Branch(models.Model):
         return self.name
 
 
+class StaffProfile(models.Model):
+    """직원 소속 지점 - 소속이 있고 전체 조회 권한이 없으면 그 지점 데이터만 보인다 (core.branching)"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="staff_profile", verbose_name="사용자")
+    branch = models.ForeignKey(Branch, on_delete=models.SET_NULL, null=True, blank=True, related_name="staff", verbose_name="소속 지점")
+    all_branches = models.BooleanField("전체 지점 조회", default=False, help_text="켜면 상단에서 지점을 골라 볼 수 있다")
+
+    class Meta:
+        verbose_name = "직원 소속"
+        verbose_name_plural = "직원 소속"
+
+    def __str__(self) -> str:
+        return f"{self.user} @ {self.branch or '전체'}"
+
+
 class Customer(models.Model):
     name = models.CharField("고객명", max_length=80)
     phone = models.CharField("전화번호", max_length=40, db_index=True)
@@ -72,7 +126,94 @@ class Vehicle(models.Model):
         return f"{self.model} ({ident})"
 
 
-class WorkOrder(models.Model):
+class OrderSequence(models.Model):
+    """접수번호 일자(+지점)별 카운터 - core.utils.generate_order_no 에서 사용"""
+    day = models.DateField("일자")
+    branch_key = models.PositiveBigIntegerField("지점 키", default=0, help_text="0 = 전체 지점 공용")
+    last_value = models.PositiveIntegerField("마지막 번호", default=0)
+
+    class Meta:
+        verbose_name = "접수번호 카운터"
+        verbose_name_plural = "접수번호 카운터"
+        constraints = [models.UniqueConstraint(fields=["day", "branch_key"], name="core_ordersequence_day_branch_uniq")]
+
+    def __str__(self) -> str:
+        return f"{self.day:%Y%m%d}/{self.branch_key}: {self.last_value}"
+
+
+class WorkOrderQuerySet(models.QuerySet):
+    def apply_totals_delta(self, parts=0, labor=0, tax_rate=TAX_RATE) -> int:
+        """소계에 변경분을 더하고 부가세/총액을 한 번의 UPDATE 로 다시 계산한다 (F() 기반, 경합 안전)."""
+        new_parts = F("subtotal_parts") + Value(int(parts))
+        new_labor = F("subtotal_labor") + Value(int(labor))
+        taxable = Greatest(new_parts + new_labor - F("discount_amount"), Value(0), output_field=_AMOUNT)
+        tax = tax_expression(taxable, tax_rate)
+        n = self.update(
+            subtotal_parts=new_parts, subtotal_labor=new_labor, tax_amount=tax, total_amount=taxable + tax,
+            balance_due=taxable + tax - F("paid_amount"), updated_at=timezone.now(),
+        )
+        metrics.totals_recompute.inc(n, kind="delta")
+        return n
+
+    def apply_payment_delta(self, amount) -> int:
+        """결제 변경분을 결제액/미수금에 한 번의 UPDATE 로 반영한다 (F() 기반, 경합 안전)."""
+        return self.update(
+            paid_amount=F("paid_amount") + Value(int(amount)), balance_due=F("balance_due") - Value(int(amount)),
+            updated_at=timezone.now(),
+        )
+
+    def scoped(self, branch_id=None):
+        """지점 컨텍스트(core.branching)로 거른다. branch_id 를 주면 그 값, 없으면 현재 요청의 지점."""
+        from .branching import current_branch_id
+
+        branch_id = branch_id or current_branch_id()
+        return self.filter(branch_id=branch_id) if branch_id else self
+
+    def receivables(self):
+        """미수금이 남은 오더 (취소 제외) - core_wo_receivable_idx 부분 인덱스를 탄다"""
+        return self.filter(balance_due__gt=0).exclude(status=WorkOrder.Status.CANCELED)
+
+    def with_computed_totals(self, tax_rate=TAX_RATE):
+        """부품/공임/결제 행에서 다시 합산한 calc_* 값을 붙인다 (정합성 점검용)."""
+        taxable = Greatest(F("calc_parts") + F("calc_labor") - F("discount_amount"), Value(0), output_field=_AMOUNT)
+        return self.annotate(
+            calc_parts=_line_sum(WorkPart, "line_total"),
+            calc_labor=_line_sum(WorkLabor, "price"),
+            calc_paid=_line_sum(Payment, "amount"),
+        ).annotate(calc_tax=tax_expression(taxable, tax_rate)).annotate(calc_total=taxable + F("calc_tax"))
+
+    def drifted(self, tax_rate=TAX_RATE):
+        """저장된 소계/부가세/총액/결제액/미수금이 실제 행 합계와 다른 작업오더"""
+        return self.with_computed_totals(tax_rate).exclude(
+            subtotal_parts=F("calc_parts"), subtotal_labor=F("calc_labor"),
+            tax_amount=F("calc_tax"), total_amount=F("calc_total"),
+            paid_amount=F("calc_paid"), balance_due=F("calc_total") - F("calc_paid"),
+        )
+
+    def recompute_totals(self, tax_rate=TAX_RATE) -> int:
+        """대상 작업오더 전체의 합계(결제액/미수금 포함)를 집합 단위 UPDATE 한 번으로 다시 계산한다."""
+        parts = _line_sum(WorkPart, "line_total")
+        labor = _line_sum(WorkLabor, "price")
+        paid = _line_sum(Payment, "amount")
+        taxable = Greatest(parts + labor - F("discount_amount"), Value(0), output_field=_AMOUNT)
+        tax = tax_expression(taxable, tax_rate)
+        n = self.update(
+            subtotal_parts=parts, subtotal_labor=labor, tax_amount=tax, total_amount=taxable + tax,
+            paid_amount=paid, balance_due=taxable + tax - paid, updated_at=timezone.now(),
+        )
+        metrics.totals_recompute.inc(n, kind="set")
+        return n
+
+
+def _line_sum(model, field):
+    sq = (model.objects.filter(work_order=OuterRef("pk")).order_by()
+          .values("work_order").annotate(t=Sum(field)).values("t"))
+    return Coalesce(Subquery(sq), Value(0), output_field=_AMOUNT)
+
+
+class WorkOrder(TrackedValuesMixin, models.Model):
+    tracked_fields = ("branch_id", "assigned_to_id", "status", "in_datetime", "out_datetime", "vehicle_id", "discount_amount")
+
     class Status(models.TextChoices):
         RECEIVED = "RECEIVED", "접수"
         IN_PROGRESS = "IN_PROGRESS", "작업중"
@@ -108,31 +249,75 @@ class WorkOrder(models.Model):
     discount_amount = models.DecimalField("할인", max_digits=12, decimal_places=0, default=0)
     tax_amount = models.DecimalField("부가세", max_digits=12, decimal_places=0, default=0)
     total_amount = models.DecimalField("총액", max_digits=12, decimal_places=0, default=0)
+    # 결제 신호(core.signals)가 F() UPDATE 로 유지 - 미수금 = 총액 - 결제액
+    paid_amount = models.DecimalField("결제액", max_digits=12, decimal_places=0, default=0)
+    balance_due = models.DecimalField("미수금", max_digits=12, decimal_places=0, default=0)
 
     created_at = models.DateTimeField("생성일", auto_now_add=True)
     updated_at = models.DateTimeField("수정일", auto_now=True)
 
+    objects = WorkOrderQuerySet.as_manager()
+
     class Meta:
         verbose_name = "작업오더(접수)"
         verbose_name_plural = "작업오더(접수)"
         ordering = ["-in_datetime", "-id"]
+        indexes = [
+            models.Index(fields=["-in_datetime", "-id"]),
+            models.Index(fields=["branch", "in_datetime"], condition=Q(balance_due__gt=0), name="core_wo_receivable_idx"),
+            models.Index(fields=["vehicle", "-in_datetime", "-id"], name="core_wo_vehicle_hist_idx"),
+            models.Index(fields=["branch", "-in_datetime", "-id"], name="core_wo_branch_recent_idx"),
+            models.Index(fields=["branch", "status", "-in_datetime"], name="core_wo_branch_status_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.order_no
 
-    def recompute_totals(self, tax_rate: float = 0.1) -> None:
+    def save(self, *args, **kwargs):
+        """기존 오더를 통째로 저장할 때는 합계 열(TOTAL_FIELDS)을 빼고 쓴다.
+
+        합계는 라인/결제 신호의 F() UPDATE 로만 바뀌므로, 미리 읽어 둔 인스턴스(관리자 화면 등)를 저장하면
+        그 사이 반영된 변경분을 옛 값으로 덮어쓰게 된다. 할인이 바뀌면 부가세/총액/미수금을 DB 에서 다시 계산한다.
+        """
+        if self._state.adding or self.pk is None or kwargs.get("force_insert"):
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            skip = set(TOTAL_FIELDS) | self.get_deferred_fields()
+            update_fields = kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.attname not in skip]
+        discount_changed = ("discount_amount" in update_fields and "discount_amount" in getattr(self, "_loaded_values", {})
+                            and self.loaded_value("discount_amount") != self.discount_amount)
+        super().save(*args, **kwargs)
+        if discount_changed:
+            WorkOrder.objects.filter(pk=self.pk).apply_totals_delta()
+            self.refresh_from_db(fields=TOTAL_FIELDS)
+
+    def recompute_totals(self, tax_rate=TAX_RATE, verify: bool = False) -> bool:
+        """부품/공임 행에서 합계를 다시 계산한다 (저장은 호출측 - save(update_fields=TOTAL_FIELDS)).
+
+        verify=True 면 기존 저장값과 달랐는지(drift) 여부를 돌려준다.
+        """
         parts_total = int(self.parts.aggregate(t=Sum("line_total"))["t"] or 0)
         labor_total = int(self.labor.aggregate(t=Sum("price"))["t"] or 0)
         discount = int(self.discount_amount or 0)
         taxable = max(0, parts_total + labor_total - discount)
-        tax = int(round(taxable * tax_rate))
+        tax = compute_tax(taxable, tax_rate)
+        metrics.totals_recompute.inc(kind="instance")
+        before = (self.subtotal_parts, self.subtotal_labor, self.tax_amount, self.total_amount)
         self.subtotal_parts = parts_total
         self.subtotal_labor = labor_total
         self.tax_amount = tax
         self.total_amount = taxable + tax
+        self.balance_due = self.total_amount - int(self.paid_amount or 0)
+        if verify:
+            return tuple(int(v or 0) for v in before) != (parts_total, labor_total, tax, taxable + tax)
+        return False
+
 
+class WorkPart(TrackedValuesMixin, models.Model):
+    tracked_fields = ("work_order_id", "line_total")
 
-class WorkPart(models.Model):
     work_order = models.ForeignKey(WorkOrder, on_delete=models.CASCADE, related_name="parts", verbose_name="작업오더")
     part_name = models.CharField("부품/소모품명", max_length=160)
     qty = models.DecimalField("수량", max_digits=10, decimal_places=2, default=1)
@@ -143,12 +328,17 @@ class WorkPart(models.Model):
         verbose_name = "작업 부품"
         verbose_name_plural = "작업 부품"
 
+    def compute_line_total(self) -> int:
+        return int(round(float(self.qty) * float(self.unit_price)))
+
     def save(self, *args, **kwargs):
-        self.line_total = int(round(float(self.qty) * float(self.unit_price)))
+        self.line_total = self.compute_line_total()
         super().save(*args, **kwargs)
 
 
-class WorkLabor(models.Model):
+class WorkLabor(TrackedValuesMixin, models.Model):
+    tracked_fields = ("work_order_id", "price")
+
     work_order = models.ForeignKey(WorkOrder, on_delete=models.CASCADE, related_name="labor", verbose_name="작업오더")
     labor_name = models.CharField("공임 항목", max_length=160)
     minutes = models.PositiveIntegerField("시간(분)", null=True, blank=True)
@@ -159,7 +349,9 @@ class WorkLabor(models.Model):
         verbose_name_plural = "작업 공임"
 
 
-class Payment(models.Model):
+class Payment(TrackedValuesMixin, models.Model):
+    tracked_fields = ("work_order_id", "paid_at", "amount")
+
     class Method(models.TextChoices):
         CARD = "CARD", "카드"
         CASH = "CASH", "현금"
@@ -175,3 +367,86 @@ class Payment(models.Model):
     class Meta:
         verbose_name = "결제"
         verbose_name_plural = "결제"
+
+
+class WorkOrderSearch(models.Model):
+    """대시보드 빠른검색용 정규화 문서 (core.search 에서 유지)"""
+    work_order = models.OneToOneField(WorkOrder, on_delete=models.CASCADE, primary_key=True, related_name="search", verbose_name="작업오더")
+    document = models.TextField("검색 문서", blank=True)
+
+    class Meta:
+        verbose_name = "검색 색인"
+        verbose_name_plural = "검색 색인"
+
+
+class ExportJob(models.Model):
+    """월말 명세서 일괄 출력 같은 백그라운드 작업 (core.invoice_batch)"""
+
+    class Kind(models.TextChoices):
+        ZIP = "ZIP", "ZIP (오더별 PDF)"
+        MERGED = "MERGED", "PDF 합본"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "대기"
+        RUNNING = "RUNNING", "진행중"
+        DONE = "DONE", "완료"
+        FAILED = "FAILED", "실패"
+
+    kind = models.CharField("형식", max_length=16, choices=Kind.choices, default=Kind.ZIP)
+    status = models.CharField("상태", max_length=16, choices=Status.choices, default=Status.PENDING)
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True, related_name="export_jobs", verbose_name="지점(센터)")
+    date_from = models.DateField("시작일")
+    date_to = models.DateField("종료일")
+    total = models.PositiveIntegerField("전체 건수", default=0)
+    done = models.PositiveIntegerField("처리 건수", default=0)
+    file = models.FileField("파일", upload_to="exports/", blank=True)
+    error = models.TextField("오류", blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="요청자")
+    created_at = models.DateTimeField("생성일", auto_now_add=True)
+    # 작업 프로세스 기록 - 시작 못 했거나 멈춘 작업을 invoice_batch.expire_stale() 이 실패로 정리
+    host = models.CharField("실행 호스트", max_length=120, blank=True)
+    pid = models.PositiveIntegerField("프로세스 ID", null=True, blank=True)
+    started_at = models.DateTimeField("시작일시", null=True, blank=True)
+    heartbeat_at = models.DateTimeField("마지막 진행", null=True, blank=True)
+    finished_at = models.DateTimeField("완료일시", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "일괄 출력 작업"
+        verbose_name_plural = "일괄 출력 작업"
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.date_from}~{self.date_to} ({self.get_status_display()})"
+
+    @property
+    def progress(self) -> int:
+        return int(self.done * 100 / self.total) if self.total else (100 if self.status == self.Status.DONE else 0)
+
+
+class DailyRollup(models.Model):
+    """일자 × 지점 × 담당자별 매출/처리량 집계 (core.rollups 에서 유지, 분석 화면은 이 표만 읽는다)
+
+    오더는 출고일(없으면 입고일) 기준으로 완료/출고 상태만, 결제는 결제일 기준으로 집계한다.
+    """
+    day = models.DateField("일자")
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="daily_rollups", verbose_name="지점(센터)")
+    technician_key = models.PositiveIntegerField("담당자 키", default=0, help_text="0 = 미배정")
+    order_count = models.PositiveIntegerField("완료 건수", default=0)
+    parts_total = models.DecimalField("부품 매출", max_digits=14, decimal_places=0, default=0)
+    labor_total = models.DecimalField("공임 매출", max_digits=14, decimal_places=0, default=0)
+    discount_total = models.DecimalField("할인", max_digits=14, decimal_places=0, default=0)
+    tax_total = models.DecimalField("부가세", max_digits=14, decimal_places=0, default=0)
+    revenue_total = models.DecimalField("총매출", max_digits=14, decimal_places=0, default=0)
+    turnaround_count = models.PositiveIntegerField("출고 건수", default=0)
+    turnaround_seconds = models.PositiveBigIntegerField("입고→출고 합계(초)", default=0)
+    payment_count = models.PositiveIntegerField("결제 건수", default=0)
+    payment_total = models.DecimalField("결제액", max_digits=14, decimal_places=0, default=0)
+    updated_at = models.DateTimeField("갱신일시", auto_now=True)
+
+    class Meta:
+        verbose_name = "일별 집계"
+        verbose_name_plural = "일별 집계"
+        constraints = [models.UniqueConstraint(fields=["day", "branch", "technician_key"], name="core_dailyrollup_bucket_uniq")]
+
+    def __str__(self) -> str:
+        return f"{self.day:%Y-%m-%d} {self.branch_id}/{self.technician_key}"
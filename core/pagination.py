@@ -0,0 +1,73 @@
+"""작업오더 목록용 keyset(커서) 페이지네이션 / 건수 추정"""
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(obj) -> str:
+    raw = f"{obj.in_datetime.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        dt, pk = raw.split("|")
+        return datetime.fromisoformat(dt), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _after(qs: QuerySet, cursor: str | None, size: int) -> QuerySet:
+    key = decode_cursor(cursor) if cursor else None
+    if key:
+        dt, pk = key
+        qs = qs.filter(Q(in_datetime__lt=dt) | Q(in_datetime=dt, pk__lt=pk))
+    return qs.order_by("-in_datetime", "-id")[: size + 1]
+
+
+def _page(rows: list, size: int) -> KeysetPage:
+    if len(rows) > size:
+        rows = rows[:size]
+        return KeysetPage(rows, encode_cursor(rows[-1]))
+    return KeysetPage(rows, None)
+
+
+def keyset_page(qs: QuerySet, cursor: str | None, size: int) -> KeysetPage:
+    """(-in_datetime, -id) 순서로 cursor 다음 size건을 가져온다 (Meta.ordering과 동일)."""
+    return _page(list(_after(qs, cursor, size)), size)
+
+
+async def akeyset_page(qs: QuerySet, cursor: str | None, size: int) -> KeysetPage:
+    """keyset_page 의 async 판 (ASGI 뷰용)"""
+    return _page([row async for row in _after(qs, cursor, size).aiterator()], size)
+
+
+def estimate_count(qs: QuerySet, cap: int = 1000) -> tuple[int, bool]:
+    """(건수, 추정치 여부). 필터 없는 PostgreSQL 테이블은 통계값, 그 외는 cap+1에서 끊는다."""
+    if not qs.query.has_filters() and connections[qs.db].vendor == "postgresql":
+        with connections[qs.db].cursor() as cur:
+            cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [qs.model._meta.db_table])
+            row = cur.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0]), True
+    n = qs.order_by()[: cap + 1].count()
+    if n > cap:
+        return cap, True
+    return n, False
+
@@ -0,0 +1,324 @@
+"""견적서/정비명세서 PDF 렌더링 (썬바이크 흑백 + 로고)
+
+CID 폰트 등록, 로고 파일 탐색/디코딩 같은 준비 작업은 프로세스당 한 번
+InvoiceTemplate 를 만들 때만 하고(웹 서버 시작 시 motosvc/wsgi.py·asgi.py 또는 첫 사용 시, 잠금 보호),
+요청마다는 오더 데이터만 그린다.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.utils import timezone
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from . import metrics
+
+# 레이아웃/출력 방식을 바꾸면 올린다 (PDF 캐시 ETag 에 포함)
+TEMPLATE_VERSION = "2"
+
+# 스트림을 순수 파이썬 ASCII85 로 인코딩하지 않고 바이너리로 둔다 (로고 한 장에 수십 ms)
+rl_config.useA85 = 0
+
+FONT_NAME = "HYGothic-Medium"
+LOGO_MAX_PX = 512  # 14mm 로고에 충분한 해상도
+
+
+def _register_font() -> str:
+    try:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+        return FONT_NAME
+    except Exception:
+        return "Helvetica"
+
+
+def _load_logo() -> ImageReader | None:
+    """로고를 한 번 읽어 축소 후 메모리의 JPEG/이미지로 보관한다."""
+    from PIL import Image
+
+    logo_paths = [
+        settings.BASE_DIR / "static" / "core" / "logo.jpg",
+        settings.BASE_DIR / "static" / "core" / "logo.png",
+    ]
+    logo_path = next((p for p in logo_paths if p.exists()), None)
+    if not logo_path:
+        return None
+    try:
+        img = Image.open(logo_path)
+        img.thumbnail((LOGO_MAX_PX, LOGO_MAX_PX))
+        if img.mode == "RGB":
+            # JPEG 그대로 PDF 에 넣을 수 있어 요청마다 재압축이 없다
+            buf = BytesIO()
+            img.save(buf, "JPEG", quality=90)
+            buf.seek(0)
+            reader = ImageReader(buf)
+        else:
+            reader = ImageReader(img)
+        reader.getRGBData()  # 디코딩 결과를 미리 캐시
+        return reader
+    except Exception:
+        return None
+
+
+class InvoiceTemplate:
+    """폰트/로고/고정 헤더를 가진 재사용 가능한 페이지 템플릿"""
+
+    def __init__(self):
+        self.font_name = _register_font()
+        self.logo = _load_logo()
+        # ImageReader 는 내부 파일 포인터를 공유하므로 그릴 때만 잠근다
+        self._logo_lock = threading.Lock()
+
+    def draw_header(self, c: canvas.Canvas) -> None:
+        W, H = A4
+        if self.logo is not None:
+            try:
+                # draw logo (fit height 14mm)
+                with self._logo_lock:
+                    c.drawImage(self.logo, 20*mm, H-28*mm, height=14*mm, width=14*mm, mask='auto')
+            except Exception:
+                pass
+
+        c.setFillColorRGB(0, 0, 0)
+        c.setFont(self.font_name, 16)
+        c.drawString(36*mm, H - 18*mm, "썬바이크 정비 견적/명세서")
+
+        c.setFont(self.font_name, 10)
+        c.drawRightString(190*mm, H-22*mm, f"발행일: {timezone.localtime(timezone.now()).strftime('%Y-%m-%d %H:%M')}")
+
+    def draw(self, c: canvas.Canvas, order, parts, labor) -> None:
+        """오더 한 건을 그린다 (여러 페이지가 될 수 있음, 마지막에 showPage)."""
+        W, H = A4
+        self.draw_header(c)
+
+        # --- Basic info box ---
+        cust = order.vehicle.customer
+        ident = order.vehicle.plate_no or order.vehicle.vin or "-"
+        y = H - 36*mm
+        c.setLineWidth(0.8)
+        c.rect(20*mm, y-26*mm, 170*mm, 26*mm)  # box
+
+        c.setFont(self.font_name, 10)
+        c.drawString(24*mm, y-8*mm, f"접수번호: {order.order_no}")
+        c.drawString(24*mm, y-14*mm, f"센터: {order.branch.name}")
+        c.drawString(24*mm, y-20*mm, f"고객: {cust.name}  /  {cust.phone}")
+        c.drawString(110*mm, y-8*mm, f"차량: {order.vehicle.model}")
+        c.drawString(110*mm, y-14*mm, f"식별: {ident}")
+        c.drawString(110*mm, y-20*mm, f"입고 주행거리: {order.odometer_in or '-'}")
+
+        # --- Sections ---
+        y = y - 36*mm
+
+        def section_title(txt):
+            nonlocal y
+            c.setFont(self.font_name, 11)
+            c.drawString(20*mm, y, txt)
+            y -= 4*mm
+            c.setLineWidth(0.6)
+            c.line(20*mm, y, 190*mm, y)
+            y -= 8*mm
+
+        def table_header(cols):
+            nonlocal y
+            c.setFont(self.font_name, 9)
+            for (x, label, align) in cols:
+                if align == "R":
+                    c.drawRightString(x, y, label)
+                else:
+                    c.drawString(x, y, label)
+            y -= 3*mm
+            c.line(20*mm, y, 190*mm, y)
+            y -= 6*mm
+
+        # Parts
+        section_title("부품/소모품")
+        table_header([
+            (20*mm, "품목", "L"),
+            (120*mm, "수량", "R"),
+            (155*mm, "단가", "R"),
+            (190*mm, "금액", "R"),
+        ])
+        c.setFont(self.font_name, 9)
+        for p in parts:
+            if y < 35*mm:
+                c.showPage()
+                y = H - 20*mm
+            c.drawString(20*mm, y, str(p.part_name)[:34])
+            c.drawRightString(120*mm, y, str(p.qty))
+            c.drawRightString(155*mm, y, f"{int(p.unit_price):,}")
+            c.drawRightString(190*mm, y, f"{int(p.line_total):,}")
+            y -= 6*mm
+
+        # Labor
+        y -= 4*mm
+        section_title("공임")
+        table_header([
+            (20*mm, "항목", "L"),
+            (190*mm, "금액", "R"),
+        ])
+        c.setFont(self.font_name, 9)
+        for l in labor:
+            if y < 35*mm:
+                c.showPage()
+                y = H - 20*mm
+            c.drawString(20*mm, y, str(l.labor_name)[:40])
+            c.drawRightString(190*mm, y, f"{int(l.price):,}")
+            y -= 6*mm
+
+        # Totals (black/white)
+        y -= 8*mm
+        c.setLineWidth(0.8)
+        c.rect(110*mm, y-28*mm, 80*mm, 28*mm)
+        c.setFont(self.font_name, 10)
+        c.drawString(114*mm, y-8*mm, "부품 소계")
+        c.drawRightString(188*mm, y-8*mm, f"{int(order.subtotal_parts):,} 원")
+        c.drawString(114*mm, y-14*mm, "공임 소계")
+        c.drawRightString(188*mm, y-14*mm, f"{int(order.subtotal_labor):,} 원")
+        c.drawString(114*mm, y-20*mm, "부가세")
+        c.drawRightString(188*mm, y-20*mm, f"{int(order.tax_amount):,} 원")
+        c.setFont(self.font_name, 12)
+        c.drawString(114*mm, y-26*mm, "총액")
+        c.drawRightString(188*mm, y-26*mm, f"{int(order.total_amount):,} 원")
+
+        # Notes
+        y = min(y-38*mm, 60*mm)
+        c.setFont(self.font_name, 9)
+        c.drawString(20*mm, y, "비고:")
+        c.setFont(self.font_name, 9)
+        note = (order.recommendations or "").strip() or "—"
+        c.drawString(30*mm, y, note[:90])
+
+        c.showPage()
+
+    def render(self, order, parts, labor) -> bytes:
+        return self.render_many([(order, parts, labor)])
+
+    def render_many(self, orders) -> bytes:
+        """[(오더, 부품, 공임), ...] 을 한 PDF 로 (일괄 출력 합본의 한 묶음)"""
+        buf = BytesIO()
+        c = canvas.Canvas(buf, pagesize=A4)
+        for order, parts, labor in orders:
+            self.draw(c, order, parts, labor)
+        c.save()
+        return buf.getvalue()
+
+
+_template: InvoiceTemplate | None = None
+_template_lock = threading.Lock()
+
+
+def get_template() -> InvoiceTemplate:
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = InvoiceTemplate()
+    return _template
+
+
+def warm_up() -> None:
+    """PDF_WARMUP 이면 템플릿을 미리 만든다 - WSGI/ASGI 진입점에서만 불러 manage.py 명령(migrate 등)은 건너뛴다."""
+    if getattr(settings, "PDF_WARMUP", True):
+        get_template()
+
+
+def render_invoice(order, parts, labor) -> bytes:
+    with metrics.pdf_render.time():
+        body = get_template().render(order, parts, labor)
+    metrics.pdf_bytes.observe(len(body))
+    return body
+
+
+_XREF_AT = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_OBJ_HEADER = re.compile(rb"^\s*(\d+) 0 obj")
+_REF = re.compile(rb"(\d+) 0 R\b")
+_STREAM = re.compile(rb">>\s*stream\r?\n")
+
+
+class MergedPdfWriter:
+    """ReportLab 이 만든 PDF 들을 파일 하나로 이어 쓴다 (합본 일괄 출력용).
+
+    묶음 PDF 를 받을 때마다 객체 번호만 바꿔 바로 파일에 쓰고, 메모리에는 객체 위치와 페이지 트리 번호만 남긴다.
+    각 묶음의 /Pages 노드를 합본 /Pages 의 자식으로 매단다. 객체 스트림/압축 xref 가 없는
+    ReportLab 출력만 대상으로 한다 (다른 PDF 를 넣으면 ValueError).
+    """
+
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, path: str):
+        self.f = open(path, "wb")
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.offsets: dict[int, int] = {}
+        self.kids: list[int] = []
+        self.pages = 0
+        self.next_num = 3
+
+    def _write(self, num: int, body: bytes) -> None:
+        self.offsets[num] = self.f.tell()
+        self.f.write(body if body.endswith(b"\n") else body + b"\n")
+
+    def append(self, data: bytes) -> None:
+        m = _XREF_AT.search(data[-64:])
+        if not m or not data.startswith(b"%PDF-"):
+            raise ValueError("not a ReportLab PDF")
+        xref_at = int(m.group(1))
+        trailer = data[data.index(b"trailer", xref_at):]
+        root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+        info = re.search(rb"/Info (\d+) 0 R", trailer)
+        entries = _XREF_ENTRY.findall(data, xref_at, data.index(b"trailer", xref_at))
+        starts = sorted((int(off), num) for num, (off, _, kind) in enumerate(entries) if kind == b"n")
+        objects = {num: data[off:end] for (off, num), end in zip(starts, [o for o, _ in starts[1:]] + [xref_at])}
+        pages = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+        skip = {root, int(info.group(1)) if info else None}
+        renumber = {}
+        for num in sorted(objects):
+            if num not in skip:
+                renumber[num] = self.next_num
+                self.next_num += 1
+
+        def refs(match):
+            return b"%d 0 R" % renumber[int(match.group(1))]
+
+        for num, body in sorted(objects.items()):
+            if num in skip:
+                continue
+            # 객체 번호/참조는 사전 부분에만 있다 - 스트림 바이트는 그대로 둔다
+            split = _STREAM.search(body)
+            head, tail = (body[:split.end()], body[split.end():]) if split else (body, b"")
+            head = _OBJ_HEADER.sub(b"%d 0 obj" % renumber[num], head, count=1)
+            head = _REF.sub(refs, head)
+            if num == pages:
+                head = head.replace(b"<<", b"<< /Parent %d 0 R" % self.PAGES, 1)
+                self.pages += int(re.search(rb"/Count (\d+)", head).group(1))
+                self.kids.append(renumber[num])
+            self._write(renumber[num], head + tail)
+
+    def close(self) -> None:
+        kids = b" ".join(b"%d 0 R" % k for k in self.kids)
+        self._write(self.PAGES, b"%d 0 obj\n<< /Type /Pages /Kids [ %s ] /Count %d >>\nendobj" % (self.PAGES, kids, self.pages))
+        self._write(self.CATALOG, b"%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj" % (self.CATALOG, self.PAGES))
+        xref_at = self.f.tell()
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_num)
+        for num in range(1, self.next_num):
+            self.f.write(b"%010d 00000 n \n" % self.offsets[num])
+        self.f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_num, self.CATALOG, xref_at))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.f.close()
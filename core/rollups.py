@@ -0,0 +1,188 @@
+"""매출/처리량 일별 집계 (DailyRollup)
+
+집계 단위(bucket)는 (일자, 지점, 담당자 키). 신호에서 변경된 오더/결제가 속한 bucket 을 표시하면
+커밋 후 그 bucket 만 원본에서 다시 집계해 덮어쓴다 (증감 누적이 아니라 재집계라 어긋나지 않는다).
+한 트랜잭션에서 여러 번 표시해도 커밋 후 bucket 마다 한 번만 다시 집계한다.
+집계 행은 (일자, 지점, 담당자) UNIQUE 에 대한 upsert 로 써서 같은 bucket 을 동시에 갱신해도 충돌하지 않는다.
+전체 재작성은 rebuild() / `manage.py rebuild_rollups`.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import DailyRollup, Payment, WorkOrder
+
+COMPLETED = [WorkOrder.Status.DONE, WorkOrder.Status.RELEASED]
+Bucket = tuple[date, int, int]  # (day, branch_id, technician_key)
+
+SUM_FIELDS = ("order_count", "parts_total", "labor_total", "discount_total", "tax_total", "revenue_total",
+              "turnaround_count", "turnaround_seconds", "payment_count", "payment_total")
+
+
+def order_bucket(branch_id, assigned_to_id, status, in_datetime, out_datetime) -> Bucket | None:
+    if status not in COMPLETED or not branch_id:
+        return None
+    return timezone.localdate(out_datetime or in_datetime), branch_id, assigned_to_id or 0
+
+
+def _bounds(date_from: date, date_to: date):
+    tz = timezone.get_current_timezone()
+    return datetime.combine(date_from, time.min, tzinfo=tz), datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+
+
+def _scoped(qs, prefix: str, branch_id: int | None, technician_key: int | None):
+    if branch_id:
+        qs = qs.filter(**{f"{prefix}branch_id": branch_id})
+    if technician_key is not None:
+        if technician_key:
+            qs = qs.filter(**{f"{prefix}assigned_to_id": technician_key})
+        else:
+            qs = qs.filter(**{f"{prefix}assigned_to__isnull": True})
+    return qs
+
+
+def compute(date_from: date, date_to: date, branch_id: int | None = None,
+            technician_key: int | None = None) -> dict[Bucket, dict]:
+    """원본 WorkOrder/Payment 에서 기간 내 bucket 별 집계를 계산한다 (GROUP BY 두 번)."""
+    start, end = _bounds(date_from, date_to)
+    orders = _scoped(WorkOrder.objects.filter(status__in=COMPLETED).filter(
+        Q(out_datetime__gte=start, out_datetime__lt=end)
+        | Q(out_datetime__isnull=True, in_datetime__gte=start, in_datetime__lt=end)
+    ), "", branch_id, technician_key)
+    payments = _scoped(Payment.objects.filter(paid_at__gte=start, paid_at__lt=end), "work_order__", branch_id, technician_key)
+    released = Q(out_datetime__isnull=False)
+
+    rows: dict[Bucket, dict] = {}
+    for r in (orders.order_by()
+              .annotate(bucket_day=TruncDate(Coalesce("out_datetime", "in_datetime")))
+              .values("bucket_day", "branch_id", "assigned_to_id")
+              .annotate(order_count=Count("pk"), parts_total=Sum("subtotal_parts"), labor_total=Sum("subtotal_labor"),
+                        discount_total=Sum("discount_amount"), tax_total=Sum("tax_amount"),
+                        revenue_total=Sum("total_amount"), turnaround_count=Count("pk", filter=released),
+                        turnaround=Sum(ExpressionWrapper(F("out_datetime") - F("in_datetime"), output_field=DurationField()),
+                                       filter=released))):
+        key = (r.pop("bucket_day"), r.pop("branch_id"), r.pop("assigned_to_id") or 0)
+        turnaround = r.pop("turnaround") or timedelta()
+        rows[key] = {**r, "turnaround_seconds": max(0, int(turnaround.total_seconds()))}
+    for r in (payments.order_by()
+              .annotate(bucket_day=TruncDate("paid_at"))
+              .values("bucket_day", "work_order__branch_id", "work_order__assigned_to_id")
+              .annotate(payment_count=Count("pk"), payment_total=Sum("amount"))):
+        key = (r["bucket_day"], r["work_order__branch_id"], r["work_order__assigned_to_id"] or 0)
+        rows.setdefault(key, {}).update(payment_count=r["payment_count"], payment_total=r["payment_total"])
+    return rows
+
+
+def rebuild(date_from: date, date_to: date, branch_id: int | None = None, technician_key: int | None = None) -> int:
+    """기간(과 지점/담당자) 범위의 집계 행을 새로 계산해 upsert 하고, 비게 된 bucket 행은 지운다."""
+    rows = compute(date_from, date_to, branch_id, technician_key)
+    scope = _scoped(DailyRollup.objects.filter(day__gte=date_from, day__lte=date_to), "", branch_id, None)
+    if technician_key is not None:
+        scope = scope.filter(technician_key=technician_key)
+    single = date_from == date_to and branch_id and technician_key is not None
+    with transaction.atomic():
+        DailyRollup.objects.bulk_create(
+            # 없는 값(결제만 있는 bucket 의 오더 합계 등)은 모델 기본값 0 으로 덮어쓴다
+            [DailyRollup(day=day, branch_id=b, technician_key=t, **values) for (day, b, t), values in rows.items()],
+            batch_size=1000, update_conflicts=True, unique_fields=["day", "branch", "technician_key"],
+            update_fields=[*SUM_FIELDS, "updated_at"],
+        )
+        if single:
+            if not rows:
+                scope.delete()
+        else:
+            stale = [pk for pk, *key in scope.values_list("pk", "day", "branch_id", "technician_key") if tuple(key) not in rows]
+            for i in range(0, len(stale), 1000):
+                DailyRollup.objects.filter(pk__in=stale[i:i + 1000]).delete()
+    return len(rows)
+
+
+def refresh(buckets: Iterable[Bucket]) -> None:
+    for day, branch_id, technician_key in sorted(set(buckets)):
+        rebuild(day, day, branch_id, technician_key)
+
+
+class _Pending(set):
+    """한 트랜잭션에서 표시된 bucket 모음 - on_commit 콜백 하나로 등록된다."""
+
+    def __call__(self):
+        refresh(self)
+
+
+def mark(buckets: Iterable[Bucket | None]) -> None:
+    """bucket 들을 현재 트랜잭션 커밋 후 다시 집계한다 (롤백되면 아무것도 하지 않음).
+
+    같은 트랜잭션에 이미 등록된 콜백이 있으면 거기에 더한다. 롤백되면 Django 가 콜백과 함께 버리므로
+    따로 지울 상태가 없다.
+    """
+    buckets = {b for b in buckets if b}
+    if not buckets:
+        return
+    connection = transaction.get_connection()
+    pending = next((func for _, func, _ in connection.run_on_commit if isinstance(func, _Pending)), None)
+    if pending is None:
+        transaction.on_commit(_Pending(buckets))
+    else:
+        pending |= buckets
+
+
+def payment_days(order_ids: Iterable[int]) -> dict[int, set[date]]:
+    """오더별 결제일 집합"""
+    days: dict[int, set[date]] = {}
+    for order_id, paid_at in Payment.objects.filter(work_order_id__in=list(order_ids)).values_list("work_order_id", "paid_at"):
+        days.setdefault(order_id, set()).add(timezone.localdate(paid_at))
+    return days
+
+
+def order_buckets(order_id: int, branch_id, assigned_to_id, status, in_datetime, out_datetime,
+                  days: dict[int, set[date]] | None = None) -> set[Bucket]:
+    """오더 자체의 bucket + 그 오더 결제들의 bucket"""
+    days = payment_days([order_id]) if days is None else days
+    out = {(d, branch_id, assigned_to_id or 0) for d in days.get(order_id, ())}
+    out.add(order_bucket(branch_id, assigned_to_id, status, in_datetime, out_datetime))
+    return out
+
+
+def mark_orders(order_ids: Iterable[int]) -> None:
+    """라인/결제를 신호 없이(bulk) 바꾼 오더들의 bucket 을 표시한다."""
+    order_ids = list(order_ids)
+    days = payment_days(order_ids)
+    buckets: set = set()
+    for row in WorkOrder.objects.filter(pk__in=order_ids).values_list(
+            "pk", "branch_id", "assigned_to_id", "status", "in_datetime", "out_datetime"):
+        buckets |= order_buckets(*row, days=days)
+    mark(buckets)
+
+
+def _derive(row: dict) -> dict:
+    row = {k: (int(v) if k in SUM_FIELDS else v) for k, v in row.items() if v is not None or k not in SUM_FIELDS}
+    for f in SUM_FIELDS:
+        row.setdefault(f, 0)
+    sales = row["parts_total"] + row["labor_total"]
+    row["avg_ticket"] = round(row["revenue_total"] / row["order_count"]) if row["order_count"] else 0
+    row["parts_ratio"] = round(row["parts_total"] * 100 / sales, 1) if sales else 0
+    row["labor_ratio"] = round(100 - row["parts_ratio"], 1) if sales else 0
+    row["avg_turnaround_hours"] = (round(row["turnaround_seconds"] / row["turnaround_count"] / 3600, 1)
+                                   if row["turnaround_count"] else None)
+    return row
+
+
+def summarize(date_from: date, date_to: date, branch_id: int | None = None, by: str = "day") -> dict:
+    """집계 표만 읽어 기간별/지점별/담당자별 합계와 객단가·부품/공임 비율·평균 처리시간을 만든다."""
+    qs = DailyRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    if branch_id:
+        qs = qs.filter(branch_id=branch_id)
+    sums = {f: Sum(f) for f in SUM_FIELDS}
+    period = TruncMonth("day") if by == "month" else F("day")
+    return {
+        "periods": [_derive(r) for r in qs.annotate(period=period).values("period").annotate(**sums).order_by("period")],
+        "branches": [_derive(r) for r in qs.values("branch_id", "branch__name").annotate(**sums).order_by("branch__name")],
+        "technicians": [_derive(r) for r in qs.values("technician_key").annotate(**sums).order_by("-revenue_total")],
+        "total": _derive(qs.aggregate(**sums)),
+    }
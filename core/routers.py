@@ -0,0 +1,65 @@
+"""읽기 복제본 / 지점별 읽기 DB 라우팅 (선택 - DATABASE_ROUTERS 에 넣을 때만 동작)
+
+- DATABASE_REPLICAS 의 별칭들로 읽기를 나눠 보내고, 쓰기와 마이그레이션은 default 로만 보낸다.
+- BRANCH_READ_DATABASES = {지점 id: 별칭} 이면 그 지점 컨텍스트(core.branching)의 읽기는 지정 별칭으로
+  보내 바쁜 센터의 조회가 다른 센터와 같은 복제본을 쓰지 않게 한다.
+- 트랜잭션 안이거나 이번 요청(또는 작업)에서 이미 쓰기를 했으면 읽기도 default 로 - 방금 쓴 값이
+  복제 지연 때문에 안 보이는 일을 막는다. 고정 상태는 BranchContextMiddleware 가 요청마다 초기화한다.
+
+쓰기를 지점별 DB 로 나누지는 않는다 (고객/차량은 지점 공용이고 접수번호 카운터도 한 곳이어야 한다).
+"""
+from __future__ import annotations
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_pinned: ContextVar[bool] = ContextVar("core_db_pinned", default=False)
+# 로그인 직후 세션을 복제본에서 못 읽어 로그아웃되는 일이 없도록 항상 default 에서 읽는 앱
+PRIMARY_APPS = {"sessions"}
+
+
+def reset_pin():
+    return _pinned.set(False)
+
+
+def restore_pin(token) -> None:
+    _pinned.reset(token)
+
+
+def _replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def _pool() -> set[str]:
+    return {DEFAULT_DB_ALIAS, *_replicas(), *getattr(settings, "BRANCH_READ_DATABASES", {}).values()}
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _pinned.get() or model._meta.app_label in PRIMARY_APPS or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        from .branching import current_branch_id
+
+        alias = getattr(settings, "BRANCH_READ_DATABASES", {}).get(current_branch_id())
+        if alias:
+            return alias
+        replicas = _replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = _pool()
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in _pool():
+            return db == DEFAULT_DB_ALIAS
+        return None
@@ -0,0 +1,138 @@
+"""작업오더 빠른검색 색인
+
+접수번호 · 전화번호(숫자만) · 번호판(한글 포함, 공백/하이픈 제거) · VIN · 모델 · 고객명을
+정규화해 WorkOrderSearch.document 한 줄로 저장하고, 부분일치 검색을 색인으로 처리한다.
+
+- PostgreSQL: pg_trgm GIN 인덱스 (document LIKE '%q%')
+- SQLite: FTS5 trigram 가상테이블 (3글자 이상), 그보다 짧으면 LIKE
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "core_workordersearch_fts"
+
+_SEPARATORS = re.compile(r"[\s\-_.()/]+")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize(text: str | None) -> str:
+    """NFC(한글 자모 결합) + 소문자 + 공백/구분기호 제거"""
+    return _SEPARATORS.sub("", unicodedata.normalize("NFC", text or "")).lower()
+
+
+def phone_digits(phone: str | None) -> str:
+    return _NON_DIGITS.sub("", phone or "")
+
+
+def build_document(order_no, plate_no, vin, model, phone, name) -> str:
+    parts = [normalize(order_no), phone_digits(phone), normalize(plate_no), normalize(vin), normalize(model), normalize(name)]
+    return " ".join(p for p in parts if p)
+
+
+def _document_rows(order_qs):
+    return order_qs.values_list(
+        "pk", "order_no", "vehicle__plate_no", "vehicle__vin", "vehicle__model",
+        "vehicle__customer__phone", "vehicle__customer__name",
+    )
+
+
+def reindex_orders(order_qs, batch_size: int = 2000) -> int:
+    """order_qs 에 해당하는 작업오더의 검색 문서를 upsert 한다."""
+    from .models import WorkOrderSearch
+
+    n = 0
+    batch = []
+    for pk, *fields in _document_rows(order_qs).order_by().iterator(chunk_size=batch_size):
+        batch.append(WorkOrderSearch(work_order_id=pk, document=build_document(*fields)))
+        if len(batch) >= batch_size:
+            n += _upsert(batch)
+            batch = []
+    if batch:
+        n += _upsert(batch)
+    return n
+
+
+def _upsert(batch) -> int:
+    from .models import WorkOrderSearch
+
+    WorkOrderSearch.objects.bulk_create(
+        batch, update_conflicts=True, unique_fields=["work_order"], update_fields=["document"],
+    )
+    return len(batch)
+
+
+_fts_available: dict[str, bool] = {}
+
+
+def _has_fts(alias: str) -> bool:
+    if alias not in _fts_available:
+        with connections[alias].cursor() as cur:
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available[alias] = cur.fetchone() is not None
+    return _fts_available[alias]
+
+
+def filter_orders(qs, q: str):
+    """검색어 q 로 작업오더 queryset 을 좁힌다 (색인 사용)."""
+    from .models import WorkOrderSearch
+
+    term = normalize(q)
+    if not term:
+        return qs
+    vendor = connections[qs.db].vendor
+    if vendor == "sqlite" and len(term) >= 3 and _has_fts(qs.db):
+        match = '"' + term.replace('"', '""') + '"'
+        return qs.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+    ids = WorkOrderSearch.objects.using(qs.db).filter(document__contains=term).values("work_order_id")
+    return qs.filter(pk__in=ids)
+
+
+# --- 마이그레이션에서 사용하는 백엔드별 색인 DDL ---
+
+PG_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_wosearch_doc_trgm ON core_workordersearch USING gin (document gin_trgm_ops)",
+]
+PG_BACKWARD = ["DROP INDEX IF EXISTS core_wosearch_doc_trgm"]
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"document, content='core_workordersearch', content_rowid='work_order_id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS core_wosearch_ai AFTER INSERT ON core_workordersearch BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.work_order_id, new.document); END",
+    f"CREATE TRIGGER IF NOT EXISTS core_wosearch_ad AFTER DELETE ON core_workordersearch BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.work_order_id, old.document); END",
+    f"CREATE TRIGGER IF NOT EXISTS core_wosearch_au AFTER UPDATE ON core_workordersearch BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.work_order_id, old.document); "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.work_order_id, new.document); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_wosearch_ai",
+    "DROP TRIGGER IF EXISTS core_wosearch_ad",
+    "DROP TRIGGER IF EXISTS core_wosearch_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_backend_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = PG_FORWARD if vendor == "postgresql" else SQLITE_FORWARD if vendor == "sqlite" else []
+    try:
+        for sql in statements:
+            schema_editor.execute(sql)
+    except Exception:
+        # FTS5/trigram 미지원 SQLite 빌드 → LIKE 검색으로 동작
+        if vendor != "sqlite":
+            raise
+
+
+def drop_backend_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in PG_BACKWARD if vendor == "postgresql" else SQLITE_BACKWARD if vendor == "sqlite" else []:
+        schema_editor.execute(sql)
@@ -0,0 +1,40 @@
+"""세션 엔진 - cached_db + 쓰기 합치기 (SESSION_ENGINE = "core.sessions")
+
+읽기는 SESSION_CACHE_ALIAS 캐시에서 먼저 해서 직원 요청마다 django_session 을 SELECT 하지 않는다.
+SESSION_SAVE_EVERY_REQUEST(로그인 유지 연장)를 켜도 내용이 바뀌지 않았고 마지막 저장이
+SESSION_REFRESH_INTERVAL 초 안쪽이면 다시 쓰지 않는다 - 만료가 그만큼 일찍 올 수 있을 뿐 나머지는 같다.
+캐시는 워커 간에 공유되는 별칭이어야 한다 (로그아웃이 다른 워커에도 바로 보이도록).
+"""
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+
+REFRESHED_KEY = "_refreshed"
+
+
+def _interval() -> int:
+    return int(getattr(settings, "SESSION_REFRESH_INTERVAL", 300))
+
+
+class SessionStore(cached_db.SessionStore):
+    def _is_fresh(self, session: dict, must_create: bool, now: int) -> bool:
+        if must_create or self.modified or not self.session_key:
+            return False
+        return now - session.get(REFRESHED_KEY, 0) < _interval()
+
+    def save(self, must_create=False):
+        now, session = int(time.time()), self._session
+        if self._is_fresh(session, must_create, now):
+            return
+        session[REFRESHED_KEY] = now
+        super().save(must_create)
+
+    async def asave(self, must_create=False):
+        now, session = int(time.time()), await self._aget_session()
+        if self._is_fresh(session, must_create, now):
+            return
+        session[REFRESHED_KEY] = now
+        await super().asave(must_create)
@@ -1,29 +1,258 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.contrib.auth import get_user_model
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import WorkLabor, WorkOrder, WorkPart
-from .utils import generate_order_no
+from django.utils import timezone
+from .models import Branch, Customer, Payment, StaffProfile, Vehicle, WorkLabor, WorkOrder, WorkPart
+from . import auth_backends, branching, fragments, history, rollups, suggest
+from .search import reindex_orders
+from .utils import generate_order_no, invalidate_invoice_pdf
+
+SEARCH_FIELDS = {"order_no", "vehicle"}
+_state = threading.local()
+
+@contextmanager
+def muted():
+    """행 단위 후처리(합계 반영/검색 색인/캐시 무효화)를 잠시 끈다.
+
+    대량 가져오기처럼 끝에서 집합 단위로 다시 계산하는 작업용. 접수번호 자동 발급은 그대로 동작한다.
+    """
+    prev = getattr(_state, "muted", False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = prev
+
+def unless_muted(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not getattr(_state, "muted", False):
+            return func(*args, **kwargs)
+    return wrapper
 
 @receiver(pre_save, sender=WorkOrder)
 def wo_pre_save(sender, instance: WorkOrder, **kwargs):
     if not instance.order_no:
-        instance.order_no = generate_order_no()
+        instance.order_no = generate_order_no(branch_id=instance.branch_id)
+
+def _line_deltas(instance, amount_field: str, deleted: bool = False) -> dict[int, int]:
+    """저장/삭제된 한 줄이 작업오더별 금액에 주는 변경분"""
+    amount = int(getattr(instance, amount_field) or 0)
+    old_order = instance.loaded_value("work_order_id")
+    old_amount = int(instance.loaded_value(amount_field) or 0)
+    if deleted:
+        deltas = {instance.work_order_id: -(old_amount if old_order else amount)}
+    elif old_order is None:
+        deltas = {instance.work_order_id: amount}
+    elif old_order != instance.work_order_id:
+        deltas = {old_order: -old_amount, instance.work_order_id: amount}
+    else:
+        deltas = {instance.work_order_id: amount - old_amount}
+    return {order_id: delta for order_id, delta in deltas.items() if delta}
+
+def _apply_line(instance, amount_field: str, kind: str, deleted: bool = False):
+    """부품/공임 한 줄의 변경분만 작업오더 합계에 반영한다."""
+    for order_id, delta in _line_deltas(instance, amount_field, deleted).items():
+        WorkOrder.objects.filter(pk=order_id).apply_totals_delta(**{kind: delta})
+    instance.remember_values()
+
+def _apply_payment(instance: Payment, deleted: bool = False):
+    """결제 한 건의 변경분만 결제액/미수금에 반영한다."""
+    for order_id, delta in _line_deltas(instance, "amount", deleted).items():
+        WorkOrder.objects.filter(pk=order_id).apply_payment_delta(delta)
+
+@receiver(post_save, sender=WorkPart)
+@receiver(post_delete, sender=WorkPart)
+@receiver(post_save, sender=WorkLabor)
+@receiver(post_delete, sender=WorkLabor)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@unless_muted
+def history_line_changed(sender, instance, raw=False, **kwargs):
+    # _apply_line 이 remember_values() 하기 전에 실행되어야 옮겨 가기 전 오더도 알 수 있다
+    if not raw:
+        history.bump_orders([instance.work_order_id, instance.loaded_value("work_order_id")])
 
-def _recalc(order: WorkOrder):
-    order.recompute_totals(tax_rate=0.1)
-    order.save(update_fields=["subtotal_parts","subtotal_labor","tax_amount","total_amount","updated_at"])
+@receiver(post_save, sender=WorkPart)
+@receiver(post_delete, sender=WorkPart)
+@receiver(post_save, sender=WorkLabor)
+@receiver(post_delete, sender=WorkLabor)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@unless_muted
+def fragment_line_changed(sender, instance, raw=False, **kwargs):
+    # 금액이 같은 수정(품목명 등)은 오더 updated_at 이 안 바뀌므로 라인 버전으로 상세 표를 무효화
+    if not raw:
+        fragments.bump_lines([instance.work_order_id, instance.loaded_value("work_order_id")])
 
 @receiver(post_save, sender=WorkPart)
-def part_saved(sender, instance: WorkPart, **kwargs):
-    _recalc(instance.work_order)
+@unless_muted
+def part_saved(sender, instance: WorkPart, raw=False, **kwargs):
+    if not raw:
+        _apply_line(instance, "line_total", "parts")
 
 @receiver(post_delete, sender=WorkPart)
+@unless_muted
 def part_deleted(sender, instance: WorkPart, **kwargs):
-    _recalc(instance.work_order)
+    _apply_line(instance, "line_total", "parts", deleted=True)
 
 @receiver(post_save, sender=WorkLabor)
-def labor_saved(sender, instance: WorkLabor, **kwargs):
-    _recalc(instance.work_order)
+@unless_muted
+def labor_saved(sender, instance: WorkLabor, raw=False, **kwargs):
+    if not raw:
+        _apply_line(instance, "price", "labor")
 
 @receiver(post_delete, sender=WorkLabor)
+@unless_muted
 def labor_deleted(sender, instance: WorkLabor, **kwargs):
-    _recalc(instance.work_order)
+    _apply_line(instance, "price", "labor", deleted=True)
+
+@receiver(post_save, sender=Payment)
+@unless_muted
+def payment_saved(sender, instance: Payment, raw=False, **kwargs):
+    if not raw:
+        _apply_payment(instance)
+
+@receiver(post_delete, sender=Payment)
+@unless_muted
+def payment_deleted(sender, instance: Payment, **kwargs):
+    _apply_payment(instance, deleted=True)
+
+@receiver(post_save, sender=WorkOrder)
+@unless_muted
+def wo_search_sync(sender, instance: WorkOrder, created, update_fields=None, **kwargs):
+    if not created and update_fields and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    reindex_orders(WorkOrder.objects.filter(pk=instance.pk))
+
+@receiver(post_save, sender=Vehicle)
+@unless_muted
+def vehicle_search_sync(sender, instance: Vehicle, created, **kwargs):
+    if not created:
+        reindex_orders(WorkOrder.objects.filter(vehicle=instance))
+
+@receiver(post_save, sender=Customer)
+@unless_muted
+def customer_search_sync(sender, instance: Customer, created, **kwargs):
+    if not created:
+        reindex_orders(WorkOrder.objects.filter(vehicle__customer=instance))
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=WorkOrder)
+@unless_muted
+def suggest_invalidate(sender, **kwargs):
+    suggest.invalidate()
+
+@receiver(post_save, sender=WorkPart)
+@receiver(post_delete, sender=WorkPart)
+@receiver(post_save, sender=WorkLabor)
+@receiver(post_delete, sender=WorkLabor)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@unless_muted
+def invoice_cache_line_changed(sender, instance, **kwargs):
+    invalidate_invoice_pdf(instance.work_order_id)
+
+@receiver(post_save, sender=WorkOrder)
+@receiver(post_delete, sender=WorkOrder)
+@unless_muted
+def invoice_cache_order_changed(sender, instance: WorkOrder, **kwargs):
+    invalidate_invoice_pdf(instance.pk)
+
+@receiver(post_save, sender=WorkOrder)
+@receiver(post_delete, sender=WorkOrder)
+@unless_muted
+def history_order_changed(sender, instance: WorkOrder, raw=False, **kwargs):
+    # rollup_order_saved 가 remember_values() 하기 전에 실행되어야 이전 차량을 알 수 있다
+    if not raw:
+        history.bump([instance.vehicle_id, instance.loaded_value("vehicle_id")])
+
+@receiver(post_save, sender=Vehicle)
+@unless_muted
+def history_vehicle_changed(sender, instance: Vehicle, created, raw=False, **kwargs):
+    if not created and not raw:
+        history.bump([instance.pk])
+
+@receiver(post_save, sender=Customer)
+@unless_muted
+def history_customer_changed(sender, instance: Customer, created, raw=False, **kwargs):
+    if not created and not raw:
+        history.bump(instance.vehicles.values_list("pk", flat=True))
+
+@receiver(post_save, sender=WorkOrder)
+@unless_muted
+def rollup_order_saved(sender, instance: WorkOrder, created, raw=False, **kwargs):
+    if raw:
+        return
+    buckets = rollups.order_buckets(instance.pk, instance.branch_id, instance.assigned_to_id, instance.status,
+                                    instance.in_datetime, instance.out_datetime)
+    if not created and instance.loaded_value("branch_id"):
+        old = [instance.loaded_value(f) for f in ("branch_id", "assigned_to_id", "status", "in_datetime", "out_datetime")]
+        buckets |= rollups.order_buckets(instance.pk, *old)
+    rollups.mark(buckets)
+    instance.remember_values()
+
+@receiver(post_delete, sender=WorkOrder)
+@unless_muted
+def rollup_order_deleted(sender, instance: WorkOrder, **kwargs):
+    rollups.mark([rollups.order_bucket(instance.branch_id, instance.assigned_to_id, instance.status,
+                                       instance.in_datetime, instance.out_datetime)])
+
+@receiver(post_save, sender=WorkPart)
+@receiver(post_delete, sender=WorkPart)
+@receiver(post_save, sender=WorkLabor)
+@receiver(post_delete, sender=WorkLabor)
+@unless_muted
+def rollup_line_changed(sender, instance, raw=False, **kwargs):
+    # 합계는 _apply_line 의 UPDATE 로 바뀌므로 WorkOrder 신호가 나지 않는다
+    if raw:
+        return
+    row = (WorkOrder.objects.filter(pk=instance.work_order_id)
+           .values_list("branch_id", "assigned_to_id", "status", "in_datetime", "out_datetime").first())
+    if row:
+        rollups.mark([rollups.order_bucket(*row)])
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@unless_muted
+def rollup_payment_changed(sender, instance: Payment, raw=False, **kwargs):
+    if raw:
+        return
+    pairs = {(instance.work_order_id, instance.paid_at)}
+    if instance.loaded_value("work_order_id"):
+        pairs.add((instance.loaded_value("work_order_id"), instance.loaded_value("paid_at")))
+    owners = dict((pk, (b, t)) for pk, b, t in WorkOrder.objects.filter(pk__in=[p[0] for p in pairs])
+                  .values_list("pk", "branch_id", "assigned_to_id"))
+    rollups.mark((timezone.localdate(paid_at), owners[o][0], owners[o][1] or 0)
+                 for o, paid_at in pairs if o in owners and paid_at)
+    instance.remember_values()
+
+@receiver(post_save, sender=StaffProfile)
+@receiver(post_delete, sender=StaffProfile)
+def staff_profile_changed(sender, instance: StaffProfile, **kwargs):
+    branching.forget(instance.user_id)
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+def branch_changed(sender, **kwargs):
+    branching.forget_branches()
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=get_user_model())
+@unless_muted
+def fragment_owner_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # 대시보드 행에 나오는 고객/차량/담당자 이름 - 새로 만든 것과 로그인 시각 갱신은 기존 행과 무관
+    if created or raw or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    fragments.bump()
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def cached_user_changed(sender, instance, **kwargs):
+    auth_backends.forget(instance.pk)
@@ -0,0 +1,183 @@
+"""정적 파일 - 해시 파일명 + 미리 압축 + 메모리 서빙
+
+CompressedManifestStaticFilesStorage
+    collectstatic 때 파일명에 내용 해시를 붙이고(app.4f1c2a.css, staticfiles.json),
+    CSS/JS 같은 텍스트 파일은 .gz (brotli 가 설치돼 있으면 .br 도) 를 미리 만들어 둔다.
+StaticFilesMiddleware
+    STATIC_ROOT 를 워커 시작 때 한 번 읽어 메모리에 올리고 STATIC_URL 요청을 세션/인증/DB 보다 먼저
+    바로 응답한다. 해시 파일명은 내용이 바뀌면 이름도 바뀌므로 1년 immutable 캐시를 준다.
+    STATIC_URL 이 다른 호스트(Render Static Site, CDN)면 쓰지 않는다 - 그때는 앱 서버가 정적 파일을 보지 않는다.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import mimetypes
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import quote_etag
+
+try:
+    import brotli
+except ImportError:  # brotli 는 선택 - 없으면 gzip 만
+    brotli = None
+
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=60"
+
+
+def _compress(data: bytes) -> dict[str, bytes]:
+    out = {".gz": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        out[".br"] = brotli.compress(data, quality=11)
+    # 5% 도 안 줄면 압축본을 두지 않는다 (풀기 비용만 든다)
+    return {ext: blob for ext, blob in out.items() if len(blob) < len(data) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = {*paths, *self.hashed_files.values()}
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE or not self.exists(name):
+                continue
+            with self.open(name) as f:
+                data = f.read()
+            for ext, blob in _compress(data).items():
+                if self.exists(name + ext):
+                    self.delete(name + ext)
+                self._save(name + ext, ContentFile(blob))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic 전(개발/벤치)에는 원래 이름으로. 매니페스트가 있는데 없는 파일이면 그대로 오류.
+            if self.hashed_files:
+                raise
+            return name
+
+
+class _Asset:
+    __slots__ = ("content_type", "cache_control", "variants")
+
+    def __init__(self, content_type: str, cache_control: str, variants: list):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = variants  # [(인코딩 | None, bytes | 경로, 크기, etag)] - br, gzip, 원본 순
+
+    def pick(self, accept_encoding: str):
+        accepted = set()
+        for token in accept_encoding.split(","):
+            coding, _, params = token.partition(";")
+            try:
+                if float(params.strip().removeprefix("q=") or 1) <= 0:
+                    continue
+            except ValueError:
+                pass
+            accepted.add(coding.strip())
+        for variant in self.variants:
+            if variant[0] is None or variant[0] in accepted:
+                return variant
+        return self.variants[-1]
+
+    def response(self, request) -> HttpResponse:
+        encoding, body, size, etag = self.pick(request.headers.get("Accept-Encoding", ""))
+        if etag in request.headers.get("If-None-Match", ""):
+            resp = HttpResponseNotModified()
+        elif request.method == "HEAD":
+            resp = HttpResponse(content_type=self.content_type)
+            resp["Content-Length"] = size
+        elif isinstance(body, bytes):
+            resp = HttpResponse(body, content_type=self.content_type)
+        else:  # 큰 파일 - wsgi.file_wrapper(sendfile) 로
+            resp = FileResponse(open(body, "rb"), content_type=self.content_type)
+        resp["ETag"] = etag
+        resp["Cache-Control"] = self.cache_control
+        resp["X-Content-Type-Options"] = "nosniff"
+        if len(self.variants) > 1:
+            resp["Vary"] = "Accept-Encoding"
+        if encoding and resp.status_code == 200:
+            resp["Content-Encoding"] = encoding
+        return resp
+
+
+def _content_type(path: str) -> str:
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json", "image/svg+xml"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def index(root: str, max_bytes: int) -> dict[str, _Asset]:
+    """STATIC_ROOT 의 파일을 {상대경로: _Asset} 으로. max_bytes 이하 파일은 내용을 메모리에 둔다."""
+    immutable = set()
+    try:
+        with open(os.path.join(root, ManifestStaticFilesStorage.manifest_name), encoding="utf-8") as f:
+            immutable = set(json.load(f).get("paths", {}).values())
+    except (OSError, ValueError):
+        pass
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            if name.endswith((".gz", ".br")) and os.path.exists(path[:-3]):
+                continue
+            variants = []
+            for encoding, ext in (*ENCODINGS, (None, "")):
+                if not os.path.exists(path + ext):
+                    continue
+                stat = os.stat(path + ext)
+                body = path + ext
+                if stat.st_size <= max_bytes:
+                    with open(body, "rb") as f:
+                        body = f.read()
+                etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}{ext}")
+                variants.append((encoding, body, stat.st_size, etag))
+            files[name] = _Asset(_content_type(name), IMMUTABLE if name in immutable else REVALIDATE, variants)
+    return files
+
+
+class StaticFilesMiddleware:
+    """MIDDLEWARE 맨 앞에 둔다. STATIC_ROOT 가 없거나(collectstatic 전) STATIC_URL 이 외부 주소면 빠진다."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        prefix = settings.STATIC_URL or ""
+        root = str(settings.STATIC_ROOT or "")
+        if "://" in prefix or prefix.startswith("//") or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.prefix = "/" + prefix.strip("/") + "/"
+        self.files = index(root, int(getattr(settings, "STATIC_MEMORY_MAX_BYTES", 512 * 1024)))
+
+    def _asset(self, request) -> _Asset | None:
+        path = request.path_info
+        if path.startswith(self.prefix) and request.method in ("GET", "HEAD"):
+            return self.files.get(path[len(self.prefix):])
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        asset = self._asset(request)
+        return asset.response(request) if asset is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        asset = self._asset(request)
+        return asset.response(request) if asset is not None else await self.get_response(request)
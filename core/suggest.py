@@ -0,0 +1,86 @@
+"""대시보드 검색창 자동완성(typeahead)
+
+모델 인스턴스를 만들지 않고 values() 로 필요한 필드만 가져오며,
+정규화된 검색어(입력 중인 접두어)별 결과를 프로세스 내 LRU/TTL 캐시에 보관한다.
+접수 결과는 지점 컨텍스트로 걸러지므로 지점 id 도 캐시 키에 들어간다 (차량/고객은 지점 공용).
+Customer/Vehicle/WorkOrder 저장 시 core.signals 에서 invalidate() 가 호출된다.
+(다른 gunicorn 워커의 캐시는 TTL 로 만료)
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.db.models import Q
+
+from . import search
+from .models import Customer, Vehicle, WorkOrder
+from .utils import TTLCache
+
+_cache = TTLCache(
+    maxsize=getattr(settings, "SEARCH_SUGGEST_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "SEARCH_SUGGEST_TTL", 30),
+)
+
+
+def invalidate() -> None:
+    _cache.clear()
+
+
+def suggest(q: str, limit: int = 8, branch_id: int | None = None) -> dict:
+    term = search.normalize(q)
+    if not term:
+        return {"orders": [], "vehicles": [], "customers": []}
+    key = (term, limit, branch_id)
+    hit = _cache.get(key)
+    if hit is not None:
+        return hit
+    result = {
+        "orders": _orders(q, limit, branch_id),
+        "vehicles": _vehicles(q.strip(), limit),
+        "customers": _customers(q.strip(), limit),
+    }
+    _cache.set(key, result)
+    return result
+
+
+def _orders(q: str, limit: int, branch_id: int | None = None) -> list[dict]:
+    qs = search.filter_orders(WorkOrder.objects.scoped(branch_id), q).order_by("-in_datetime", "-id")
+    rows = qs.values(
+        "id", "order_no", "status", "in_datetime",
+        "vehicle__model", "vehicle__plate_no", "vehicle__customer__name",
+    )[:limit]
+    labels = dict(WorkOrder.Status.choices)
+    return [
+        {
+            "id": r["id"],
+            "order_no": r["order_no"],
+            "status": labels.get(r["status"], r["status"]),
+            "in_date": r["in_datetime"].date().isoformat() if r["in_datetime"] else "",
+            "model": r["vehicle__model"],
+            "plate_no": r["vehicle__plate_no"],
+            "customer": r["vehicle__customer__name"],
+        }
+        for r in rows
+    ]
+
+
+def _vehicles(q: str, limit: int) -> list[dict]:
+    cond = Q(plate_no__contains=q) | Q(vin__istartswith=q) | Q(model__istartswith=q)
+    rows = Vehicle.objects.filter(cond).order_by("-id").values(
+        "id", "model", "plate_no", "vin", "customer__name", "customer__phone",
+    )[:limit]
+    return [
+        {
+            "id": r["id"], "model": r["model"], "plate_no": r["plate_no"], "vin": r["vin"],
+            "customer": r["customer__name"], "phone": r["customer__phone"],
+        }
+        for r in rows
+    ]
+
+
+def _customers(q: str, limit: int) -> list[dict]:
+    cond = Q(name__startswith=q)
+    digits = search.phone_digits(q)
+    if len(digits) >= 3:
+        cond |= Q(phone__contains=q.strip())
+    rows = Customer.objects.filter(cond).order_by("-id").values("id", "name", "phone")[:limit]
+    return list(rows)
@@ -0,0 +1,272 @@
+"""벤치마크/로컬 재현용 합성 데이터 (수백만 행 규모)
+
+- 같은 seed 면 같은 데이터: 묶음(chunk)마다 f"{seed}:{종류}:{번호}" 로 난수기를 따로 만들어
+  프로세스 수·실행 순서와 무관하게 결과가 같다.
+- 오더는 기간 전체에 시간순으로 고르게 펼치고 묶음 하나가 연속 구간을 맡는다. 입고일시와 지점은 별도
+  난수기("order-keys")로 정해 시작 전에 묶음별 (입고일, 카운터) 건수를 미리 셀 수 있다. 접수번호는 그 건수로
+  (입고일, 카운터)마다 allocate_order_seq(count=n) 한 번에 예약하고 묶음 순서대로 나눠 주므로,
+  며칠이 두 묶음에 걸쳐도 어느 프로세스가 먼저 기록하든 번호가 같다.
+- 합계(소계/부가세/총액/결제액/미수금)는 파이썬에서 미리 계산해 넣고, 행 단위 신호는 끈다(signals.muted).
+- workers > 1 이면 fork 한 프로세스들이 묶음을 나눠 기록한다 (PostgreSQL 용. SQLite 는 쓰기 잠금 때문에 1개).
+"""
+from __future__ import annotations
+
+import multiprocessing
+import random
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from . import rollups, search, signals, suggest
+from .models import Branch, Customer, OrderSequence, Payment, Vehicle, WorkLabor, WorkOrder, WorkPart, compute_tax
+from .utils import _TRAILING_NUMBER, _scope, allocate_order_seq, format_order_no
+
+CHUNK_SIZE = 5000
+
+SURNAMES = "김" * 21 + "이" * 14 + "박" * 8 + "최" * 5 + "정" * 4 + "강조윤장임" * 2 + "한오서신권황안송류홍전고문양손배백허남심노"
+GIVEN = ["민준", "서연", "도윤", "지우", "하준", "서윤", "은우", "하은", "시우", "지민", "현우", "수아", "지호", "예린", "준서",
+         "유진", "성민", "영호", "정훈", "미경", "상철", "은정", "동현", "혜진", "재원", "수빈", "태희", "경수", "진영", "승우"]
+EMAIL_DOMAINS = ["naver.com", "gmail.com", "daum.net", "kakao.com"]
+BRANCH_NAMES = ["강남점", "송파점", "마포점", "분당점", "일산점", "수원점", "인천점", "부산점", "대구점", "대전점", "광주점", "울산점"]
+PLATE_HANGUL = "가나다라마거너더러머버서어저고노도로모보소오조구누두루무부수우주배"
+PLATE_REGIONS = ["서울", "경기", "인천", "부산", "대구", ""]
+# (제조사, 모델, 배기량, 가중치)
+MODELS = [
+    ("Honda", "PCX 125", 125, 30), ("Honda", "PCX 160", 157, 8), ("Yamaha", "NMAX 125", 125, 15),
+    ("Yamaha", "XMAX 300", 292, 6), ("Honda", "Forza 350", 330, 5), ("Honda", "Super Cub 110", 109, 10),
+    ("SYM", "Jet14", 125, 5), ("SYM", "VSX 125", 125, 3), ("Daelim", "Q2", 125, 4), ("Daelim", "Bonus 110", 110, 3),
+    ("Vespa", "Primavera 125", 125, 3), ("Suzuki", "Burgman 125", 125, 3), ("Kawasaki", "Z250", 249, 2),
+    ("BMW", "C400 GT", 350, 1), ("Niu", "NQi GTS", 0, 2),
+]
+COLORS = ["흰색", "검정", "회색", "빨강", "파랑", "은색", "매트블랙"]
+PARTS = [("엔진오일", 12000), ("오일필터", 8000), ("브레이크 패드(앞)", 25000), ("브레이크 패드(뒤)", 22000), ("구동벨트", 45000),
+         ("웨이트롤러", 18000), ("타이어(앞)", 70000), ("타이어(뒤)", 80000), ("점화플러그", 9000), ("배터리", 55000),
+         ("에어필터", 15000), ("미션오일", 7000), ("브레이크 오일", 10000), ("전구", 3000), ("체인 세트", 95000)]
+LABOR = [("오일 교환", 10000), ("브레이크 정비", 20000), ("타이어 교체", 15000), ("구동계 점검", 30000),
+         ("전장 점검", 25000), ("정기 점검", 20000), ("세차", 5000)]
+COMPLAINTS = ["엔진오일 교환", "브레이크 소리", "시동 불량", "타이어 마모", "정기 점검", "떨림 심함", "전조등 안 켜짐", ""]
+STATUS_WEIGHTS = [(WorkOrder.Status.RELEASED, 78), (WorkOrder.Status.DONE, 10), (WorkOrder.Status.IN_PROGRESS, 4),
+                  (WorkOrder.Status.RECEIVED, 3), (WorkOrder.Status.WAITING_PARTS, 2), (WorkOrder.Status.CANCELED, 3)]
+METHOD_WEIGHTS = [(Payment.Method.CARD, 70), (Payment.Method.CASH, 10), (Payment.Method.TRANSFER, 18), (Payment.Method.OTHER, 2)]
+
+
+def korean_name(rng: random.Random) -> str:
+    return rng.choice(SURNAMES) + rng.choice(GIVEN)
+
+
+def phone_number(i: int) -> str:
+    """i 마다 다른 010 번호 (8천만 개까지)"""
+    return f"010-{2000 + i // 10000:04d}-{i % 10000:04d}"
+
+
+def plate_number(rng: random.Random) -> str:
+    return f"{rng.choice(PLATE_REGIONS)}{rng.randint(10, 99)}{rng.choice(PLATE_HANGUL)}{rng.randint(1000, 9999)}"
+
+
+def vin(rng: random.Random) -> str:
+    return "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(17))
+
+
+def _rng(seed: int, kind: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+def _chunks(total: int, size: int) -> list[tuple[int, int, int]]:
+    return [(i, start, min(size, total - start)) for i, start in enumerate(range(0, total, size))]
+
+
+# ── 묶음 작업 (fork 된 자식 프로세스에서도 실행) ──────────────────
+_ctx: dict = {}
+
+
+def _people_chunk(args) -> list[int]:
+    """고객 [start, start+n) 과 그 고객들의 차량을 만들고 차량 pk 목록을 돌려준다."""
+    chunk, start, n = args
+    ctx = _ctx
+    rng = _rng(ctx["seed"], "people", chunk)
+    base = ctx["phone_base"] + start
+    customers = [Customer(name=korean_name(rng), phone=phone_number(base + i),
+                          email=f"user{base + i}@{rng.choice(EMAIL_DOMAINS)}" if rng.random() < 0.3 else "")
+                 for i in range(n)]
+    per_customer = ctx["vehicles"] / max(ctx["customers"], 1)
+    weights = [m[3] for m in MODELS]
+    vehicles = []
+    for i in range(int(start * per_customer), int((start + n) * per_customer)):
+        make, model, cc, _ = rng.choices(MODELS, weights)[0]
+        vehicles.append(Vehicle(
+            customer=customers[min(int(i / per_customer) - start, n - 1)], plate_no=plate_number(rng),
+            vin=vin(rng) if rng.random() < 0.4 else "", make=make, model=model, displacement_cc=cc or None,
+            year=rng.randint(2012, 2025), color=rng.choice(COLORS),
+            drive_type=Vehicle.DriveType.CHAIN if cc > 200 else Vehicle.DriveType.BELT,
+        ))
+    with signals.muted(), transaction.atomic():
+        Customer.objects.bulk_create(customers, batch_size=1000)
+        Vehicle.objects.bulk_create(vehicles, batch_size=1000)
+    return [v.pk for v in vehicles]
+
+
+def _order_keys(chunk: int, start: int, n: int):
+    """오더 [start, start+n) 의 (입고일시, 지점) - 접수번호 계획과 기록이 같은 값을 쓰도록 전용 난수기로"""
+    ctx = _ctx
+    rng = _rng(ctx["seed"], "order-keys", chunk)
+    step = ctx["span_seconds"] / max(ctx["orders"], 1)
+    for i in range(start, start + n):
+        yield ctx["start"] + timedelta(seconds=(i + rng.random()) * step), rng.choice(ctx["branch_ids"])
+
+
+def _plan_numbers(jobs) -> list[tuple]:
+    """묶음마다 (입고일, 카운터) 별 첫 일련번호를 정해 작업 인자에 붙인다."""
+    counts = [Counter((timezone.localdate(dt), _scope(b)) for dt, b in _order_keys(*job)) for job in jobs]
+    totals: Counter = Counter()
+    for c in counts:
+        totals.update(c)
+    first = {}
+    for (day, branch_key), total in sorted(totals.items()):
+        first[(day, branch_key)] = allocate_order_seq(day, branch_key, count=total) - total + 1
+    planned = []
+    for job, c in zip(jobs, counts):
+        planned.append((*job, {key: first[key] for key in c}))
+        for key, n in c.items():
+            first[key] += n
+    return planned
+
+
+def _order_chunk(args) -> dict:
+    """오더 [start, start+n) - 기간을 시간순으로 나눈 연속 구간 - 과 라인/결제를 기록한다."""
+    chunk, start, n, seq_starts = args
+    ctx = _ctx
+    rng = _rng(ctx["seed"], "orders", chunk)
+    statuses, status_w = zip(*STATUS_WEIGHTS)
+    methods, method_w = zip(*METHOD_WEIGHTS)
+    vehicle_ids, staff_ids = ctx["vehicle_ids"], ctx["staff_ids"]
+    recent = ctx["now"] - timedelta(days=3)
+    next_seq = dict(seq_starts)
+    orders, parts, labor, payments = [], [], [], []
+    for in_dt, branch_id in _order_keys(chunk, start, n):
+        status = rng.choices(statuses, status_w)[0]
+        if in_dt > recent and status in rollups.COMPLETED and rng.random() < 0.5:
+            status = WorkOrder.Status.IN_PROGRESS  # 최근 입고분은 진행중 비율을 높인다
+        out_dt = in_dt + timedelta(hours=rng.uniform(0.5, 72)) if status == WorkOrder.Status.RELEASED else None
+        day, branch_key = timezone.localdate(in_dt), _scope(branch_id)
+        order = WorkOrder(
+            order_no=format_order_no(day, next_seq[(day, branch_key)], branch_id),
+            branch_id=branch_id, vehicle_id=rng.choice(vehicle_ids), status=status,
+            assigned_to_id=rng.choice(staff_ids) if staff_ids and rng.random() < 0.9 else None,
+            in_datetime=in_dt, out_datetime=out_dt, odometer_in=rng.randint(100, 80000),
+            customer_complaint=rng.choice(COMPLAINTS),
+        )
+        parts_total = labor_total = 0
+        if status != WorkOrder.Status.CANCELED:
+            for _ in range(rng.randint(1, max(1, ctx["lines"]))):
+                if rng.random() < 0.6:
+                    name, price = rng.choice(PARTS)
+                    qty = rng.choice((1, 1, 1, 2))
+                    parts.append(WorkPart(work_order=order, part_name=name, qty=Decimal(qty), unit_price=price,
+                                          line_total=qty * price))
+                    parts_total += qty * price
+                else:
+                    name, price = rng.choice(LABOR)
+                    labor.append(WorkLabor(work_order=order, labor_name=name, minutes=rng.choice((10, 20, 30, 60, 90)),
+                                           price=price))
+                    labor_total += price
+        discount = rng.choice((1000, 5000, 10000)) if rng.random() < 0.05 else 0
+        taxable = max(0, parts_total + labor_total - discount)
+        total = taxable + compute_tax(taxable)
+        paid = 0
+        if out_dt and total:
+            paid = total if rng.random() < 0.97 else total // 2  # 일부는 외상 출고
+        elif status == WorkOrder.Status.DONE and total and rng.random() < 0.3:
+            paid = total // 2  # 선결제
+        if paid:
+            payments.append(Payment(work_order=order, method=rng.choices(methods, method_w)[0], amount=paid,
+                                    paid_at=out_dt or in_dt + timedelta(minutes=rng.randint(5, 120))))
+        order.subtotal_parts, order.subtotal_labor, order.discount_amount = parts_total, labor_total, discount
+        order.tax_amount, order.total_amount = total - taxable, total
+        order.paid_amount, order.balance_due = paid, total - paid
+        next_seq[(day, branch_key)] += 1
+        orders.append(order)
+
+    with signals.muted(), transaction.atomic():
+        WorkOrder.objects.bulk_create(orders, batch_size=1000)
+        WorkPart.objects.bulk_create(parts, batch_size=1000)
+        WorkLabor.objects.bulk_create(labor, batch_size=1000)
+        Payment.objects.bulk_create(payments, batch_size=1000)
+        search.reindex_orders(WorkOrder.objects.filter(pk__in=[o.pk for o in orders]))
+    return {"orders": len(orders), "lines": len(parts) + len(labor), "payments": len(payments)}
+
+
+def _prepare_counters(first: date, last: date, branch_ids) -> None:
+    """기간 내 카운터 행을 미리 만든다 - 날짜마다 allocate_order_seq 가 _existing_max 로 접수번호를 훑지 않도록."""
+    existing: dict[str, int] = defaultdict(int)
+    for order_no in (WorkOrder.objects.filter(order_no__gte=f"{first:%Y%m%d}", order_no__lt=f"{last + timedelta(days=1):%Y%m%d}")
+                     .values_list("order_no", flat=True).iterator()):
+        m = _TRAILING_NUMBER.search(order_no)
+        if m:
+            existing[order_no[:8]] = max(existing[order_no[:8]], int(m.group(1)))
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    OrderSequence.objects.bulk_create(
+        [OrderSequence(day=d, branch_key=key, last_value=existing[f"{d:%Y%m%d}"])
+         for d in days for key in {_scope(b) for b in branch_ids}],
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+
+def _map(fn, jobs, workers: int, progress=None, label: str = "") -> list:
+    """jobs 를 순서대로(workers=1) 또는 fork 프로세스 풀로 실행하고 결과를 jobs 순서대로 돌려준다."""
+    results = []
+    if workers <= 1:
+        for job in jobs:
+            results.append(fn(job))
+            if progress:
+                progress(label, len(results), len(jobs))
+        return results
+    connections.close_all()  # 자식이 부모의 DB 연결을 물려받아 같이 쓰지 않도록
+    with multiprocessing.get_context("fork").Pool(workers, initializer=connections.close_all) as pool:
+        for result in pool.imap(fn, jobs):
+            results.append(result)
+            if progress:
+                progress(label, len(results), len(jobs))
+    return results
+
+
+def generate(*, branches: int = 3, customers: int = 10_000, vehicles: int = 13_000, orders: int = 50_000, lines: int = 4,
+             days: int = 730, seed: int = 42, chunk_size: int = CHUNK_SIZE, workers: int = 1, progress=None) -> dict:
+    """합성 지점/고객/차량/작업오더(+부품/공임/결제)를 넣고 생성 건수를 돌려준다.
+
+    lines = 오더당 최대 부품+공임 줄 수, progress(label, done, total) 는 묶음마다 호출된다.
+    """
+    if connection.vendor == "sqlite" or "fork" not in multiprocessing.get_all_start_methods():
+        workers = 1
+    now = timezone.now()
+    existing = Branch.objects.count()
+    names = [BRANCH_NAMES[i % len(BRANCH_NAMES)] + (f" {i // len(BRANCH_NAMES) + 1}" if i >= len(BRANCH_NAMES) else "")
+             for i in range(existing, existing + branches)]
+    branch_ids = [Branch.objects.create(name=name).pk for name in names]
+    _ctx.clear()
+    _ctx.update(
+        seed=seed, customers=customers, vehicles=vehicles, orders=orders, lines=lines, now=now,
+        start=now - timedelta(days=days), span_seconds=days * 86400, phone_base=Customer.objects.count(),
+        branch_ids=branch_ids or list(Branch.objects.values_list("pk", flat=True)),
+        staff_ids=list(get_user_model().objects.filter(is_staff=True, is_active=True).values_list("pk", flat=True)),
+    )
+    try:
+        vehicle_ids = [pk for ids in _map(_people_chunk, _chunks(customers, chunk_size), workers, progress, "customers")
+                       for pk in ids]
+        stats = {"branches": len(branch_ids), "customers": customers, "vehicles": len(vehicle_ids),
+                 "orders": 0, "lines": 0, "payments": 0}
+        if orders and vehicle_ids and _ctx["branch_ids"]:
+            _ctx["vehicle_ids"] = vehicle_ids
+            _prepare_counters(timezone.localdate(_ctx["start"]), timezone.localdate(now + timedelta(days=1)), _ctx["branch_ids"])
+            jobs = _plan_numbers(_chunks(orders, chunk_size))
+            for result in _map(_order_chunk, jobs, workers, progress, "orders"):
+                for key, value in result.items():
+                    stats[key] += value
+            rollups.rebuild(timezone.localdate(_ctx["start"]), timezone.localdate(now + timedelta(days=4)))
+    finally:
+        _ctx.clear()
+    suggest.invalidate()
+    return stats
@@ -0,0 +1,123 @@
+"""core/tests 공용 도우미 - 동시 접수번호 발급, 화면별 쿼리 수 측정"""
+from __future__ import annotations
+
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import utils
+from core.models import Branch, Customer, Payment, Vehicle, WorkLabor, WorkOrder, WorkPart
+
+LOCK_RETRY_SECONDS = 30
+
+
+def stress_order_numbers(threads: int, per_thread: int, branch_ids: list[int], vehicle_id: int) -> dict:
+    """여러 스레드가 동시에 작업오더를 만들어(pre_save 의 generate_order_no) 실제 접수번호를 모은다.
+
+    order_no 의 UNIQUE 제약에 걸린 생성은 conflicts 로 센다 - 번호가 겹쳤다는 뜻이다.
+    """
+    utils._blocks.clear()
+
+    def worker(i):
+        numbers, waits, conflicts = [], [], []
+        try:
+            for j in range(per_thread):
+                branch_id = branch_ids[(i + j) % len(branch_ids)]
+                order = WorkOrder(branch_id=branch_id, vehicle_id=vehicle_id)
+                t0 = time.perf_counter()
+                attempt = 0
+                while True:
+                    try:
+                        order.save()
+                    except OperationalError as e:  # SQLite "database is locked" (메모리 DB 는 busy timeout 없이 바로)
+                        # 번호를 받은 뒤 실패했으면 같은 번호로 다시 저장한다. 행은 들어갔고 후처리만 실패했으면 끝.
+                        if order.pk is None:
+                            attempt += 1
+                            if time.perf_counter() - t0 > LOCK_RETRY_SECONDS:
+                                conflicts.append(f"gave up after {attempt} attempts: {e}")
+                                break
+                            time.sleep(min(0.005 * attempt, 0.1))
+                            continue
+                    except Exception as e:  # IntegrityError - 이미 나간 번호
+                        conflicts.append(f"{type(e).__name__}: {e}")
+                        break
+                    numbers.append((branch_id, order.order_no))
+                    break
+                waits.append(time.perf_counter() - t0)
+        finally:
+            connections.close_all()
+        return numbers, waits, conflicts
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - started
+    numbers = [n for ns, _, _ in results for n in ns]
+    return {
+        "numbers": numbers,
+        "duplicates": [n for n, c in Counter(no for _, no in numbers).items() if c > 1],
+        "conflicts": [c for _, _, cs in results for c in cs],
+        "waits": sorted(w for _, ws, _ in results for w in ws),
+        "elapsed": elapsed,
+    }
+
+
+def sequence_gaps(numbers: list[tuple[int, str]], per_branch: bool) -> list[int]:
+    """(지점, 접수번호) 목록에서 1..n 으로 이어지지 않는 카운터(지점 키)를 돌려준다 (블록 크기 1 일 때)."""
+    scopes: dict[int, list[int]] = {}
+    for branch_id, order_no in numbers:
+        m = utils._TRAILING_NUMBER.search(order_no)
+        scopes.setdefault(branch_id if per_branch else 0, []).append(int(m.group(1)) if m else -1)
+    return [key for key, seqs in scopes.items() if sorted(seqs) != list(range(1, len(seqs) + 1))]
+
+
+def order_with_lines(branch, vehicle, lines: int):
+    order = WorkOrder.objects.create(branch=branch, vehicle=vehicle)
+    WorkPart.objects.bulk_create([WorkPart(work_order=order, part_name=f"부품 {i}", qty=1, unit_price=1000, line_total=1000) for i in range(lines)])
+    WorkLabor.objects.bulk_create([WorkLabor(work_order=order, labor_name=f"공임 {i}", price=Decimal(2000)) for i in range(lines)])
+    Payment.objects.bulk_create([Payment(work_order=order, method=Payment.Method.CARD, amount=Decimal(500)) for i in range(lines)])
+    return order
+
+
+def detail_queries(user, sizes=(1, 50)) -> dict[int, list[str]]:
+    """라인 수별 작업오더 상세 화면 한 번의 SQL 목록 (N+1 이면 라인 수에 따라 늘어난다)"""
+    client = Client()
+    client.force_login(user)
+    branch = Branch.objects.create(name="쿼리 점검")
+    vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="점검", phone="000"), model="PCX")
+    client.get(reverse("dashboard"))  # 직원 소속/지점 목록 캐시(core.branching)를 채워 둔다
+    out = {}
+    for n in sizes:
+        order = order_with_lines(branch, vehicle, n)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse("workorder_detail", args=[order.pk]))
+        if resp.status_code != 200:
+            raise AssertionError(f"workorder_detail returned {resp.status_code}")
+        out[n] = [q["sql"] for q in ctx.captured_queries]
+    return out
+
+
+def auth_queries(user, requests: int = 20) -> dict[str, float]:
+    """로그인한 직원 요청 하나당 세션/사용자 조회 수 (첫 요청으로 캐시를 채운 뒤 측정)"""
+    client = Client()
+    client.force_login(user)
+    url = reverse("search_suggest")
+    client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(requests):
+            if client.get(url).status_code != 200:
+                raise AssertionError("search_suggest did not return 200")
+    sql = [q["sql"] for q in ctx.captured_queries]
+    client.logout()
+    return {
+        "queries": len(sql) / requests,
+        "session_reads": sum('FROM "django_session"' in s for s in sql) / requests,
+        "session_writes": sum(s.startswith(('UPDATE "django_session"', 'INSERT INTO "django_session"')) for s in sql) / requests,
+        "user_reads": sum(f'FROM "{user._meta.db_table}"' in s for s in sql) / requests,
+    }
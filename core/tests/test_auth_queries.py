@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import auth_backends
+
+from . import helpers
+
+# 비교 기준 - 캐시 없는 DB 세션 + ModelBackend (Django 기본)
+BASELINE = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+    "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+}
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class CachedAuthQueryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="authq")
+        auth_backends._users.clear()
+
+    def test_cached_sessions_and_users_skip_the_database(self):
+        with override_settings(**BASELINE):
+            before = helpers.auth_queries(self.user)
+        after = helpers.auth_queries(self.user)
+        self.assertGreaterEqual(before["session_reads"], 1)
+        self.assertGreaterEqual(before["user_reads"], 1)
+        self.assertEqual(after["session_reads"], 0)
+        self.assertEqual(after["session_writes"], 0)
+        self.assertEqual(after["user_reads"], 0)
+        self.assertLess(after["queries"], before["queries"])
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_sliding_expiry_writes_are_coalesced(self):
+        # 켜면 요청마다 저장하지만 SESSION_REFRESH_INTERVAL 안쪽은 DB 에 다시 쓰지 않는다
+        with override_settings(**BASELINE):
+            self.assertEqual(helpers.auth_queries(self.user)["session_writes"], 1)
+        self.assertEqual(helpers.auth_queries(self.user)["session_writes"], 0)
+
+    def test_user_change_is_seen_on_next_request(self):
+        helpers.auth_queries(self.user, requests=1)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(auth_backends.CachedModelBackend().get_user(self.user.pk))
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import branching
+from core.models import Branch, Customer, StaffProfile, Vehicle, WorkOrder, WorkPart
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class BranchScopeTests(TestCase):
+    """한 지점 소속 직원은 다른 지점 작업오더를 보거나 고칠 수 없다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.home, cls.other = Branch.objects.create(name="본점"), Branch.objects.create(name="강남점")
+        cls.user = get_user_model().objects.create_user(username="scoped")
+        StaffProfile.objects.create(user=cls.user, branch=cls.home)
+        cls.vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+
+    def setUp(self):
+        branching.forget(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mine = self.order(self.home, 10000)
+            self.theirs = self.order(self.other, 20000)
+        self.client.force_login(self.user)
+
+    def order(self, branch, price):
+        order = WorkOrder.objects.create(branch=branch, vehicle=self.vehicle, status=WorkOrder.Status.DONE)
+        WorkPart.objects.create(work_order=order, part_name="부품", qty=1, unit_price=price)
+        return order
+
+    def test_other_branch_order_is_not_found(self):
+        pk = self.theirs.pk
+        for method, url in (
+            ("get", reverse("workorder_detail", args=[pk])),
+            ("get", reverse("invoice_pdf", args=[pk])),
+            ("get", reverse("workorder_json", args=[pk])),
+            ("post", reverse("add_lines", args=[pk])),
+            ("post", reverse("workorder_status", args=[pk, "done"])),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(getattr(self.client, method)(url).status_code, 404)
+        self.assertEqual(self.client.get(reverse("workorder_detail", args=[self.mine.pk])).status_code, 200)
+
+    def test_switch_branch_is_refused(self):
+        resp = self.client.post(reverse("switch_branch"), {"branch": self.other.pk})
+        self.assertEqual(resp.status_code, 403)
+        self.assertNotIn(branching.SESSION_KEY, self.client.session)
+
+    def test_branch_parameter_is_ignored(self):
+        query = f"?branch={self.other.pk}"
+        body = b"".join(self.client.get(reverse("export_data", args=["workorders", "csv"]) + query).streaming_content)
+        self.assertIn(self.mine.order_no.encode(), body)
+        self.assertNotIn(self.theirs.order_no.encode(), body)
+
+        resp = self.client.get(reverse("receivables") + query)
+        self.assertEqual(resp.context["branch_id"], self.home.pk)
+        self.assertEqual([o.pk for o in resp.context["orders"]], [self.mine.pk])
+
+        data = self.client.get(reverse("analytics") + query + "&format=json").json()
+        self.assertEqual([b["branch_id"] for b in data["branches"]], [self.home.pk])
+        self.assertEqual(data["total"]["revenue_total"], 11000)
+
+    def test_vehicle_history_lists_own_branch_only(self):
+        data = self.client.get(reverse("vehicle_history", args=[self.vehicle.pk]) + "?format=json").json()
+        self.assertEqual([o["id"] for o in data["orders"]], [self.mine.pk])
+        self.assertEqual((data["summary"]["visits"], data["summary"]["total_spent"]), (1, 11000))
@@ -0,0 +1,63 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import exports
+from core.models import Branch, Customer, Vehicle, WorkOrder
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ExportEscapingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(name='=HYPERLINK("http://evil","x")', phone="+82 10-1234-5678")
+        vehicle = Vehicle.objects.create(customer=customer, model="@SUM(A1)", plate_no="-1+2")
+        cls.order = WorkOrder.objects.create(branch=Branch.objects.create(name="본점"), vehicle=vehicle)
+        cls.user = get_user_model().objects.create_user(username="export")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_csv_cells_are_not_formulas(self):
+        body = b"".join(self.client.get("/exports/data/workorders.csv").streaming_content).decode("utf-8-sig")
+        self.assertIn("\"'=HYPERLINK(\"\"http://evil\"\",\"\"x\"\")\"", body)
+        self.assertIn("'+82 10-1234-5678", body)
+        self.assertIn("'@SUM(A1)", body)
+        self.assertIn("'-1+2", body)
+        self.assertIn(f",{self.order.order_no},", "," + body.splitlines()[1])
+
+    def test_xlsx_cells_are_not_formulas(self):
+        from openpyxl import load_workbook
+
+        resp = self.client.get("/exports/data/workorders.xlsx")
+        self.assertEqual(resp.status_code, 200)
+        ws = load_workbook(io.BytesIO(b"".join(resp.streaming_content))).active
+        row = [c.value for c in next(ws.iter_rows(min_row=2, max_row=2))]
+        self.assertIn("'=HYPERLINK(\"http://evil\",\"x\")", row)
+        self.assertIn("'@SUM(A1)", row)
+        self.assertFalse([c for c in ws[2] if c.data_type == "f"])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class AsgiCsvExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+        branch = Branch.objects.create(name="본점")
+        cls.orders = [WorkOrder.objects.create(branch=branch, vehicle=vehicle) for _ in range(5)]
+        cls.user = get_user_model().objects.create_user(username="asgi-export")
+
+    @mock.patch.object(exports, "CSV_ASYNC_LINES", 2)
+    async def test_csv_streams_as_async_iterator_under_asgi(self):
+        # sync 이터레이터면 ASGI 핸들러가 전부 모은 뒤 보낸다 - async 이터레이터로 묶음마다 나가야 한다
+        await self.async_client.aforce_login(self.user)
+        with override_settings(ASYNC_VIEWS=True):
+            resp = await self.async_client.get("/exports/data/workorders.csv")
+        self.assertTrue(resp.is_async)
+        chunks = [chunk async for chunk in resp.streaming_content]
+        self.assertEqual(len(chunks), 4)  # BOM + 헤더, 2줄, 2줄, 1줄
+        lines = b"".join(chunks).decode("utf-8-sig").splitlines()
+        self.assertEqual([line.split(",")[0] for line in lines[1:]],
+                         [o.order_no for o in sorted(self.orders, key=lambda o: o.pk)])
@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import signals
+from core.models import Branch, Customer, Vehicle, WorkOrder, WorkPart
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="fragments")
+        cls.customer = Customer.objects.create(name="홍길동", phone="010")
+        vehicle = Vehicle.objects.create(customer=cls.customer, model="PCX")
+        with signals.muted():
+            cls.order = WorkOrder.objects.create(branch=Branch.objects.create(name="본점"), vehicle=vehicle)
+            cls.part = WorkPart.objects.create(work_order=cls.order, part_name="오일", qty=1, unit_price=1000, line_total=1000)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def shared_cache(self):
+        location = tempfile.mkdtemp(prefix="fragment_cache_")
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        shared = {**settings.CACHES, "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                                "LOCATION": location}}
+        return override_settings(CACHES=shared, FRAGMENT_CACHE="shared")
+
+    def test_process_local_cache_renders_every_time(self):
+        # 다른 워커에서 바뀐 것처럼 시그널 없이 고치면 LocMem 세대 키로는 알 수 없다 - 캐시하지 않아야 보인다
+        self.assertContains(self.client.get(reverse("dashboard")), "홍길동")
+        Customer.objects.filter(pk=self.customer.pk).update(name="김철수")
+        self.assertContains(self.client.get(reverse("dashboard")), "김철수")
+        detail = reverse("workorder_detail", args=[self.order.pk])
+        self.assertContains(self.client.get(detail), "오일")
+        WorkPart.objects.filter(pk=self.part.pk).update(part_name="엔진오일")
+        self.assertContains(self.client.get(detail), "엔진오일")
+
+    def test_line_tables_are_keyed_on_order_updated_at(self):
+        detail = reverse("workorder_detail", args=[self.order.pk])
+        with self.shared_cache():
+            self.assertContains(self.client.get(detail), "오일")
+            WorkPart.objects.filter(pk=self.part.pk).update(part_name="엔진오일")
+            self.assertNotContains(self.client.get(detail), "엔진오일")  # 캐시된 표
+            WorkOrder.objects.filter(pk=self.order.pk).update(updated_at=timezone.now())
+            self.assertContains(self.client.get(detail), "엔진오일")
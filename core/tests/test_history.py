@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from core import history, signals
+from core.models import Branch, Customer, Vehicle, WorkOrder, WorkPart
+
+
+class VehicleHistoryCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+        with signals.muted():
+            order = WorkOrder.objects.create(branch=Branch.objects.create(name="본점"), vehicle=cls.vehicle)
+            cls.part = WorkPart.objects.create(work_order=order, part_name="오일", qty=1, unit_price=1000, line_total=1000)
+
+    def setUp(self):
+        self.vehicle.refresh_from_db()
+        self.part.refresh_from_db()
+
+    def rename_part(self, name):
+        self.part.part_name = name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.part.save()
+
+    def test_process_local_cache_is_not_used(self):
+        # LocMem 은 워커마다 따로라 다른 워커의 무효화를 볼 수 없다 - 매번 DB 에서 읽는다
+        self.assertEqual(settings.CACHES["default"]["BACKEND"], "django.core.cache.backends.locmem.LocMemCache")
+        history.vehicle_history(self.vehicle)
+        with self.assertNumQueries(5):
+            history.vehicle_history(self.vehicle)
+
+    def test_shared_cache_is_invalidated_by_line_changes(self):
+        location = tempfile.mkdtemp(prefix="history_cache_")
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        shared = {**settings.CACHES, "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                                "LOCATION": location}}
+        with override_settings(CACHES=shared, VEHICLE_HISTORY_CACHE="shared"):
+            first = history.vehicle_history(self.vehicle)
+            with self.assertNumQueries(0):
+                self.assertEqual(history.vehicle_history(self.vehicle), first)
+            self.rename_part("엔진오일")
+            parts = history.vehicle_history(self.vehicle)["orders"][0]["parts"]
+        self.assertEqual(parts[0]["name"], "엔진오일")
@@ -0,0 +1,84 @@
+import csv
+import os
+import tempfile
+from datetime import datetime
+
+from django.test import TestCase
+
+from core import search, utils
+from core.importer import ImportRowError, LegacyImporter, import_csv
+from core.models import Branch, DailyRollup, OrderSequence, WorkOrder
+
+
+def row(order_ref, order_no="", **extra):
+    return {"order_ref": order_ref, "order_no": order_no, "in_datetime": "2024-01-05 10:00",
+            "customer_name": "홍길동", "phone": f"010-0000-{order_ref[-4:]:0>4}", "model": "PCX",
+            "plate_no": f"가{order_ref}", **extra}
+
+
+class LegacyImportOrderNoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name="본점")
+
+    def run_import(self, rows):
+        importer = LegacyImporter(default_branch=self.branch)
+        importer.feed(rows)
+        return importer
+
+    def test_given_numbers_advance_the_day_counter(self):
+        self.run_import([row("a1", "20240105-007"), row("a2", "20240105-003")])
+        self.assertEqual(OrderSequence.objects.get(day="2024-01-05", branch_key=0).last_value, 7)
+        order = WorkOrder.objects.create(branch=self.branch, vehicle=WorkOrder.objects.first().vehicle,
+                                         order_no=utils.generate_order_no(datetime(2024, 1, 5).date()))
+        self.assertEqual(order.order_no, "20240105-008")
+
+    def test_counter_is_not_lowered(self):
+        utils.allocate_order_seq(datetime(2024, 1, 5).date(), count=12)
+        self.run_import([row("a1", "20240105-007")])
+        self.assertEqual(OrderSequence.objects.get(day="2024-01-05", branch_key=0).last_value, 12)
+
+    def test_foreign_numbers_leave_counters_alone(self):
+        self.run_import([row("a1", "OLD-77")])
+        self.assertFalse(OrderSequence.objects.exists())
+
+    def test_rerun_reports_a_row_error(self):
+        self.run_import([row("a1", "20240105-007")])
+        with self.assertRaisesMessage(ImportRowError, "2행: 접수번호 20240105-007"):
+            self.run_import([row("a1", "20240105-007")])
+        self.assertEqual(WorkOrder.objects.count(), 1)
+
+    def test_duplicate_in_file_reports_a_row_error(self):
+        with self.assertRaisesMessage(ImportRowError, "3행: 접수번호 20240105-007 가 2행과 겹칩니다"):
+            self.run_import([row("a1", "20240105-007"), row("a2", "20240105-007")])
+        self.assertEqual(WorkOrder.objects.count(), 0)
+
+
+class PartialImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name="본점")
+
+    def write_csv(self, rows):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8-sig", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=sorted({k for r in rows for k in r}))
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def test_error_after_first_batch_finalizes_committed_orders(self):
+        path = self.write_csv([
+            row("a1", "20240105-001", line_type="part", item="오일", qty="1", unit_price="10000"),
+            row("a2", "20240105-002", line_type="part", item="필터", qty="1", unit_price="5000"),
+            row("a3", "20240105-003", line_type="bogus"),
+        ])
+        with self.assertRaisesMessage(ImportRowError, "4행: 알 수 없는 line_type"):
+            import_csv(path, default_branch=self.branch, batch_size=1)
+        orders = WorkOrder.objects.order_by("order_no")
+        self.assertEqual([(o.order_no, int(o.total_amount)) for o in orders],
+                         [("20240105-001", 11000), ("20240105-002", 5500)])
+        self.assertFalse(WorkOrder.objects.drifted().exists())
+        self.assertEqual(search.filter_orders(WorkOrder.objects.all(), "20240105-002").count(), 1)
+        self.assertEqual(int(DailyRollup.objects.get(day="2024-01-05").revenue_total), 16500)
@@ -0,0 +1,65 @@
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import invoice_batch, pdf
+from core.management.commands.bench_pdf import sample_order
+from core.models import ExportJob
+
+
+class MergedPdfWriterTests(TestCase):
+    def test_chunks_are_joined_into_one_page_tree(self):
+        order, parts, labor = sample_order(3)
+        chunk = pdf.get_template().render_many([(order, parts, labor)] * 2)
+        path = os.path.join(tempfile.mkdtemp(), "merged.pdf")
+        with pdf.MergedPdfWriter(path) as out:
+            for _ in range(3):
+                out.append(chunk)
+        with open(path, "rb") as f:
+            data = f.read()
+        self.assertTrue(data.startswith(b"%PDF-") and data.rstrip().endswith(b"%%EOF"))
+        self.assertIn(b"/Type /Pages /Kids [ ", data)
+        self.assertEqual(re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", data).group(1), b"6")
+        self.assertEqual(len(re.findall(rb"/Type /Page\b(?!s)", data)), 6)
+        # xref 의 위치가 실제 객체 머리와 맞아야 한다
+        xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+        for num, off in enumerate(re.findall(rb"(\d{10}) 00000 n", data[xref:]), start=1):
+            self.assertTrue(data[int(off):].startswith(b"%d 0 obj" % num))
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError), pdf.MergedPdfWriter(os.path.join(tempfile.mkdtemp(), "x.pdf")) as out:
+            out.append(b"not a pdf")
+
+
+class ExportJobLimitTests(TestCase):
+    def job(self, **kwargs):
+        today = timezone.localdate()
+        return ExportJob.objects.create(date_from=today, date_to=today, **kwargs)
+
+    def test_one_active_job_at_a_time(self):
+        self.assertFalse(invoice_batch.at_capacity())
+        self.job()
+        self.assertTrue(invoice_batch.at_capacity())
+        with override_settings(EXPORT_JOB_MAX_ACTIVE=2):
+            self.assertFalse(invoice_batch.at_capacity())
+
+    def test_stale_jobs_fail(self):
+        old = timezone.now() - timedelta(hours=1)
+        never_started = self.job()
+        ExportJob.objects.filter(pk=never_started.pk).update(created_at=old)
+        stalled = self.job(status=ExportJob.Status.RUNNING, started_at=old, heartbeat_at=old)
+        running = self.job(status=ExportJob.Status.RUNNING, started_at=old, heartbeat_at=timezone.now())
+        self.assertEqual(invoice_batch.expire_stale(), 2)
+        statuses = dict(ExportJob.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[never_started.pk], ExportJob.Status.FAILED)
+        self.assertEqual(statuses[stalled.pk], ExportJob.Status.FAILED)
+        self.assertEqual(statuses[running.pk], ExportJob.Status.RUNNING)
+
+    def test_run_job_only_starts_pending_jobs(self):
+        job = self.job(status=ExportJob.Status.FAILED)
+        with self.assertRaises(ValueError):
+            invoice_batch.run_job(job)
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+import threading
+import time
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+
+
+class RegistryFileTests(SimpleTestCase):
+    def test_concurrent_first_flush_writes_one_file_per_process(self):
+        directory = tempfile.mkdtemp(prefix="metrics_")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        registry = metrics.Registry()
+        registry.counter("test_total", "test").inc()
+        barrier = threading.Barrier(16)
+
+        def flush():
+            barrier.wait()
+            registry.flush()
+
+        clock = count(1_000_000)
+
+        def slow_time():  # 파일 이름을 정하는 사이에 다른 스레드가 끼어들 틈을 넓힌다
+            time.sleep(0.01)
+            return next(clock)
+
+        with override_settings(METRICS_DIR=directory), mock.patch.object(metrics.time, "time", slow_time):
+            threads = [threading.Thread(target=flush) for _ in range(16)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(registry.collect()["test_total"], {metrics._key({}): 1})
+        self.assertEqual(len(list(registry._file.parent.glob("*.json"))), 1)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ConnectionReuseMetricTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="metrics")
+
+    def reuse_count(self) -> int:
+        return sum(metrics.db_reuse.values.values())
+
+    def test_sync_requests_are_counted(self):
+        self.client.force_login(self.user)
+        before = self.reuse_count()
+        self.client.get(reverse("search_suggest"))
+        self.assertEqual(self.reuse_count() - before, 1)
+
+    async def test_async_path_skips_the_event_loop_connection(self):
+        # 이벤트 루프 스레드의 연결은 쿼리가 나가는 연결이 아니라 늘 "false" 로 잘못 센다
+        await self.async_client.aforce_login(self.user)
+        before = self.reuse_count()
+        resp = await self.async_client.get(reverse("search_orders"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.reuse_count(), before)
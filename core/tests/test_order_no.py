@@ -0,0 +1,74 @@
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import utils
+from core.checks import order_no_errors
+from core.models import Branch, Customer, Vehicle, WorkOrder
+
+from . import helpers
+
+BRANCH_FORMAT = "{date:%Y%m%d}-{branch}-{seq:03d}"
+
+
+class OrderNoSettingsTests(SimpleTestCase):
+    def test_per_branch_requires_branch_in_format(self):
+        self.assertEqual([e.id for e in order_no_errors("{date:%Y%m%d}-{seq:03d}", per_branch=True)], ["core.E001"])
+        self.assertEqual(order_no_errors(BRANCH_FORMAT, per_branch=True), [])
+        self.assertEqual(order_no_errors("{date:%Y%m%d}-{seq:03d}", per_branch=False), [])
+
+    @override_settings(ORDER_NO_PER_BRANCH=True, ORDER_NO_FORMAT="{date:%Y%m%d}-{seq:03d}")
+    def test_system_check_rejects_combination(self):
+        with self.assertRaises(SystemCheckError):
+            call_command("check")
+
+
+class OrderNoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branches = [Branch.objects.create(name="A"), Branch.objects.create(name="B")]
+        cls.vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+
+    def create(self, branch):
+        return WorkOrder.objects.create(branch=branch, vehicle=self.vehicle)
+
+    def test_shared_counter(self):
+        numbers = [self.create(b).order_no for b in self.branches * 2]
+        self.assertEqual(len(set(numbers)), 4)
+        self.assertEqual(numbers[0], utils.format_order_no(timezone.localdate(), 1))
+
+    @override_settings(ORDER_NO_PER_BRANCH=True, ORDER_NO_FORMAT=BRANCH_FORMAT)
+    def test_per_branch_counters_do_not_collide(self):
+        a, b = (self.create(branch) for branch in self.branches)
+        self.assertNotEqual(a.order_no, b.order_no)
+        self.assertTrue(a.order_no.endswith("-001") and b.order_no.endswith("-001"))
+
+    def test_existing_numbers_are_skipped(self):
+        day = timezone.localdate()
+        WorkOrder.objects.create(branch=self.branches[0], vehicle=self.vehicle, order_no=utils.format_order_no(day, 7))
+        self.assertEqual(self.create(self.branches[0]).order_no, utils.format_order_no(day, 8))
+
+
+class OrderNoConcurrencyTests(TransactionTestCase):
+    """여러 스레드가 동시에 작업오더를 만들어도 접수번호가 겹치거나 비지 않는다."""
+
+    def setUp(self):
+        self.branch_ids = [Branch.objects.create(name=f"지점 {i}").pk for i in range(3)]
+        self.vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="경합", phone="000"), model="PCX")
+        utils._blocks.clear()
+
+    def run_stress(self, per_branch: bool):
+        result = helpers.stress_order_numbers(8, 10, self.branch_ids, self.vehicle.pk)
+        self.assertEqual(result["conflicts"], [])
+        self.assertEqual(result["duplicates"], [])
+        self.assertEqual(len(result["numbers"]), 80)
+        self.assertEqual(WorkOrder.objects.values("order_no").distinct().count(), 80)
+        self.assertEqual(helpers.sequence_gaps(result["numbers"], per_branch), [])
+
+    def test_shared_counter(self):
+        self.run_stress(per_branch=False)
+
+    @override_settings(ORDER_NO_PER_BRANCH=True, ORDER_NO_FORMAT=BRANCH_FORMAT)
+    def test_per_branch_counters(self):
+        self.run_stress(per_branch=True)
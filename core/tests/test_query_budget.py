@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from . import helpers
+
+# 세션 + 사용자 + 오더(select_related) + 부품/공임/결제 prefetch 3
+BUDGET = 6
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class WorkOrderDetailQueryBudgetTests(TestCase):
+    def test_query_count_does_not_grow_with_lines(self):
+        user = get_user_model().objects.create_user(username="qbudget")
+        queries = helpers.detail_queries(user, (1, 50))
+        self.assertEqual(len(queries[1]), len(queries[50]), "\n".join(queries[50]))
+        self.assertLessEqual(len(queries[50]), BUDGET, "\n".join(queries[50]))
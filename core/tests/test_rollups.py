@@ -0,0 +1,75 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from core import rollups, signals
+from core.models import Branch, Customer, DailyRollup, Vehicle, WorkOrder, WorkPart
+
+
+class RollupRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name="본점")
+        vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+        with signals.muted():  # 테스트 밖(클래스 트랜잭션)에 콜백을 남기지 않도록
+            cls.order = WorkOrder.objects.create(branch=cls.branch, vehicle=vehicle, status=WorkOrder.Status.DONE,
+                                                 in_datetime=timezone.now() - timedelta(hours=2))
+        cls.bucket = rollups.order_bucket(cls.branch.pk, None, cls.order.status, cls.order.in_datetime, None)
+
+    def stored(self):
+        return DailyRollup.objects.get(day=self.bucket[0], branch=self.branch, technician_key=0)
+
+    def test_lines_in_one_transaction_refresh_the_bucket_once(self):
+        with mock.patch.object(rollups, "rebuild", wraps=rollups.rebuild) as rebuild, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for i in range(5):
+                    WorkPart.objects.create(work_order=self.order, part_name=f"부품 {i}", qty=1, unit_price=1000)
+        self.assertEqual(len([c for c in callbacks if isinstance(c, rollups._Pending)]), 1)
+        rebuild.assert_called_once_with(*self.bucket[:1], *self.bucket)
+        self.assertEqual(self.stored().parts_total, Decimal(5000))
+
+    def test_rolled_back_marks_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        rollups.mark([self.bucket])
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        self.assertEqual(callbacks, [])
+
+    def test_refresh_overwrites_an_existing_row(self):
+        # 다른 요청이 같은 bucket 을 먼저 넣은 상황 - UNIQUE 충돌 대신 덮어쓴다
+        DailyRollup.objects.create(day=self.bucket[0], branch=self.branch, technician_key=0, order_count=99, payment_total=7)
+        rollups.refresh([self.bucket])
+        row = self.stored()
+        self.assertEqual((row.order_count, row.payment_total), (1, 0))
+
+    def test_empty_bucket_is_removed(self):
+        rollups.refresh([self.bucket])
+        WorkOrder.objects.filter(pk=self.order.pk).update(status=WorkOrder.Status.CANCELED)
+        rollups.refresh([self.bucket])
+        self.assertFalse(DailyRollup.objects.exists())
+
+
+class ReconcileTotalsTests(TestCase):
+    def test_fix_refreshes_rollups(self):
+        branch = Branch.objects.create(name="본점")
+        vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+        with signals.muted():  # 합계 반영 없이 라인만 - 저장된 합계(0)가 어긋난 상태
+            order = WorkOrder.objects.create(branch=branch, vehicle=vehicle, status=WorkOrder.Status.DONE)
+            WorkPart.objects.create(work_order=order, part_name="오일", qty=1, unit_price=10000)
+        bucket = rollups.order_bucket(branch.pk, None, order.status, order.in_datetime, None)
+        rollups.refresh([bucket])
+        self.assertEqual(DailyRollup.objects.get().revenue_total, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconcile_totals", "--fix", stdout=io.StringIO())
+        self.assertEqual(DailyRollup.objects.get().revenue_total, Decimal(11000))
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.test import TestCase
+
+from core import synthetic
+from core.models import WorkOrder
+
+
+def _reversed_map(fn, jobs, workers, progress=None, label=""):
+    """다른 프로세스가 뒤 묶음을 먼저 기록한 것처럼 - 결과는 jobs 순서로"""
+    return list(reversed([fn(job) for job in reversed(jobs)]))
+
+
+class SyntheticOrderNumberTests(TestCase):
+    def generate(self) -> list[tuple]:
+        synthetic.generate(branches=2, customers=20, vehicles=25, orders=120, lines=2, days=3, seed=7, chunk_size=25)
+        return list(WorkOrder.objects.order_by("in_datetime", "pk").values_list("order_no", "branch__name", "total_amount"))
+
+    def test_numbers_do_not_depend_on_chunk_write_order(self):
+        class Rollback(Exception):
+            pass
+
+        try:
+            with transaction.atomic():
+                in_order = self.generate()
+                raise Rollback
+        except Rollback:
+            pass
+        original = synthetic._map
+        synthetic._map = _reversed_map
+        try:
+            reordered = self.generate()
+        finally:
+            synthetic._map = original
+        self.assertEqual(len(in_order), 120)
+        self.assertEqual(len({n for n, _, _ in in_order}), 120)
+        self.assertEqual(in_order, reordered)
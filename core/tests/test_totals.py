@@ -0,0 +1,78 @@
+from django.test import TestCase
+
+from core.models import Branch, Customer, Payment, Vehicle, WorkLabor, WorkOrder, WorkPart
+
+
+class WorkOrderTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name="본점")
+        cls.vehicle = Vehicle.objects.create(customer=Customer.objects.create(name="고객", phone="010"), model="PCX")
+
+    def setUp(self):
+        self.order = WorkOrder.objects.create(branch=self.branch, vehicle=self.vehicle)
+
+    def totals(self, order=None):
+        order = WorkOrder.objects.get(pk=(order or self.order).pk)
+        return tuple(int(getattr(order, f)) for f in
+                     ("subtotal_parts", "subtotal_labor", "tax_amount", "total_amount", "paid_amount", "balance_due"))
+
+    def assertConsistent(self):
+        self.assertFalse(WorkOrder.objects.drifted().exists())
+
+    def part(self, price, order=None):
+        return WorkPart.objects.create(work_order=order or self.order, part_name="부품", qty=1, unit_price=price)
+
+    def test_line_save_and_delete(self):
+        part = self.part(10000)
+        labor = WorkLabor.objects.create(work_order=self.order, labor_name="공임", price=2000)
+        self.assertEqual(self.totals(), (10000, 2000, 1200, 13200, 0, 13200))
+        part.unit_price = 5000
+        part.save()
+        self.assertEqual(self.totals(), (5000, 2000, 700, 7700, 0, 7700))
+        labor.delete()
+        self.assertEqual(self.totals(), (5000, 0, 500, 5500, 0, 5500))
+        self.assertConsistent()
+
+    def test_line_moved_to_another_order(self):
+        other = WorkOrder.objects.create(branch=self.branch, vehicle=self.vehicle)
+        part = self.part(10000)
+        part.work_order = other
+        part.save()
+        self.assertEqual(self.totals(), (0, 0, 0, 0, 0, 0))
+        self.assertEqual(self.totals(other), (10000, 0, 1000, 11000, 0, 11000))
+        self.assertConsistent()
+
+    def test_payments(self):
+        self.part(10000)
+        payment = Payment.objects.create(work_order=self.order, method=Payment.Method.CARD, amount=5000)
+        self.assertEqual(self.totals()[4:], (5000, 6000))
+        payment.amount = 11000
+        payment.save()
+        self.assertEqual(self.totals()[4:], (11000, 0))
+        payment.delete()
+        self.assertEqual(self.totals()[4:], (0, 11000))
+        self.assertConsistent()
+
+    def test_stale_instance_save_keeps_totals(self):
+        # 관리자 화면처럼 라인 추가 전에 읽어 둔 오더를 저장해도 합계를 옛 값으로 덮어쓰지 않는다
+        self.part(1000)
+        stale = WorkOrder.objects.get(pk=self.order.pk)
+        self.part(10000)
+        stale.work_detail = "오일 교환"
+        stale.save()
+        self.assertEqual(self.totals(), (11000, 0, 1100, 12100, 0, 12100))
+        self.part(5000)
+        self.assertEqual(self.totals(), (16000, 0, 1600, 17600, 0, 17600))
+        self.assertEqual(WorkOrder.objects.get(pk=self.order.pk).work_detail, "오일 교환")
+        self.assertConsistent()
+
+    def test_discount_edit_recomputes_tax_and_total(self):
+        self.part(10000)
+        Payment.objects.create(work_order=self.order, method=Payment.Method.CASH, amount=1000)
+        order = WorkOrder.objects.get(pk=self.order.pk)
+        order.discount_amount = 2000
+        order.save()
+        self.assertEqual(self.totals(), (10000, 0, 800, 8800, 1000, 7800))
+        self.assertEqual(int(order.total_amount), 8800)
+        self.assertConsistent()
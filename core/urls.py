@@ -1,15 +1,31 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, views_async
 
 urlpatterns = [
     path("", views.DashboardView.as_view(), name="dashboard"),
+    path("workorders/page.json", views.workorder_page, name="workorder_page"),
+    path("search/suggest.json", views.search_suggest, name="search_suggest"),
+    path("search/orders.json", views_async.search_orders, name="search_orders"),
+    path("branch/", views.switch_branch, name="switch_branch"),
     path("customers/new/", views.CustomerCreateView.as_view(), name="customer_new"),
     path("vehicles/new/", views.VehicleCreateView.as_view(), name="vehicle_new"),
+    path("vehicles/history/", views.vehicle_history_lookup, name="vehicle_history_lookup"),
+    path("vehicles/<int:pk>/history/", views.vehicle_history, name="vehicle_history"),
     path("workorders/new/", views.WorkOrderCreateView.as_view(), name="workorder_new"),
     path("workorders/<int:pk>/", views.WorkOrderDetailView.as_view(), name="workorder_detail"),
+    path("workorders/<int:pk>.json", views_async.workorder_json, name="workorder_json"),
     path("workorders/<int:pk>/parts/add/", views.add_part, name="add_part"),
     path("workorders/<int:pk>/labor/add/", views.add_labor, name="add_labor"),
+    path("workorders/<int:pk>/lines/add/", views.add_lines, name="add_lines"),
     path("workorders/<int:pk>/payments/add/", views.add_payment, name="add_payment"),
-    path("workorders/<int:pk>/invoice.pdf", views.invoice_pdf, name="invoice_pdf"),
+    path("workorders/<int:pk>/invoice.pdf", views_async.invoice_pdf if settings.ASYNC_VIEWS else views.invoice_pdf, name="invoice_pdf"),
     path("workorders/<int:pk>/status/<str:action>/", views.workorder_status, name="workorder_status"),
+    path("receivables/", views.receivables, name="receivables"),
+    path("analytics/", views.analytics, name="analytics"),
+    path("metrics", views.metrics_view, name="metrics"),
+    path("exports/invoices/new/", views.ExportJobCreateView.as_view(), name="export_job_new"),
+    path("exports/data/<slug:kind>.<slug:fmt>", views.export_data, name="export_data"),
+    path("exports/<int:pk>/", views.ExportJobDetailView.as_view(), name="export_job"),
+    path("exports/<int:pk>/download/", views.export_job_download, name="export_job_download"),
 ]
@@ -1,19 +1,158 @@
+import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import date
-from django.db import transaction
 
-def generate_order_no(prefix_date: date | None = None) -> str:
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+_blocks: dict[tuple[str, date, int], tuple[int, int]] = {}
+_blocks_lock = threading.Lock()
+_TRAILING_NUMBER = re.compile(r"(\d+)$")
+
+
+def _scope(branch_id: int | None) -> int:
+    if getattr(settings, "ORDER_NO_PER_BRANCH", False) and branch_id:
+        return int(branch_id)
+    return 0
+
+
+def _existing_max(day: date, using: str, branch_key: int = 0) -> int:
+    """카운터가 없던 날(배포 당일 등) 기존 접수번호와 겹치지 않도록 시작값을 구한다. 지점별 카운터면 그 지점 것만."""
     from .models import WorkOrder
-    d = prefix_date or date.today()
-    prefix = d.strftime("%Y%m%d")
-    with transaction.atomic():
-        last = (WorkOrder.objects.select_for_update()
-                .filter(order_no__startswith=prefix)
-                .order_by("-order_no")
-                .first())
-        if not last:
-            return f"{prefix}-001"
-        try:
-            n = int(last.order_no.split("-")[-1])
-        except Exception:
-            n = 0
-        return f"{prefix}-{n+1:03d}"
+    best = 0
+    qs = WorkOrder.objects.using(using).filter(order_no__startswith=day.strftime("%Y%m%d"))
+    if branch_key:
+        qs = qs.filter(branch_id=branch_key)
+    for order_no in qs.values_list("order_no", flat=True).iterator():
+        m = _TRAILING_NUMBER.search(order_no)
+        if m:
+            best = max(best, int(m.group(1)))
+    return best
+
+
+def allocate_order_seq(day: date, branch_key: int = 0, count: int = 1, using: str = DEFAULT_DB_ALIAS) -> int:
+    """(day, branch_key) 카운터를 count 만큼 원자적으로 올리고 마지막 값을 돌려준다.
+
+    예약된 번호는 last-count+1 .. last. 카운터 행 하나만 잠그므로 다른 날짜/지점과 경합하지 않는다.
+    """
+    from .models import OrderSequence
+    with transaction.atomic(using=using):
+        qs = OrderSequence.objects.using(using).filter(day=day, branch_key=branch_key)
+        if not qs.update(last_value=F("last_value") + count):
+            try:
+                with transaction.atomic(using=using):
+                    OrderSequence.objects.using(using).create(
+                        day=day, branch_key=branch_key, last_value=_existing_max(day, using, branch_key) + count)
+            except IntegrityError:
+                # 동시에 다른 요청이 같은 날 첫 카운터를 만든 경우
+                qs.update(last_value=F("last_value") + count)
+        return qs.values_list("last_value", flat=True).get()
+
+
+def raise_order_seq(day: date, branch_key: int, value: int, using: str = DEFAULT_DB_ALIAS) -> None:
+    """(day, branch_key) 카운터를 최소 value 로 올린다 - 접수번호를 그대로 가져온 과거 오더와 새 번호가 겹치지 않도록."""
+    from .models import OrderSequence
+    with transaction.atomic(using=using):
+        qs = OrderSequence.objects.using(using).filter(day=day, branch_key=branch_key)
+        if not qs.filter(last_value__lt=value).update(last_value=value) and not qs.exists():
+            try:
+                with transaction.atomic(using=using):
+                    OrderSequence.objects.using(using).create(
+                        day=day, branch_key=branch_key, last_value=max(value, _existing_max(day, using, branch_key)))
+            except IntegrityError:
+                qs.filter(last_value__lt=value).update(last_value=value)
+
+
+def next_order_seq(day: date, branch_id: int | None = None, using: str = DEFAULT_DB_ALIAS) -> int:
+    """다음 일련번호. ORDER_NO_BLOCK_SIZE > 1 이면 워커 프로세스별로 번호 블록을 미리 받아 쓴다."""
+    key = _scope(branch_id)
+    block = int(getattr(settings, "ORDER_NO_BLOCK_SIZE", 1))
+    # 바깥 트랜잭션이 롤백되면 미리 받은 블록도 무효가 되므로 트랜잭션 안에서는 블록을 쓰지 않는다.
+    if block <= 1 or connections[using].in_atomic_block:
+        return allocate_order_seq(day, key, using=using)
+    with _blocks_lock:
+        nxt, last = _blocks.get((using, day, key), (1, 0))
+        if nxt > last:
+            last = allocate_order_seq(day, key, count=block, using=using)
+            nxt = last - block + 1
+        _blocks[(using, day, key)] = (nxt + 1, last)
+        return nxt
+
+
+def format_order_no(day: date, seq: int, branch_id: int | None = None) -> str:
+    fmt = getattr(settings, "ORDER_NO_FORMAT", "{date:%Y%m%d}-{seq:03d}")
+    return fmt.format(date=day, seq=seq, branch=branch_id or "")
+
+
+def generate_order_no(prefix_date: date | None = None, branch_id: int | None = None) -> str:
+    from . import metrics
+
+    d = prefix_date or timezone.localdate()
+    source = "block" if int(getattr(settings, "ORDER_NO_BLOCK_SIZE", 1)) > 1 else "db"
+    with metrics.order_no_wait.time(source=source):
+        seq = next_order_seq(d, branch_id)
+    return format_order_no(d, seq, branch_id)
+
+
+
+def invoice_cache_key(order_id: int) -> str:
+    return f"invoice_pdf:{order_id}"
+
+
+def invalidate_invoice_pdf(order_id: int) -> None:
+    caches[settings.INVOICE_PDF_CACHE].delete(invoice_cache_key(order_id))
+
+
+PROCESS_LOCAL_CACHES = ("django.core.cache.backends.locmem.LocMemCache", "django.core.cache.backends.dummy.DummyCache")
+
+
+def shared_cache(alias: str):
+    """워커 간 공유되는 캐시(Redis/파일 등)면 그 캐시를, 프로세스 메모리/더미 캐시면 None 을 돌려준다.
+
+    버전 키를 올려 무효화하는 캐시는 워커마다 따로인 LocMem 에 두면 다른 워커의 무효화를 보지 못한다.
+    """
+    return None if settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_CACHES else caches[alias]
+
+class TTLCache:
+    """프로세스 내부용 작은 LRU + TTL 캐시 (스레드 안전)"""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,21 +1,54 @@
-from io import BytesIO
-
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Sum
-from django.http import FileResponse, HttpRequest, HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.core.cache import caches
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, quote_etag, url_has_allowed_host_and_scheme
 from django.views.generic import CreateView, DetailView, ListView, UpdateView
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
+from . import branching, exports, fragments, history, invoice_batch, metrics, pdf, rollups, search
+from .forms import (
+    CustomerForm, ExportJobForm, VehicleForm, WorkOrderForm, WorkPartForm, WorkLaborForm, PaymentForm,
+    PaymentFormSet, WorkLaborFormSet, WorkPartFormSet,
+)
+from .models import Branch, Customer, ExportJob, Vehicle, WorkOrder, WorkPart, WorkLabor, Payment
+from .pagination import estimate_count, keyset_page
+from .suggest import suggest
+from .utils import invoice_cache_key
+
+
+def dashboard_queryset(q: str = "", branch_id: int | None = None):
+    qs = WorkOrder.objects.scoped(branch_id).select_related("vehicle","vehicle__customer","branch","assigned_to")
+    if q:
+        qs = search.filter_orders(qs, q)
+    return qs.order_by("-in_datetime","-id")
 
-from .forms import CustomerForm, VehicleForm, WorkOrderForm, WorkPartForm, WorkLaborForm, PaymentForm
-from .models import Customer, Vehicle, WorkOrder, WorkPart, WorkLabor, Payment
+
+def _count_label(qs) -> str:
+    mode = getattr(settings, "DASHBOARD_COUNT_MODE", "estimate")
+    if mode == "none":
+        return ""
+    if mode == "exact":
+        return f"총 {qs.count():,}건"
+    n, approx = estimate_count(qs)
+    if not approx:
+        return f"총 {n:,}건"
+    return f"총 {n:,}+건" if qs.query.has_filters() else f"약 {n:,}건"
 
 
 class DashboardView(LoginRequiredMixin, ListView):
@@ -24,17 +57,62 @@ class DashboardView(LoginRequiredMixin, ListView):
     context_object_name = "orders"
 
     def get_queryset(self):
-        qs = WorkOrder.objects.select_related("vehicle","vehicle__customer","branch")
-        q = self.request.GET.get("q","").strip()
-        if q:
-            qs = qs.filter(
-                Q(order_no__icontains=q)|
-                Q(vehicle__plate_no__icontains=q)|
-                Q(vehicle__model__icontains=q)|
-                Q(vehicle__customer__phone__icontains=q)|
-                Q(vehicle__customer__name__icontains=q)
-            )
-        return qs.order_by("-in_datetime","-id")
+        return dashboard_queryset(self.request.GET.get("q","").strip(), self.request.branch_id)
+
+    def get_context_data(self, **kwargs):
+        page = keyset_page(self.object_list, self.request.GET.get("cursor"), settings.DASHBOARD_PAGE_SIZE)
+        ctx = super().get_context_data(object_list=page.object_list, **kwargs)
+        ctx["next_cursor"] = page.next_cursor
+        ctx["count_label"] = _count_label(self.object_list)
+        ctx["rows_html"] = fragments.order_rows(self.request, page.object_list)
+        return ctx
+
+
+@login_required
+def workorder_page(request: HttpRequest) -> JsonResponse:
+    """대시보드 '더 보기' - 커서 다음 페이지를 행 HTML로 반환"""
+    qs = dashboard_queryset(request.GET.get("q","").strip(), request.branch_id)
+    page = keyset_page(qs, request.GET.get("cursor"), settings.DASHBOARD_PAGE_SIZE)
+    html = fragments.order_rows(request, page.object_list)
+    return JsonResponse({"html": html, "next_cursor": page.next_cursor, "has_more": page.has_more})
+
+
+@login_required
+def search_suggest(request: HttpRequest) -> JsonResponse:
+    """검색창 자동완성 - 접수/차량/고객 상위 N건"""
+    try:
+        limit = min(max(int(request.GET.get("limit", 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    return JsonResponse(suggest(request.GET.get("q", ""), limit, request.branch_id))
+
+
+@login_required
+def switch_branch(request: HttpRequest) -> HttpResponse:
+    """상단 지점 선택 (POST branch=, 비우면 전체) - 전체 조회 권한이 있는 직원만"""
+    if request.method != "POST":
+        return HttpResponse(status=405)
+    if not branching.can_switch(request.user):
+        return HttpResponse(status=403)
+    value = request.POST.get("branch", "")
+    if not value:
+        request.session.pop(branching.SESSION_KEY, None)
+    elif value.isdigit() and int(value) in dict(branching.branch_choices()):
+        request.session[branching.SESSION_KEY] = int(value)
+    else:
+        return HttpResponse(status=400)
+    next_url = request.POST.get("next", "")
+    if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = reverse("dashboard")
+    return redirect(next_url)
+
+
+def _limit_branch(form, branch_id: int | None):
+    """지점 컨텍스트가 있으면 폼의 지점 선택지를 그 지점 하나로 줄인다."""
+    if branch_id and "branch" in form.fields:
+        form.fields["branch"].queryset = Branch.objects.filter(pk=branch_id)
+        form.fields["branch"].initial = branch_id
+    return form
 
 
 class CustomerCreateView(LoginRequiredMixin, CreateView):
@@ -61,26 +139,200 @@ class WorkOrderCreateView(LoginRequiredMixin, CreateView):
         initial = super().get_initial()
         initial.setdefault("in_datetime", timezone.now())
         return initial
+    def get_form(self, form_class=None):
+        return _limit_branch(super().get_form(form_class), self.request.branch_id)
     def get_success_url(self):
         return reverse("workorder_detail", kwargs={"pk": self.object.pk})
 
 
+class ExportJobCreateView(LoginRequiredMixin, CreateView):
+    """완료 오더 명세서 일괄 출력 요청 - 실제 작업은 별도 프로세스"""
+    template_name = "core/form.html"
+    model = ExportJob
+    form_class = ExportJobForm
+    def get_form(self, form_class=None):
+        return _limit_branch(super().get_form(form_class), self.request.branch_id)
+    def form_valid(self, form):
+        if invoice_batch.at_capacity():
+            form.add_error(None, "진행 중인 일괄 출력이 있습니다. 끝난 뒤 다시 요청하세요.")
+            return self.form_invalid(form)
+        form.instance.created_by = self.request.user
+        response = super().form_valid(form)
+        invoice_batch.launch(self.object)
+        return response
+    def get_success_url(self):
+        return reverse("export_job", kwargs={"pk": self.object.pk})
+
+
+class ExportJobDetailView(LoginRequiredMixin, DetailView):
+    template_name = "core/export_job.html"
+    model = ExportJob
+    context_object_name = "job"
+    def get_queryset(self):
+        invoice_batch.expire_stale()
+        return branching.scope(super().get_queryset(), self.request.branch_id)
+    def render_to_response(self, context, **kwargs):
+        if self.request.GET.get("format") == "json":
+            job = self.object
+            return JsonResponse({
+                "id": job.pk, "status": job.status, "status_display": job.get_status_display(),
+                "total": job.total, "done": job.done, "progress": job.progress,
+                "download_url": reverse("export_job_download", kwargs={"pk": job.pk}) if job.file else None,
+                "error": job.error,
+            })
+        return super().render_to_response(context, **kwargs)
+
+
+@login_required
+def export_job_download(request: HttpRequest, pk: int) -> HttpResponse:
+    job = get_object_or_404(branching.scope(ExportJob.objects.all(), request.branch_id), pk=pk, status=ExportJob.Status.DONE)
+    if not job.file:
+        raise Http404
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=os.path.basename(job.file.name))
+
+
+@login_required
+def export_data(request: HttpRequest, kind: str, fmt: str) -> HttpResponse:
+    """작업오더/부품/공임/결제 내보내기 - ?branch=&status=&from=YYYY-MM-DD&to=YYYY-MM-DD"""
+    if kind not in exports.EXPORTS or fmt not in ("csv", "xlsx"):
+        raise Http404
+    try:
+        filters = exports.parse_filters(request.GET)
+    except ValueError:
+        return HttpResponse("잘못된 필터 값입니다.", status=400)
+    filters["branch_id"] = request.branch_id or filters["branch_id"]
+    filename = f"sunbike_{kind}_{timezone.localdate():%Y%m%d}.{fmt}"
+    if fmt == "csv":
+        # ASGI 는 sync 이터레이터를 통째로 모아 보내므로 async 이터레이터로 (exports.aiter_csv)
+        lines = (exports.aiter_csv if settings.ASYNC_VIEWS else exports.iter_csv)(kind, **filters)
+        resp = StreamingHttpResponse(lines, content_type="text/csv; charset=utf-8")
+        resp["Content-Disposition"] = content_disposition_header(True, filename)
+        return resp
+    try:
+        tmp = tempfile.TemporaryFile()
+        exports.write_xlsx(kind, tmp, **filters)
+    except ImportError:
+        return HttpResponse("XLSX 내보내기에는 openpyxl 이 필요합니다.", status=501)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename,
+                        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Prometheus 수집용 - METRICS_TOKEN(Bearer) 또는 staff 로그인"""
+    token = settings.METRICS_TOKEN
+    auth = request.headers.get("Authorization", "")
+    allowed = (token and hmac.compare_digest(auth, f"Bearer {token}")) or request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+RECEIVABLES_LIMIT = 200
+
+
+@login_required
+def receivables(request: HttpRequest) -> HttpResponse:
+    """미수금 목록 - 오래된 순, 지점/경과일 구간별 합계 (?branch=)"""
+    branch_id = request.GET.get("branch")
+    branch_id = request.branch_id or (int(branch_id) if branch_id and branch_id.isdigit() else None)
+    qs = WorkOrder.objects.scoped(branch_id).receivables()
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+    edges = [datetime.combine(today - timedelta(days=d), time.min, tzinfo=tz) for d in (30, 60, 90)]
+    aging = qs.aggregate(
+        total=Sum("balance_due"), count=Count("pk"),
+        d30=Sum("balance_due", filter=Q(in_datetime__gte=edges[0])),
+        d60=Sum("balance_due", filter=Q(in_datetime__lt=edges[0], in_datetime__gte=edges[1])),
+        d90=Sum("balance_due", filter=Q(in_datetime__lt=edges[1], in_datetime__gte=edges[2])),
+        over=Sum("balance_due", filter=Q(in_datetime__lt=edges[2])),
+    )
+    by_branch = qs.values("branch_id", "branch__name").annotate(total=Sum("balance_due"), count=Count("pk")).order_by("branch__name")
+    orders = list(qs.select_related("branch", "vehicle", "vehicle__customer").order_by("in_datetime", "id")[:RECEIVABLES_LIMIT])
+    for o in orders:
+        o.age_days = (today - timezone.localdate(o.in_datetime)).days
+    return render(request, "core/receivables.html", {
+        "orders": orders, "aging": aging, "by_branch": by_branch, "limit": RECEIVABLES_LIMIT,
+        "branch_id": branch_id, "branch_list": branching.scope(Branch.objects.order_by("name"), request.branch_id, "pk"),
+    })
+
+
+@login_required
+def analytics(request: HttpRequest) -> HttpResponse:
+    """매출/처리량 분석 - DailyRollup 만 읽는다. ?from=&to=&branch=&by=day|month&format=json"""
+    try:
+        filters = exports.parse_filters(request.GET)
+    except ValueError:
+        return HttpResponse("잘못된 필터 값입니다.", status=400)
+    filters["branch_id"] = request.branch_id or filters["branch_id"]
+    date_to = filters["date_to"] or timezone.localdate()
+    date_from = filters["date_from"] or date_to - timedelta(days=30)
+    by = "month" if request.GET.get("by") == "month" else "day"
+    data = rollups.summarize(date_from, date_to, filters["branch_id"], by)
+    keys = [r["technician_key"] for r in data["technicians"] if r["technician_key"]]
+    names = dict(get_user_model().objects.filter(pk__in=keys).values_list("pk", "username"))
+    for r in data["technicians"]:
+        r["technician"] = names.get(r["technician_key"], "미배정" if not r["technician_key"] else f"#{r['technician_key']}")
+    if request.GET.get("format") == "json":
+        return JsonResponse({"from": date_from, "to": date_to, "by": by, **data})
+    return render(request, "core/analytics.html", {
+        **data, "date_from": date_from, "date_to": date_to, "by": by,
+        "branch_id": filters["branch_id"], "branch_list": branching.scope(Branch.objects.order_by("name"), request.branch_id, "pk"),
+    })
+
+
+@login_required
+def vehicle_history_lookup(request: HttpRequest) -> HttpResponse:
+    """차량 id/번호판/VIN 으로 이력 화면 찾기 (?q=, format=json 이면 JSON 이력으로)"""
+    vehicle = history.resolve_vehicle(request.GET.get("q", ""))
+    if vehicle is None:
+        if request.GET.get("format") == "json":
+            return JsonResponse({"error": "차량을 찾을 수 없습니다."}, status=404)
+        messages.warning(request, "차량을 찾을 수 없습니다.")
+        return redirect("dashboard")
+    url = reverse("vehicle_history", args=[vehicle.pk])
+    return redirect(f"{url}?format=json" if request.GET.get("format") == "json" else url)
+
+
+@login_required
+def vehicle_history(request: HttpRequest, pk: int) -> HttpResponse:
+    """차량 정비 이력 타임라인 - 최신순 페이지(?cursor=), ?format=json 이면 JSON"""
+    vehicle = get_object_or_404(Vehicle.objects.select_related("customer"), pk=pk)
+    data = history.vehicle_history(vehicle, request.GET.get("cursor") or None, branch_id=request.branch_id)
+    if request.GET.get("format") == "json":
+        return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+    return render(request, "core/vehicle_history.html", {"vehicle": vehicle, "history": data})
+
+
+def detail_queryset():
+    """상세 화면용 - FK 는 JOIN, 라인/결제는 Prefetch 로 줄 수와 무관하게 쿼리 수 고정"""
+    return WorkOrder.objects.select_related(
+        "branch", "vehicle", "vehicle__customer", "assigned_to",
+    ).prefetch_related(
+        Prefetch("parts", queryset=WorkPart.objects.order_by("pk")),
+        Prefetch("labor", queryset=WorkLabor.objects.order_by("pk")),
+        Prefetch("payments", queryset=Payment.objects.order_by("paid_at", "pk")),
+    )
+
+
 class WorkOrderDetailView(LoginRequiredMixin, DetailView):
     template_name = "core/workorder_detail.html"
     model = WorkOrder
     context_object_name = "order"
+    def get_queryset(self):
+        return detail_queryset().scoped(self.request.branch_id)
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["part_form"] = WorkPartForm()
         ctx["labor_form"] = WorkLaborForm()
-        ctx["payment_form"] = PaymentForm(initial={"paid_at": timezone.now()})
-        ctx["payments_total"] = self.object.payments.aggregate(t=Sum("amount"))["t"] or 0
+        ctx["payment_form"] = PaymentForm(initial={"paid_at": timezone.now(), "amount": max(self.object.balance_due, 0)})
+        ctx.update(fragments.context(self.object))
         return ctx
 
 
 @login_required
 def add_part(request: HttpRequest, pk: int) -> HttpResponse:
-    order = get_object_or_404(WorkOrder, pk=pk)
+    order = get_object_or_404(WorkOrder.objects.scoped(request.branch_id), pk=pk)
     form = WorkPartForm(request.POST)
     if form.is_valid():
         p = form.save(commit=False); p.work_order = order; p.save()
@@ -92,7 +344,7 @@ def add_part(request: HttpRequest, pk: int) -> HttpResponse:
 
 @login_required
 def add_labor(request: HttpRequest, pk: int) -> HttpResponse:
-    order = get_object_or_404(WorkOrder, pk=pk)
+    order = get_object_or_404(WorkOrder.objects.scoped(request.branch_id), pk=pk)
     form = WorkLaborForm(request.POST)
     if form.is_valid():
         l = form.save(commit=False); l.work_order = order; l.save()
@@ -102,9 +354,85 @@ def add_labor(request: HttpRequest, pk: int) -> HttpResponse:
     return redirect("workorder_detail", pk=pk)
 
 
+LINE_FORMSETS = (("parts", WorkPartFormSet), ("labor", WorkLaborFormSet), ("payments", PaymentFormSet))
+
+
+def _formset_data(prefix: str, rows) -> dict:
+    """JSON 행 목록을 formset POST 데이터 형태로 바꾼다."""
+    data = {f"{prefix}-TOTAL_FORMS": str(len(rows)), f"{prefix}-INITIAL_FORMS": "0"}
+    for i, row in enumerate(rows):
+        for key, value in (row or {}).items():
+            data[f"{prefix}-{i}-{key}"] = "" if value is None else str(value)
+    return data
+
+
+@login_required
+def add_lines(request: HttpRequest, pk: int) -> HttpResponse:
+    """부품/공임/결제 여러 줄을 한 번에 입력 (formset POST 또는 JSON) - 합계는 마지막에 한 번만 계산"""
+    if request.method != "POST":
+        return HttpResponse(status=405)
+    order = get_object_or_404(WorkOrder.objects.scoped(request.branch_id), pk=pk)
+    as_json = request.content_type == "application/json"
+    if as_json:
+        try:
+            payload = json.loads(request.body or b"{}")
+            data = {}
+            for prefix, _ in LINE_FORMSETS:
+                data.update(_formset_data(prefix, payload.get(prefix) or []))
+        except (ValueError, AttributeError):
+            return JsonResponse({"ok": False, "errors": "invalid JSON"}, status=400)
+    else:
+        # 보내지 않은 formset 은 0줄로 취급
+        data = request.POST.copy()
+        for prefix, _ in LINE_FORMSETS:
+            data.setdefault(f"{prefix}-TOTAL_FORMS", "0")
+            data.setdefault(f"{prefix}-INITIAL_FORMS", "0")
+
+    formsets = {prefix: cls(data, prefix=prefix) for prefix, cls in LINE_FORMSETS}
+    if not all(fs.is_valid() for fs in formsets.values()):
+        errors = {prefix: {"forms": fs.errors, "non_form": fs.non_form_errors()} for prefix, fs in formsets.items()}
+        if as_json:
+            return JsonResponse({"ok": False, "errors": errors}, status=400)
+        messages.error(request, "일괄 입력 내용을 확인해주세요.")
+        return redirect("workorder_detail", pk=pk)
+
+    rows = {prefix: [f.save(commit=False) for f in fs if f.has_changed()] for prefix, fs in formsets.items()}
+    for objs in rows.values():
+        for obj in objs:
+            obj.work_order = order
+    for part in rows["parts"]:
+        part.line_total = part.compute_line_total()
+    with transaction.atomic():
+        WorkPart.objects.bulk_create(rows["parts"])
+        WorkLabor.objects.bulk_create(rows["labor"])
+        Payment.objects.bulk_create(rows["payments"])
+        if any(rows.values()):
+            WorkOrder.objects.filter(pk=order.pk).recompute_totals()
+        rollups.mark_orders([order.pk])
+        history.bump([order.vehicle_id])
+        fragments.bump_lines([order.pk])
+    created = {prefix: len(objs) for prefix, objs in rows.items()}
+    if as_json:
+        order.refresh_from_db(fields=["subtotal_parts", "subtotal_labor", "tax_amount", "total_amount", "paid_amount", "balance_due"])
+        return JsonResponse({
+            "ok": True,
+            "created": created,
+            "totals": {
+                "subtotal_parts": int(order.subtotal_parts),
+                "subtotal_labor": int(order.subtotal_labor),
+                "tax_amount": int(order.tax_amount),
+                "total_amount": int(order.total_amount),
+                "paid_amount": int(order.paid_amount),
+                "balance_due": int(order.balance_due),
+            },
+        })
+    messages.success(request, f"부품 {created['parts']}건, 공임 {created['labor']}건, 결제 {created['payments']}건이 추가되었습니다.")
+    return redirect("workorder_detail", pk=pk)
+
+
 @login_required
 def add_payment(request: HttpRequest, pk: int) -> HttpResponse:
-    order = get_object_or_404(WorkOrder, pk=pk)
+    order = get_object_or_404(WorkOrder.objects.scoped(request.branch_id), pk=pk)
     form = PaymentForm(request.POST)
     if form.is_valid():
         pay = form.save(commit=False); pay.work_order = order; pay.save()
@@ -119,162 +447,74 @@ def add_payment(request: HttpRequest, pk: int) -> HttpResponse:
 
 @login_required
 def workorder_status(request: HttpRequest, pk: int, action: str) -> HttpResponse:
-    """작업오더 상태 빠른 변경 (완료/결제) - 직원용"""
+    """작업오더 상태 빠른 변경 (완료/결제 후 출고) - 직원용"""
     if request.method != "POST":
         return HttpResponse(status=405)
-    order = get_object_or_404(WorkOrder, pk=pk)
+    order = get_object_or_404(WorkOrder.objects.scoped(request.branch_id), pk=pk)
     if action == "done":
-        order.status = "done"
-        order.save(update_fields=["status"])
+        order.status = WorkOrder.Status.DONE
+        order.save(update_fields=["status", "updated_at"])
         messages.success(request, "작업 상태를 '완료'로 변경했습니다.")
     elif action == "paid":
-        order.status = "paid"
-        order.save(update_fields=["status"])
-        messages.success(request, "작업 상태를 '결제완료'로 변경했습니다.")
+        # 결제 여부는 결제 내역(미수금)으로 판단 - 남은 금액이 있으면 결제 입력 화면으로
+        if order.balance_due > 0:
+            messages.warning(request, f"미수금 {order.balance_due:,.0f}원이 남아 있습니다. 결제를 먼저 입력해주세요.")
+            return redirect("workorder_detail", pk=pk)
+        order.status = WorkOrder.Status.RELEASED
+        order.out_datetime = order.out_datetime or timezone.now()
+        order.save(update_fields=["status", "out_datetime", "updated_at"])
+        messages.success(request, "결제 완료 - '출고'로 변경했습니다.")
     else:
         return HttpResponse(status=400)
     return redirect("dashboard")
 
 
-def invoice_pdf(request: HttpRequest, pk: int) -> HttpResponse:
-    """견적서/정비명세서 PDF (썬바이크 흑백 + 로고)"""
-    order = get_object_or_404(WorkOrder.objects.select_related("vehicle","vehicle__customer","branch"), pk=pk)
+def invoice_etag(order: WorkOrder, parts, labor, payments=None) -> str:
+    """PDF 내용을 결정하는 값(오더/차량/고객/라인/결제/합계/템플릿 버전)의 해시 - payments 는 (pk, amount, method) 목록"""
+    if payments is None:
+        payments = order.payments.values_list("pk", "amount", "method").order_by("pk")
+    v = order.vehicle
+    payload = [
+        pdf.TEMPLATE_VERSION,
+        [order.pk, order.order_no, order.branch.name, order.odometer_in, order.recommendations, order.status,
+         str(order.subtotal_parts), str(order.subtotal_labor), str(order.tax_amount), str(order.total_amount),
+         order.updated_at.isoformat()],
+        [v.model, v.plate_no, v.vin, v.customer.name, v.customer.phone],
+        [[p.pk, p.part_name, str(p.qty), str(p.unit_price), str(p.line_total)] for p in parts],
+        [[l.pk, l.labor_name, str(l.price)] for l in labor],
+        [[pk, str(amount), method] for pk, amount, method in payments],
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode()).hexdigest()[:32]
 
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    W, H = A4
 
-    # --- Font: Korean-safe (CID) ---
-    font_name = "HYGothic-Medium"
-    try:
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-        pdfmetrics.registerFont(UnicodeCIDFont(font_name))
-    except Exception:
-        font_name = "Helvetica"
-
-    # --- Header (logo + title) ---
-    from django.conf import settings
-    logo_paths = [
-        settings.BASE_DIR / "static" / "core" / "logo.jpg",
-        settings.BASE_DIR / "static" / "core" / "logo.png",
-    ]
-    logo_path = next((p for p in logo_paths if p.exists()), None)
+def invoice_pdf(request: HttpRequest, pk: int) -> HttpResponse:
+    """견적서/정비명세서 PDF - 내용 해시(ETag)가 같으면 캐시된 바이트를 그대로 내려준다"""
+    order = get_object_or_404(WorkOrder.objects.scoped(request.branch_id)
+                              .select_related("vehicle","vehicle__customer","branch"), pk=pk)
+    parts = list(order.parts.all())
+    labor = list(order.labor.all())
+    etag = quote_etag(invoice_etag(order, parts, labor))
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    cache = caches[settings.INVOICE_PDF_CACHE]
+    key = invoice_cache_key(order.pk)
+    hit = cache.get(key)
+    if hit and hit[0] == etag:
+        metrics.invoice_cache.inc(result="hit")
+        body = hit[1]
+    else:
+        metrics.invoice_cache.inc(result="miss")
+        body = pdf.render_invoice(order, parts, labor)
+        cache.set(key, (etag, body), settings.INVOICE_PDF_CACHE_TIMEOUT)
+
+    return invoice_response(order, etag, body)
 
-    top_y = H - 18*mm
-    if logo_path:
-        try:
-            # draw logo (fit height 14mm)
-            c.drawImage(str(logo_path), 20*mm, H-28*mm, height=14*mm, width=14*mm, mask='auto')
-        except Exception:
-            pass
-
-    c.setFillColorRGB(0, 0, 0)
-    c.setFont(font_name, 16)
-    c.drawString(36*mm, top_y, "썬바이크 정비 견적/명세서")
-
-    c.setFont(font_name, 10)
-    c.drawRightString(190*mm, H-22*mm, f"발행일: {timezone.localtime(timezone.now()).strftime('%Y-%m-%d %H:%M')}")
-
-    # --- Basic info box ---
-    cust = order.vehicle.customer
-    ident = order.vehicle.plate_no or order.vehicle.vin or "-"
-    y = H - 36*mm
-    c.setLineWidth(0.8)
-    c.rect(20*mm, y-26*mm, 170*mm, 26*mm)  # box
-
-    c.setFont(font_name, 10)
-    c.drawString(24*mm, y-8*mm, f"접수번호: {order.order_no}")
-    c.drawString(24*mm, y-14*mm, f"센터: {order.branch.name}")
-    c.drawString(24*mm, y-20*mm, f"고객: {cust.name}  /  {cust.phone}")
-    c.drawString(110*mm, y-8*mm, f"차량: {order.vehicle.model}")
-    c.drawString(110*mm, y-14*mm, f"식별: {ident}")
-    c.drawString(110*mm, y-20*mm, f"입고 주행거리: {order.odometer_in or '-'}")
-
-    # --- Sections ---
-    y = y - 36*mm
-
-    def section_title(txt):
-        nonlocal y
-        c.setFont(font_name, 11)
-        c.drawString(20*mm, y, txt)
-        y -= 4*mm
-        c.setLineWidth(0.6)
-        c.line(20*mm, y, 190*mm, y)
-        y -= 8*mm
-
-    def table_header(cols):
-        nonlocal y
-        c.setFont(font_name, 9)
-        for (x, label, align) in cols:
-            if align == "R":
-                c.drawRightString(x, y, label)
-            else:
-                c.drawString(x, y, label)
-        y -= 3*mm
-        c.line(20*mm, y, 190*mm, y)
-        y -= 6*mm
-
-    # Parts
-    section_title("부품/소모품")
-    table_header([
-        (20*mm, "품목", "L"),
-        (120*mm, "수량", "R"),
-        (155*mm, "단가", "R"),
-        (190*mm, "금액", "R"),
-    ])
-    c.setFont(font_name, 9)
-    for p in order.parts.all():
-        if y < 35*mm:
-            c.showPage()
-            y = H - 20*mm
-        c.drawString(20*mm, y, str(p.part_name)[:34])
-        c.drawRightString(120*mm, y, str(p.qty))
-        c.drawRightString(155*mm, y, f"{int(p.unit_price):,}")
-        c.drawRightString(190*mm, y, f"{int(p.line_total):,}")
-        y -= 6*mm
-
-    # Labor
-    y -= 4*mm
-    section_title("공임")
-    table_header([
-        (20*mm, "항목", "L"),
-        (190*mm, "금액", "R"),
-    ])
-    c.setFont(font_name, 9)
-    for l in order.labor.all():
-        if y < 35*mm:
-            c.showPage()
-            y = H - 20*mm
-        c.drawString(20*mm, y, str(l.labor_name)[:40])
-        c.drawRightString(190*mm, y, f"{int(l.price):,}")
-        y -= 6*mm
-
-    # Totals (black/white)
-    y -= 8*mm
-    c.setLineWidth(0.8)
-    c.rect(110*mm, y-28*mm, 80*mm, 28*mm)
-    c.setFont(font_name, 10)
-    c.drawString(114*mm, y-8*mm, "부품 소계")
-    c.drawRightString(188*mm, y-8*mm, f"{int(order.subtotal_parts):,} 원")
-    c.drawString(114*mm, y-14*mm, "공임 소계")
-    c.drawRightString(188*mm, y-14*mm, f"{int(order.subtotal_labor):,} 원")
-    c.drawString(114*mm, y-20*mm, "부가세")
-    c.drawRightString(188*mm, y-20*mm, f"{int(order.tax_amount):,} 원")
-    c.setFont(font_name, 12)
-    c.drawString(114*mm, y-26*mm, "총액")
-    c.drawRightString(188*mm, y-26*mm, f"{int(order.total_amount):,} 원")
-
-    # Notes
-    y = min(y-38*mm, 60*mm)
-    c.setFont(font_name, 9)
-    c.drawString(20*mm, y, "비고:")
-    c.setFont(font_name, 9)
-    note = (order.recommendations or "").strip() or "—"
-    c.drawString(30*mm, y, note[:90])
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return FileResponse(buf, as_attachment=True, filename=f"sunbike_{order.order_no}.pdf")
 
+def invoice_response(order: WorkOrder, etag: str, body: bytes) -> HttpResponse:
+    resp = HttpResponse(body, content_type="application/pdf")
+    resp["Content-Disposition"] = content_disposition_header(True, f"sunbike_{order.order_no}.pdf")
+    resp["ETag"] = etag
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
@@ -0,0 +1,105 @@
+"""ASGI 용 async 뷰 - 조회가 많은 엔드포인트 (대시보드 검색, 작업오더 JSON, 명세서 PDF)
+
+DB 는 async ORM(aget, aiterator)으로 읽고, ReportLab 렌더링처럼 이벤트 루프를 막는 작업은 크기가 정해진
+스레드 풀(PDF_RENDER_THREADS)로 넘긴다 - 렌더링이 몰려도 동시에 도는 건 풀 크기만큼이고 나머지는 기다린다.
+WSGI 로 띄워도 동작한다 (Django 가 요청마다 이벤트 루프를 만들어 실행). 명세서 PDF 는 ASYNC_VIEWS=1
+(asgi.py 가 켬)일 때만 이 뷰로 연결된다.
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from . import metrics, pdf
+from .models import WorkOrder
+from .pagination import akeyset_page
+from .utils import invoice_cache_key
+from .views import dashboard_queryset, invoice_etag, invoice_response
+
+_render_pool = ThreadPoolExecutor(max_workers=getattr(settings, "PDF_RENDER_THREADS", 2), thread_name_prefix="pdf-render")
+
+
+def _iso(dt) -> str | None:
+    return timezone.localtime(dt).isoformat() if dt else None
+
+
+def _row(o: WorkOrder) -> dict:
+    v = o.vehicle
+    return {
+        "id": o.pk, "order_no": o.order_no, "status": o.status, "status_display": o.get_status_display(),
+        "in_datetime": _iso(o.in_datetime), "total_amount": int(o.total_amount), "balance_due": int(o.balance_due),
+        "customer": v.customer.name, "phone": v.customer.phone, "model": v.model, "plate_no": v.plate_no,
+        "technician": o.assigned_to.get_username() if o.assigned_to else None,
+    }
+
+
+@login_required
+async def search_orders(request: HttpRequest) -> JsonResponse:
+    """대시보드 검색 JSON - ?q=&cursor= (최신순 keyset 페이지)"""
+    # 검색 색인 종류 확인(FTS 테이블 유무)이 DB 를 볼 수 있어 queryset 구성도 스레드에서
+    qs = await sync_to_async(dashboard_queryset)(request.GET.get("q", "").strip(), request.branch_id)
+    page = await akeyset_page(qs, request.GET.get("cursor"), settings.DASHBOARD_PAGE_SIZE)
+    return JsonResponse({"orders": [_row(o) for o in page.object_list], "next_cursor": page.next_cursor,
+                         "has_more": page.has_more}, json_dumps_params={"ensure_ascii": False})
+
+
+@login_required
+async def workorder_json(request: HttpRequest, pk: int) -> JsonResponse:
+    """작업오더 상세 JSON - 오더/차량/고객/합계 + 부품/공임/결제"""
+    qs = WorkOrder.objects.scoped(request.branch_id).select_related("branch", "vehicle", "vehicle__customer", "assigned_to")
+    o = await aget_object_or_404(qs, pk=pk)
+    data = _row(o)
+    data.update({
+        "branch": o.branch.name, "vin": o.vehicle.vin, "out_datetime": _iso(o.out_datetime),
+        "odometer_in": o.odometer_in, "odometer_out": o.odometer_out,
+        "complaint": o.customer_complaint, "diagnosis": o.diagnosis, "work_detail": o.work_detail,
+        "recommendations": o.recommendations,
+        "subtotal_parts": int(o.subtotal_parts), "subtotal_labor": int(o.subtotal_labor),
+        "tax_amount": int(o.tax_amount), "paid_amount": int(o.paid_amount),
+        "updated_at": _iso(o.updated_at),
+        "parts": [{"id": p.pk, "name": p.part_name, "qty": str(p.qty), "unit_price": int(p.unit_price),
+                   "amount": int(p.line_total)} async for p in o.parts.order_by("pk").aiterator()],
+        "labor": [{"id": l.pk, "name": l.labor_name, "minutes": l.minutes, "amount": int(l.price)}
+                  async for l in o.labor.order_by("pk").aiterator()],
+        "payments": [{"id": p.pk, "method": p.method, "method_display": p.get_method_display(),
+                      "amount": int(p.amount), "paid_at": _iso(p.paid_at)}
+                     async for p in o.payments.order_by("paid_at", "pk").aiterator()],
+    })
+    return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+
+
+async def invoice_pdf(request: HttpRequest, pk: int) -> HttpResponse:
+    """views.invoice_pdf 의 async 판 - ETag/캐시 동작은 같고 렌더링만 스레드 풀에서"""
+    qs = WorkOrder.objects.scoped(request.branch_id).select_related("vehicle", "vehicle__customer", "branch")
+    order = await aget_object_or_404(qs, pk=pk)
+    parts = [p async for p in order.parts.all().aiterator()]
+    labor = [l async for l in order.labor.all().aiterator()]
+    # values_list().aiterator() 는 Django 5.1 에서 첫 조회를 async 컨텍스트에서 실행해 버려 values() 로 읽는다
+    payments = [(r["pk"], r["amount"], r["method"])
+                async for r in order.payments.values("pk", "amount", "method").order_by("pk").aiterator()]
+    etag = quote_etag(invoice_etag(order, parts, labor, payments))
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    cache = caches[settings.INVOICE_PDF_CACHE]
+    key = invoice_cache_key(order.pk)
+    hit = await cache.aget(key)
+    if hit and hit[0] == etag:
+        metrics.invoice_cache.inc(result="hit")
+        body = hit[1]
+    else:
+        metrics.invoice_cache.inc(result="miss")
+        body = await asyncio.get_running_loop().run_in_executor(_render_pool, pdf.render_invoice, order, parts, labor)
+        await cache.aset(key, (etag, body), settings.INVOICE_PDF_CACHE_TIMEOUT)
+    return invoice_response(order, etag, body)
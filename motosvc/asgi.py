@@ -0,0 +1,12 @@
+"""ASGI 진입점 (선택) - uvicorn motosvc.asgi:application
+
+async 뷰(core.views_async)만 이득을 본다. sync 뷰의 직렬 실행과 스트리밍 응답 한계는 settings.ASYNC_VIEWS 주석 참고.
+"""
+import os
+from django.core.asgi import get_asgi_application
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "motosvc.settings")
+os.environ.setdefault("ASYNC_VIEWS", "1")
+application = get_asgi_application()
+
+from core import pdf  # noqa: E402
+pdf.warm_up()
@@ -0,0 +1,63 @@
+"""DATABASES 항목 만들기 - settings.py 전용 (Django 설정 전에 불리므로 django.conf 를 읽지 않는다)
+
+DATABASE_URL 을 해석하지 못하거나 필요한 패키지가 없으면 ImproperlyConfigured 로 바로 멈춘다.
+예전처럼 조용히 SQLite 로 바꿔 뜨면 접수 데이터가 엉뚱한 파일에 쌓이기 때문이다.
+
+PostgreSQL 이면
+- DB_POOL=1(기본): psycopg 3 커넥션 풀 (OPTIONS["pool"]) - 워커마다 DB_POOL_MIN_SIZE~DB_POOL_MAX_SIZE 개를 열어 두고
+  요청이 끝나면 연결을 풀에 돌려준다. 전체 연결 수 = 워커 수 × DB_POOL_MAX_SIZE 를 DB 한도 안에 맞출 것.
+- DB_POOL=0: 예전처럼 요청 간 연결 유지(CONN_MAX_AGE)
+- 두 경우 모두 CONN_HEALTH_CHECKS (풀은 꺼낼 때 검사), statement_timeout, connect_timeout 을 건다.
+"""
+from __future__ import annotations
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} 는 정수여야 합니다: {os.environ.get(name)!r}") from None
+
+
+def from_url(url: str, alias: str = "default") -> dict:
+    try:
+        import dj_database_url
+    except ImportError as exc:
+        raise ImproperlyConfigured("DATABASE_URL 을 쓰려면 dj-database-url 이 필요합니다 (requirements.txt).") from exc
+    try:
+        db = dj_database_url.parse(url, conn_max_age=_env_int("DB_CONN_MAX_AGE", 600))
+    except Exception as exc:  # 알 수 없는 scheme, 잘못된 포트 등
+        raise ImproperlyConfigured(f"{alias} 데이터베이스 URL 을 해석할 수 없습니다: {exc}") from exc
+    if not db.get("ENGINE") or not db.get("NAME"):
+        raise ImproperlyConfigured(f"{alias} 데이터베이스 URL 에 엔진/DB 이름이 없습니다.")
+    return tune(db)
+
+
+def tune(db: dict) -> dict:
+    """PostgreSQL 연결에 풀/헬스체크/타임아웃 옵션을 붙인다 (다른 엔진은 그대로)."""
+    if "postgresql" not in db.get("ENGINE", ""):
+        return db
+    options = db.setdefault("OPTIONS", {})
+    options.setdefault("connect_timeout", _env_int("DB_CONNECT_TIMEOUT", 5))
+    timeout_ms = _env_int("DB_STATEMENT_TIMEOUT_MS", 30_000)
+    if timeout_ms:
+        options["options"] = f"{options.get('options', '')} -c statement_timeout={timeout_ms}".strip()
+    db["CONN_HEALTH_CHECKS"] = True
+    if os.environ.get("DB_POOL", "1") == "1":
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError as exc:
+            raise ImproperlyConfigured("DB_POOL=1 에는 psycopg[pool] 이 필요합니다 (또는 DB_POOL=0).") from exc
+        options["pool"] = {
+            "min_size": _env_int("DB_POOL_MIN_SIZE", 1),
+            "max_size": _env_int("DB_POOL_MAX_SIZE", 4),
+            "timeout": _env_int("DB_POOL_TIMEOUT", 10),  # 빈 연결을 기다리는 최대 초 - 넘으면 요청 실패
+            "max_idle": _env_int("DB_POOL_MAX_IDLE", 300),
+            "max_lifetime": _env_int("DB_POOL_MAX_LIFETIME", 1800),
+        }
+        db["CONN_MAX_AGE"] = 0  # 풀과 요청 간 연결 유지는 같이 쓸 수 없다
+    return db
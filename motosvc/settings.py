@@ -20,13 +20,17 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
 ]
 
-# ✅ WhiteNoise 제거 (urls.py에서 static 강제 서빙할 거라서)
+# ✅ WhiteNoise 대신 core.staticfiles 가 collectstatic 결과를 메모리에서 바로 서빙 (세션/인증/DB 전에 응답)
 MIDDLEWARE = [
+    "core.staticfiles.StaticFilesMiddleware",  # STATIC_ROOT 가 없거나 STATIC_URL 이 외부 주소면 빠짐
+    "core.middleware.MetricsMiddleware",  # METRICS_ENABLED=0 이면 빠짐
+    "core.middleware.QueryProfilingMiddleware",  # QUERY_PROFILING=1 일 때만 동작
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.branching.BranchContextMiddleware",  # 요청별 지점 컨텍스트 (request.branch_id)
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -44,24 +48,34 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "core.branching.context",
             ]
         },
     }
 ]
 
 WSGI_APPLICATION = "motosvc.wsgi.application"
+ASGI_APPLICATION = "motosvc.asgi.application"
+
+# ✅ ASGI(uvicorn 등)로 띄우면 asgi.py 가 ASYNC_VIEWS=1 로 켠다 - 명세서 PDF 를 async 뷰로 (렌더링은 PDF_RENDER_THREADS 스레드 풀)
+#    ASGI 는 선택 사항이고 기본 배포는 gunicorn(WSGI). ASGI 의 한계:
+#    - async 가 아닌 뷰/미들웨어는 thread_sensitive 실행기에서 차례로 돈다 (요청마다 스레드 하나, 그 밖에서는 프로세스에 하나).
+#      대부분의 화면은 sync 뷰라 동시 처리량이 늘지 않고 sync/async 전환 비용만 붙는다 - 이득은 core.views_async 경로뿐
+#    - sync 이터레이터 StreamingHttpResponse 는 끝까지 메모리에 모은 뒤 보낸다. CSV 내보내기는 ASYNC_VIEWS 일 때
+#      async 이터레이터(exports.aiter_csv)로 보내지만, 묶음을 꺼내는 동안 그 요청의 sync 스레드를 차지한다
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "0") == "1"
+PDF_RENDER_THREADS = int(os.environ.get("PDF_RENDER_THREADS", "2"))
 
 
 # ✅ DB: Render는 DATABASE_URL 권장 (없으면 기존 ENV 방식 유지)
+#    URL 을 해석 못 하면 SQLite 로 바꾸지 않고 시작을 멈춘다. PostgreSQL 은 커넥션 풀/헬스체크/statement_timeout
+#    (DB_POOL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT_MS - motosvc/database.py)
+from motosvc import database
+
 DATABASE_URL = os.environ.get("DATABASE_URL", "").strip()
 
 if DATABASE_URL:
-    try:
-        import dj_database_url
-        DATABASES = {"default": dj_database_url.parse(DATABASE_URL, conn_max_age=600)}
-    except Exception:
-        # dj_database_url가 없거나 파싱 실패하면 기본 sqlite로 fallback
-        DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db.sqlite3"}}
+    DATABASES = {"default": database.from_url(DATABASE_URL)}
 else:
     DATABASES = {
         "default": {
@@ -73,6 +87,19 @@ else:
             "PORT": os.environ.get("DB_PORT", ""),
         }
     }
+    database.tune(DATABASES["default"])
+
+# ✅ 읽기 복제본(선택): DATABASE_REPLICA_URLS="postgres://...,postgres://..." → replica1, replica2 ...
+#    지점별 읽기 DB(선택): BRANCH_READ_DATABASES="3:replica1,5:replica2" (지점 id:별칭)
+DATABASE_REPLICAS = []
+for _i, _url in enumerate([u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()], start=1):
+    DATABASES[f"replica{_i}"] = {**database.from_url(_url, f"replica{_i}"), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica{_i}")
+BRANCH_READ_DATABASES = {
+    int(k): v.strip() for k, v in (p.split(":", 1) for p in os.environ.get("BRANCH_READ_DATABASES", "").split(",") if ":" in p)
+}
+if DATABASE_REPLICAS or BRANCH_READ_DATABASES:
+    DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
 
 LANGUAGE_CODE = "ko-kr"
 TIME_ZONE = "Asia/Seoul"
@@ -85,10 +112,16 @@ LANGUAGES = [
     ("ko", _("한국어")),
 ]
 
-# ✅ static: collectstatic 결과(staticfiles)를 urls.py가 직접 서빙
+# ✅ static: collectstatic 때 해시 파일명(app.<hash>.css) + .gz/.br 미리 압축, 워커는 메모리에서 1년 immutable 로 서빙
+#    STATIC_MEMORY_MAX_BYTES 보다 큰 파일은 메모리에 올리지 않고 파일로(sendfile) 보낸다
 STATIC_URL = os.environ.get("STATIC_URL", "/static/")
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_MEMORY_MAX_BYTES = int(os.environ.get("STATIC_MEMORY_MAX_BYTES", str(512 * 1024)))
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "core.staticfiles.CompressedManifestStaticFilesStorage"},
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -98,3 +131,83 @@ LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/login/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# ✅ 대시보드 목록: 커서 페이지 크기 / 건수 표시 방식(estimate | exact | none)
+DASHBOARD_PAGE_SIZE = int(os.environ.get("DASHBOARD_PAGE_SIZE", "50"))
+DASHBOARD_COUNT_MODE = os.environ.get("DASHBOARD_COUNT_MODE", "estimate")
+
+# ✅ 검색 자동완성 캐시(프로세스별 LRU) 크기/유지시간(초)
+SEARCH_SUGGEST_CACHE_SIZE = int(os.environ.get("SEARCH_SUGGEST_CACHE_SIZE", "1024"))
+SEARCH_SUGGEST_TTL = int(os.environ.get("SEARCH_SUGGEST_TTL", "30"))
+
+# ✅ 차량 정비 이력: 페이지 크기 / 캐시(별칭, 유지시간 초) - 변경 시 차량별 버전을 올려 무효화
+#    버전이 워커 간 공유돼야 하므로 프로세스 메모리(LocMem) 캐시면 이력은 캐시하지 않는다 (REDIS_URL 또는 파일 캐시 별칭)
+VEHICLE_HISTORY_PAGE_SIZE = int(os.environ.get("VEHICLE_HISTORY_PAGE_SIZE", "20"))
+VEHICLE_HISTORY_CACHE = os.environ.get("VEHICLE_HISTORY_CACHE", "default")
+VEHICLE_HISTORY_TTL = int(os.environ.get("VEHICLE_HISTORY_TTL", "120"))
+
+# ✅ 접수번호: 형식({date}, {seq}, {branch}), 지점별 카운터 여부, 워커별 선할당 블록 크기(1 = 빈 번호 없음)
+#    지점별 카운터(ORDER_NO_PER_BRANCH=1)는 형식에 {branch} 가 있어야 시작된다 (core.checks - core.E001)
+ORDER_NO_FORMAT = os.environ.get("ORDER_NO_FORMAT", "{date:%Y%m%d}-{seq:03d}")
+ORDER_NO_PER_BRANCH = os.environ.get("ORDER_NO_PER_BRANCH", "0") == "1"
+ORDER_NO_BLOCK_SIZE = int(os.environ.get("ORDER_NO_BLOCK_SIZE", "1"))
+
+# ✅ 캐시: 기본은 프로세스 메모리, 견적/명세서 PDF 는 디스크(파일) 캐시 - 워커 간 공유
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "invoices": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("INVOICE_PDF_CACHE_DIR", str(BASE_DIR / "cache" / "invoices")),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("INVOICE_PDF_CACHE_MAX", "2000"))},
+    },
+}
+# ✅ REDIS_URL 이 있으면 default 캐시를 Redis 로 (워커 간 공유 - 조각/이력/지점 캐시가 한 번에 무효화됨, pip install redis)
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES["default"] = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+
+# ✅ 세션: cached_db(읽기는 캐시) + 쓰기 합치기
+#    SESSION_SAVE_EVERY_REQUEST=1 이면 로그인 유지를 요청마다 연장(슬라이딩 만료)하되 DB 에는 SESSION_REFRESH_INTERVAL 초에 한 번만 저장
+#    기본은 Django 와 같이 꺼짐 - 로그인 후 SESSION_COOKIE_AGE 가 지나면 만료
+#    세션 캐시는 워커 간 공유돼야 하므로 Redis(REDIS_URL) 아니면 파일 캐시
+CACHES["sessions"] = CACHES["default"] if REDIS_URL else {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": os.environ.get("SESSION_CACHE_DIR", str(BASE_DIR / "cache" / "sessions")),
+    "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("SESSION_CACHE_MAX", "10000"))},
+}
+SESSION_ENGINE = "core.sessions"
+SESSION_CACHE_ALIAS = "sessions"
+SESSION_SAVE_EVERY_REQUEST = os.environ.get("SESSION_SAVE_EVERY_REQUEST", "0") == "1"
+SESSION_REFRESH_INTERVAL = int(os.environ.get("SESSION_REFRESH_INTERVAL", "300"))
+
+# ✅ request.user 를 워커 메모리에 AUTH_USER_CACHE_TTL 초 캐시 (ModelBackend 는 이 백엔드로 로그인하기 전 세션용)
+AUTHENTICATION_BACKENDS = ["core.auth_backends.CachedModelBackend", "django.contrib.auth.backends.ModelBackend"]
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", "30"))
+
+# ✅ 화면 조각 캐시(대시보드 행, 상세 라인 표): 캐시 별칭 / 유지시간(초) - 변경은 core.signals 가 무효화
+#    무효화 버전이 워커 간 공유돼야 하므로 프로세스 메모리(LocMem) 캐시면 조각 캐시는 꺼진다 (REDIS_URL 또는 파일 캐시 별칭)
+FRAGMENT_CACHE = os.environ.get("FRAGMENT_CACHE", "default")
+FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", "600"))
+INVOICE_PDF_CACHE = os.environ.get("INVOICE_PDF_CACHE", "invoices")
+INVOICE_PDF_CACHE_TIMEOUT = int(os.environ.get("INVOICE_PDF_CACHE_TIMEOUT", str(60 * 60 * 24 * 7)))
+# 명세서 일괄 출력: 동시 작업 수, 시작 대기 한도(초), 진행 없는 작업을 실패로 보는 시간(초)
+EXPORT_JOB_MAX_ACTIVE = int(os.environ.get("EXPORT_JOB_MAX_ACTIVE", "1"))
+EXPORT_JOB_START_TIMEOUT = int(os.environ.get("EXPORT_JOB_START_TIMEOUT", "120"))
+EXPORT_JOB_STALE_SECONDS = int(os.environ.get("EXPORT_JOB_STALE_SECONDS", "600"))
+# PDF 폰트/로고를 웹 서버(wsgi/asgi) 시작 시 미리 준비 (0 이면 첫 PDF 요청 때, manage.py 명령은 항상 건너뜀)
+PDF_WARMUP = os.environ.get("PDF_WARMUP", "1") == "1"
+
+# ✅ 요청 프로파일링(SQL 건수/시간, N+1, 템플릿 시간 → Server-Timing 헤더 + "core.profiling" 느린 요청 로그)
+QUERY_PROFILING = os.environ.get("QUERY_PROFILING", "0") == "1"
+QUERY_PROFILING_HEADERS = os.environ.get("QUERY_PROFILING_HEADERS", "1") == "1"
+QUERY_PROFILING_SAMPLE_RATE = float(os.environ.get("QUERY_PROFILING_SAMPLE_RATE", "0.1"))
+QUERY_PROFILING_SLOW_MS = float(os.environ.get("QUERY_PROFILING_SLOW_MS", "500"))
+QUERY_PROFILING_MAX_QUERIES = int(os.environ.get("QUERY_PROFILING_MAX_QUERIES", "50"))
+QUERY_PROFILING_DUPLICATE_THRESHOLD = int(os.environ.get("QUERY_PROFILING_DUPLICATE_THRESHOLD", "3"))
+
+# ✅ /metrics (Prometheus 텍스트). 여러 워커 값을 합치려면 METRICS_DIR 지정(배포 시작 때 비울 것).
+#    METRICS_TOKEN 이 있으면 "Authorization: Bearer <토큰>", 없으면 staff 로그인만 허용
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
@@ -2,3 +2,6 @@ import os
 from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "motosvc.settings")
 application = get_wsgi_application()
+
+from core import pdf  # noqa: E402
+pdf.warm_up()